@@ -1,9 +1,18 @@
-# This ArcPy tool copies non-duplicate fields from a template feature class to a target feature class.
-# Ensures the target feature class remains unchanged if fields already exist.
+# This ArcPy tool copies non-duplicate fields from a template feature class to one or more target feature classes.
+# Ensures the target feature classes remain unchanged if fields already exist.
+# The missing fields of a target are added with one AddFields call; targets in different geodatabases are
+# processed at the same time (schema_copy.py). A schema catalog next to the template geodatabase remembers the
+# targets that already match the template, a repeated run skips them without listing their fields.
 
 # -*- coding: utf-8 -*-
+# arcpy is imported inside the methods: ArcGIS Pro loads every toolbox when the catalog refreshes,
+# loading this module only defines the classes.
 
-import arcpy
+import os
+import re
+import sys
+
+TOOLBOX_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 class Toolbox:
@@ -25,6 +34,8 @@ class Tool:
 
     def getParameterInfo(self):
         """Define the tool parameters."""
+        import arcpy
+
         params = []
 
         # Input parameters
@@ -40,7 +51,26 @@ class Tool:
             name="target_db",
             datatype="DEFeatureClass",
             parameterType="Required",
-            direction="Input"))
+            direction="Input",
+            multiValue=True))
+
+        same_name = arcpy.Parameter(
+            displayName="Require Same Feature Class Name",
+            name="require_same_name",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input")
+        same_name.value = True
+        params.append(same_name)
+
+        use_catalog = arcpy.Parameter(
+            displayName="Use Schema Catalog",
+            name="use_schema_catalog",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input")
+        use_catalog.value = True
+        params.append(use_catalog)
 
         return params
 
@@ -61,63 +91,59 @@ class Tool:
 
     def execute(self, parameters, messages):
         """The source code of the tool."""
+        import arcpy
+
         # Extract the template and target database paths from the parameters
         template_db_path = parameters[0].valueAsText
-        target_db_path = parameters[1].valueAsText
+        target_db_paths = [path.strip("'") for path in parameters[1].valueAsText.split(";")]
+        require_same_name = len(parameters) < 3 or parameters[2].value is None or bool(parameters[2].value)
+        use_catalog = len(parameters) < 4 or parameters[3].value is None or bool(parameters[3].value)
 
         # Check if the user has input the same path for both the template and target databases
-        if template_db_path == target_db_path:
+        if template_db_path in target_db_paths:
             arcpy.AddError("Error: The template and target database paths must be different.")
             raise arcpy.ExecuteError("Template and target database paths cannot be the same.")
 
-        # Split the template and target database paths to compare their components
-        template_db_partial_path = template_db_path.split("\\")
-        target_db_partial_path = target_db_path.split("\\")
-
-        # Initialize common path list
-        common_path = []
-
-        # Check if the last element of both paths is the same
-        if template_db_partial_path[-1] == target_db_partial_path[-1]:
-            common_path.append(template_db_partial_path[-1])
-
-        elif template_db_partial_path[-1] != target_db_partial_path[-1]:
-        # If not, raise an error and stop execution
+        # Check if the last element of the template and target paths is the same
+        template_name = re.split(r"[\\/]", template_db_path)[-1]
+        other_names = [path for path in target_db_paths if re.split(r"[\\/]", path)[-1] != template_name]
+        if require_same_name and other_names:
+            # If not, raise an error and stop execution
             arcpy.AddError("Error: The feature class in the template and target database must be the same.")
-            raise arcpy.ExecuteError("Template and target database paths do not match in the last element of their paths.")
-
-        # Get existing fields in the target database
-        existing_fields = [field.name for field in arcpy.ListFields(target_db_path)]
-
-        # List to keep track of duplicate fields
-        duplicate_fields = []
-
-        # Iterate through fields and store properties in a dictionary
-        fields = arcpy.ListFields(template_db_path)
-        for field in fields:
-            if field.name not in ['OBJECTID', 'Shape']:
-                if field.name in existing_fields:
-                    # If field already exists in target, add to the list of duplicates
-                    duplicate_fields.append(field.name)
-                    continue
-
-                field_name = field.name
-                field_type = field.type
-                field_length = field.length
-                arcpy.AddField_management(target_db_path, field_name, field_type, field_length=field_length)
-
-        # if duplicate_fields:
-        #     duplicate_fields_str = ", ".join(duplicate_fields)
-        #     arcpy.AddError(f"Error: The following field/s already exist/s in the target database: {duplicate_fields_str}.")
-        #     raise arcpy.ExecuteError(f"Attempted to add existing field/s: {duplicate_fields_str}.")
-        #
-        #     arcpy.AddWarning(f"Warning: The field/s {duplicate_fields_str} already exist/s in the target database. Field/s will not be overwritten.")
-
-        if duplicate_fields:
-            duplicate_fields_str = ", ".join(duplicate_fields)
-            field_word = "field" if len(duplicate_fields) == 1 else "fields"
-            exist_word = "exists" if len(duplicate_fields) == 1 else "exist"
-            arcpy.AddWarning(f"Warning: The {field_word} {duplicate_fields_str} already {exist_word} in the target database. {field_word.capitalize()} will not be overwritten.")
+            raise arcpy.ExecuteError(f"Template and target database paths do not match in the last element of their paths: {', '.join(other_names)}.")
+
+        if TOOLBOX_DIR not in sys.path:
+            sys.path.append(TOOLBOX_DIR)
+        from schema_copy import copy_fields_to_targets, workspace_of
+
+        # List the template fields once and add the missing ones to every target, one AddFields call per target
+        catalog_path = f"{workspace_of(template_db_path)}_schema_catalog.json" if use_catalog else None
+        results = copy_fields_to_targets(template_db_path, target_db_paths, catalog_path=catalog_path)
+
+        skipped = sum(1 for result in results if result['skipped'])
+        if skipped:
+            arcpy.AddMessage(f"{skipped} of {len(results)} target(s) already match the template (schema catalog), skipped.")
+
+        failed = []
+        for result in results:
+            if result['skipped']:
+                continue
+            if result['error']:
+                failed.append(result['target'])
+                arcpy.AddError(f"Error: The fields could not be copied to {result['target']}: {result['error']}")
+                continue
+            if result['added']:
+                arcpy.AddMessage(f"{len(result['added'])} field(s) added to {result['target']}: {', '.join(result['added'])}.")
+
+            duplicate_fields = result['existing']
+            if duplicate_fields:
+                duplicate_fields_str = ", ".join(duplicate_fields)
+                field_word = "field" if len(duplicate_fields) == 1 else "fields"
+                exist_word = "exists" if len(duplicate_fields) == 1 else "exist"
+                arcpy.AddWarning(f"Warning: The {field_word} {duplicate_fields_str} already {exist_word} in {result['target']}. {field_word.capitalize()} will not be overwritten.")
+
+        if failed:
+            raise arcpy.ExecuteError(f"The fields could not be copied to {len(failed)} of {len(results)} target(s).")
 
         return
 
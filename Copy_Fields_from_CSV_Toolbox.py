@@ -2,9 +2,8 @@
 # Ensures existing fields are not overwritten.
 
 # -*- coding: utf-8 -*-
-
-import arcpy
-import csv
+# arcpy and csv are imported inside the methods: ArcGIS Pro loads every toolbox when the catalog refreshes,
+# loading this module only defines the classes.
 
 
 class Toolbox(object):
@@ -27,6 +26,8 @@ class Tool(object):
 
     def getParameterInfo(self):
         """Define parameter definitions"""
+        import arcpy
+
         csv_file_path = arcpy.Parameter(
             displayName="Input CSV File",
             name="csv_file_path",
@@ -60,6 +61,9 @@ class Tool(object):
 
     def execute(self, parameters, messages):
         """The source code of the tool."""
+        import arcpy
+        import csv
+
         csv_file_path = parameters[0].valueAsText
         target_DB = parameters[1].valueAsText
         arcpy.env.workspace = target_DB
@@ -1,9 +1,12 @@
 # This ArcPy tool updates feature classes in a specified target database by executing a Python script file(.py).
+# arcpy, the script loader and the worker are imported inside the methods: ArcGIS Pro loads every toolbox
+# when the catalog refreshes, loading this module only defines the classes.
 
-import arcpy
 import os
 import sys
 
+TOOLBOX_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Toolbox(object):
     def __init__(self):
         self.label = "Update Feature Classes Toolbox"
@@ -17,6 +20,8 @@ class UpdateFeatureClassesTool(object):
         self.canRunInBackground = False
 
     def getParameterInfo(self):
+        import arcpy
+
         # Define parameters
         params = []
 
@@ -38,34 +43,55 @@ class UpdateFeatureClassesTool(object):
         )
         params.append(param1)
 
+        param2 = arcpy.Parameter(
+            displayName="Run in Worker Process",
+            name="use_worker",
+            datatype="GPBoolean",
+            parameterType="Optional",
+            direction="Input"
+        )
+        param2.value = True
+        params.append(param2)
+
         return params
 
     def isLicensed(self):
         return True
 
     def updateParameters(self, parameters):
+        # Start the worker process while the dialog is open, it imports arcpy before the tool runs
+        if len(parameters) > 2 and parameters[2].value:
+            if TOOLBOX_DIR not in sys.path:
+                sys.path.append(TOOLBOX_DIR)
+            from script_worker import get_worker
+            get_worker()
         return
 
     def updateMessages(self, parameters):
         return
 
     def execute(self, parameters, messages):
+        import arcpy
+
         script_file = parameters[0].valueAsText
         geodatabase = parameters[1].valueAsText
+        use_worker = len(parameters) > 2 and bool(parameters[2].value)
 
         # Set the workspace to the provided geodatabase
         arcpy.env.workspace = geodatabase
 
-        # Import the script
-        script_dir, script_name = os.path.split(script_file)
-        script_name = os.path.splitext(script_name)[0]
+        if TOOLBOX_DIR not in sys.path:
+            sys.path.append(TOOLBOX_DIR)
+        if use_worker:
+            self.execute_in_worker(script_file, geodatabase)
+            return
 
-        # Add the script directory to the system path
-        sys.path.insert(0, script_dir)
+        # Load the script: reused while it and its sibling modules are unchanged, executed again after an edit
+        from script_loader import load_script
 
         try:
-            script_module = __import__(script_name)
-        except ModuleNotFoundError as e:
+            script_module = load_script(script_file)
+        except ImportError as e:
             arcpy.AddError(f"Error importing script: {e}")
             raise
 
@@ -76,3 +102,26 @@ class UpdateFeatureClassesTool(object):
             arcpy.AddError("The script does not contain a 'main' function.")
 
         return
+
+    def execute_in_worker(self, script_file, geodatabase):
+        # Run main() in the warm worker process; its messages are shown here while it runs, Cancel stops it
+        import arcpy
+        from script_worker import ScriptCancelled, ScriptFailed, get_worker
+
+        def on_message(function_name, args):
+            getattr(arcpy, function_name)(*args)
+            if function_name == 'AddMessage' and args:
+                arcpy.SetProgressorLabel(str(args[0])[:200])
+
+        arcpy.SetProgressor("default", "Running the update script in the worker process...")
+        try:
+            seconds = get_worker().run(script_file, geodatabase, on_message, lambda: arcpy.env.isCancelled)
+        except ScriptCancelled as e:
+            arcpy.AddWarning(str(e))
+            return
+        except ScriptFailed as e:
+            arcpy.AddError(f"The update script failed:\n{e}")
+            raise arcpy.ExecuteError(str(e))
+        finally:
+            arcpy.ResetProgressor()
+        arcpy.AddMessage(f"The update script finished in {seconds} s.")
@@ -0,0 +1,168 @@
+# This script runs the update pipeline (main() of import_py_file_mainlogic_for_toolbox.py) on many geodatabases.
+# The regional geodatabases are independent, so every one runs in its own worker process and the total time scales
+# with the number of cores. Inside a worker the steps of one geodatabase run one after another (max_workers=1 for main),
+# so the batch does not start a process pool per database. A failing database does not stop the others.
+# Every database gets its own run report and log file in the report folder, plus one batch summary (JSON and CSV).
+#
+# Usage:
+#     python batch_runner.py "D:\UN\set_DB\databases\*.gdb" --workers 4 --report-dir D:\UN\set_DB\batch_reports
+
+import argparse
+import contextlib
+import csv
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pipeline_scheduler import configure_worker_executable
+
+SUMMARY_COLUMNS = ['workspace', 'status', 'wall_seconds', 'steps', 'rows_written', 'rows_skipped', 'rows_missing',
+                   'error', 'report', 'log']
+
+
+def expand_workspaces(patterns):
+    """
+    Return the workspaces matched by a list of paths or glob patterns, without duplicates, in the given order.
+    Parameters:
+    patterns (list or str): Paths and glob patterns, for example [r"D:\\regions\\*.gdb"].
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    workspaces = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No workspace matches {pattern}.")
+        for workspace in matches:
+            workspace = os.path.normpath(workspace)
+            if workspace not in workspaces:
+                workspaces.append(workspace)
+    return workspaces
+
+
+def report_names(workspaces):
+    """
+    Return {workspace: file name stem} for the reports; databases with the same name in other folders get a number.
+    """
+    names = {}
+    used = set()
+    for workspace in workspaces:
+        stem = os.path.splitext(os.path.basename(workspace))[0]
+        name, number = stem, 2
+        while name.lower() in used:
+            name, number = f"{stem}_{number}", number + 1
+        used.add(name.lower())
+        names[workspace] = name
+    return names
+
+
+def run_workspace(workspace, report_name, report_dir, options):
+    """
+    Run the pipeline on one workspace and return its summary row. Used in the worker processes.
+    Parameters:
+    workspace (str): Geodatabase (or GeoPackage) to update.
+    report_name (str): File name stem of the run report and the log.
+    report_dir (str): Folder for the run report and the log.
+    options (dict): Other keyword arguments for main().
+    """
+    report_path = os.path.join(report_dir, f"{report_name}_run_report.json")
+    log_path = os.path.join(report_dir, f"{report_name}.log")
+    summary = {'workspace': workspace, 'status': 'ok', 'error': None, 'report': report_path, 'log': log_path}
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log_file, contextlib.redirect_stdout(log_file), \
+            contextlib.redirect_stderr(log_file):
+        try:
+            import import_py_file_mainlogic_for_toolbox as pipeline  # Imported in the worker, arcpy is loaded once per process
+            results = pipeline.main(workspace=workspace, report_path=report_path, **dict({'max_workers': 1}, **options))
+        except Exception as error:
+            traceback.print_exc()
+            summary.update(status='failed', error=repr(error))
+            results = {}
+    summary['wall_seconds'] = round(time.perf_counter() - start, 3)
+    counts = [result for result, _ in results.values() if isinstance(result, dict)]
+    summary['steps'] = len(results)
+    summary['rows_written'] = sum(count.get('written', 0) for count in counts)
+    summary['rows_skipped'] = sum(count.get('skipped', 0) for count in counts)
+    summary['rows_missing'] = sum(count.get('missing', 0) for count in counts)
+    return summary
+
+
+def run_batch(workspaces, max_workers=None, report_dir='batch_reports', **options):
+    """
+    Run the pipeline on every workspace, each in a worker process, and return the list of summary rows.
+    Parameters:
+    workspaces (list or str): Paths or glob patterns of the geodatabases.
+    max_workers (int): Number of databases updated at the same time, None for one per CPU, 1 to run them here one by one.
+    report_dir (str): Folder for the run reports, the logs and the batch summary.
+    options: Other keyword arguments for main() (incremental, backend, bulk, spec_path, ...).
+    """
+    workspaces = expand_workspaces(workspaces)
+    names = report_names(workspaces)
+    os.makedirs(report_dir, exist_ok=True)
+    start = time.perf_counter()
+    summaries = []
+    if max_workers == 1:
+        for workspace in workspaces:
+            print(f"Updating {workspace}.")
+            summaries.append(run_workspace(workspace, names[workspace], report_dir, options))
+            print_summary(summaries[-1])
+    else:
+        configure_worker_executable()
+        print(f"Updating {len(workspaces)} workspaces with {max_workers or os.cpu_count()} worker processes.")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_workspace, workspace, names[workspace], report_dir, options)
+                       for workspace in workspaces]
+            for future in as_completed(futures):
+                summaries.append(future.result())
+                print_summary(summaries[-1])
+    summaries.sort(key=lambda summary: workspaces.index(summary['workspace']))
+
+    write_batch_summary(summaries, os.path.join(report_dir, 'batch_summary.json'))
+    failed = [summary['workspace'] for summary in summaries if summary['status'] != 'ok']
+    print(f"Batch finished in {time.perf_counter() - start:.1f} s, sum of workspaces "
+          f"{sum(summary['wall_seconds'] for summary in summaries):.1f} s: {len(summaries) - len(failed)} updated, "
+          f"{len(failed)} failed{': ' + ', '.join(failed) if failed else ''}.")
+    return summaries
+
+
+def print_summary(summary):
+    if summary['status'] == 'ok':
+        print(f"{summary['workspace']}: {summary['steps']} steps, {summary['rows_written']} rows written "
+              f"in {summary['wall_seconds']:.1f} s.")
+    else:
+        print(f"{summary['workspace']}: failed after {summary['wall_seconds']:.1f} s with {summary['error']}, "
+              f"see {summary['log']}.")
+
+
+def write_batch_summary(summaries, summary_path):
+    """
+    Write the summary rows as JSON and as CSV (same name with .csv).
+    """
+    with open(summary_path, 'w') as summary_file:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'workspaces': summaries}, summary_file, indent=2, default=str)
+    csv_path = os.path.splitext(summary_path)[0] + '.csv'
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    print(f"Batch summary written to {summary_path} and {csv_path}.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the update pipeline on many geodatabases.")
+    parser.add_argument('workspaces', nargs='+', help="Geodatabase paths or glob patterns, e.g. D:\\regions\\*.gdb")
+    parser.add_argument('--workers', type=int, default=None, help="Databases updated at the same time, default one per CPU")
+    parser.add_argument('--report-dir', default='batch_reports', help="Folder for the run reports, logs and the batch summary")
+    parser.add_argument('--backend', default=None, help="Data backend, 'arcpy' or 'geopackage'")
+    parser.add_argument('--incremental', action='store_true', help="Only process rows changed since the last run")
+    parser.add_argument('--bulk', action='store_true', help="Run the attribute steps with NumPy columns")
+    parser.add_argument('--spec', default=None, help="Pipeline spec, default is pipeline_spec.json")
+    arguments = parser.parse_args()
+
+    options = {'backend': arguments.backend, 'incremental': arguments.incremental, 'bulk': arguments.bulk}
+    if arguments.spec:
+        options['spec_path'] = os.path.abspath(arguments.spec)
+    run_batch(arguments.workspaces, max_workers=arguments.workers, report_dir=arguments.report_dir, **options)
@@ -0,0 +1,100 @@
+# This script compares memory use and build/lookup time of the old dict-of-dicts lookup of update_fc_from_dict
+# with the two lookups of build_lookup(): the default ColumnarLookup and the {key: values tuple} dict of compact=False,
+# on synthetic SwitchingFacility-like rows (GLOBALID -> STATION_GUID, OPERATINGVOLTAGE).
+# Retained and peak memory (tracemalloc), build time and time per lookup are printed, each also as a ratio to the
+# dict of dicts (above 1 is better).
+# Every row gets freshly built strings, like rows coming out of a SearchCursor. The lookups read every 7th key in random
+# order (destination rows do not come in the order of the source rows), with new key strings in each of LOOKUP_PASSES
+# passes, and the fastest pass is printed.
+# Usage: python benchmark_lookup_memory.py --rows 1000000 --stations 5000
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from columnar_lookup import build_lookup
+
+SOURCE_FIELDS = ["STATION_GUID", "OPERATINGVOLTAGE", "SUBTYPECD"]
+VOLTAGES = ["0.4 kV", "6 kV", "10 kV", "20 kV", "110 kV"]
+LOOKUP_PASSES = 3
+
+
+def make_rows(row_count, station_count):
+    for number in range(row_count):
+        station = random.randrange(station_count)
+        yield (f"{{{number:08X}-0000-4000-8000-{number:012X}}}",
+               f"{{{station:08X}-1111-4000-8000-{station:012X}}}",
+               "".join(random.choice(VOLTAGES)),  # New str object per row
+               random.randrange(1, 8))
+
+
+def build_dict_of_dicts(rows):
+    origin_fc_dict = {}
+    for row in rows:
+        origin_fc_dict[row[0]] = {SOURCE_FIELDS[i]: row[i + 1] for i in range(len(SOURCE_FIELDS))}
+    return origin_fc_dict
+
+
+def build_tuples(rows):
+    return build_lookup(SOURCE_FIELDS, rows, compact=False)
+
+
+def build_columnar(rows):
+    return build_lookup(SOURCE_FIELDS, rows)
+
+
+def measure(build, row_count, station_count, seed):
+    random.seed(seed)
+    rows = list(make_rows(row_count, station_count))
+    start = time.perf_counter()
+    lookup = build(rows)
+    build_seconds = time.perf_counter() - start  # Timed without tracemalloc, it slows allocations down
+    del lookup
+
+    random.seed(seed)
+    tracemalloc.start()
+    lookup = build(make_rows(row_count, station_count))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    numbers = list(range(0, row_count, 7))
+    random.Random(seed).shuffle(numbers)
+    lookup_seconds = []
+    for _ in range(LOOKUP_PASSES):
+        keys = [f"{{{number:08X}-0000-4000-8000-{number:012X}}}" for number in numbers]
+        start = time.perf_counter()
+        if build is build_dict_of_dicts:
+            for key in keys:
+                related_data = lookup.get(key)
+                values = [related_data[field] for field in SOURCE_FIELDS]
+        else:
+            for key in keys:
+                values = lookup.get(key)
+        lookup_seconds.append(time.perf_counter() - start)
+    return current, peak, build_seconds, min(lookup_seconds) / len(numbers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark update_fc_from_dict lookup memory.")
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--stations', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{args.rows} rows:")
+    for name, build in (("dict of dicts", build_dict_of_dicts), ("dict of tuples", build_tuples),
+                        ("columnar", build_columnar)):
+        results[name] = measure(build, args.rows, args.stations, args.seed)
+        current, peak, build_seconds, lookup_seconds = results[name]
+        print(f"{name:14} retained {current / 2 ** 20:8.1f} MiB, peak {peak / 2 ** 20:8.1f} MiB, "
+              f"build {build_seconds:6.2f} s, lookup {lookup_seconds * 1e9:6.0f} ns")
+    baseline = results["dict of dicts"]
+    for name in ("dict of tuples", "columnar"):
+        ratios = [old / new if new else float('nan') for old, new in zip(baseline, results[name])]
+        print(f"{name:14} vs dict of dicts: retained x{ratios[0]:.1f}, peak x{ratios[1]:.1f}, "
+              f"build x{ratios[2]:.1f}, lookup x{ratios[3]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# This script compares the old station-boundary loop (within + touches/disjoint against every station)
+# with the indexed DE-9IM classifier on synthetic shapely data, without ArcGIS.
+# It prints predicate calls per feature and the run time before and after, and checks that the results are identical.
+# Usage: python benchmark_station_classification.py --stations 2000 --features 20000 --kind point
+
+import argparse
+import random
+import time
+
+from shapely.geometry import LineString, Point, box
+
+from relate_classifier import StationClassifier
+
+
+def make_stations(station_count, area_size, station_size):
+    stations = {}
+    for number in range(station_count):
+        x = random.uniform(0, area_size)
+        y = random.uniform(0, area_size)
+        stations[f"{{STATION-{number}}}"] = box(x, y, x + station_size, y + station_size)
+    return stations
+
+
+def make_features(feature_count, area_size, kind):
+    features = []
+    for _ in range(feature_count):
+        x = random.uniform(0, area_size)
+        y = random.uniform(0, area_size)
+        if kind == 'point':
+            features.append(Point(x, y))
+        else:
+            features.append(LineString([(x, y), (x + random.uniform(-20, 20), y + random.uniform(-20, 20))]))
+    return features
+
+
+def classify_old(features, stations, kind):
+    # Same loop as the original update_point_fc_within_station_boundary / update_line_fc_within_station_boundary
+    results = []
+    calls = 0
+    for geometry in features:
+        result = (None, 'Outside')
+        for station_global_id, station_polygon in stations.items():
+            calls += 1
+            if geometry.within(station_polygon):
+                result = (station_global_id, 'Inside')
+                break
+            calls += 1
+            if kind == 'point' and geometry.touches(station_polygon):
+                result = (station_global_id, 'On Boundary')
+                break
+            if kind == 'line' and not geometry.disjoint(station_polygon):
+                result = (station_global_id, 'Partly Inside')
+                break
+        results.append(result)
+    return results, calls
+
+
+def classify_new(features, stations, kind):
+    classifier = StationClassifier(stations.items(), kind)
+    results = [classifier.classify(geometry) for geometry in features]
+    return results, classifier.predicate_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark station-boundary classification.")
+    parser.add_argument('--stations', type=int, default=1000)
+    parser.add_argument('--features', type=int, default=10000)
+    parser.add_argument('--kind', choices=['point', 'line'], default='point')
+    parser.add_argument('--area-size', type=float, default=10000.0)
+    parser.add_argument('--station-size', type=float, default=50.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    stations = make_stations(args.stations, args.area_size, args.station_size)
+    features = make_features(args.features, args.area_size, args.kind)
+
+    start = time.perf_counter()
+    old_results, old_calls = classify_old(features, stations, args.kind)
+    old_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results, new_calls = classify_new(features, stations, args.kind)
+    new_seconds = time.perf_counter() - start
+
+    if old_results != new_results:
+        raise AssertionError("The indexed classifier returned different results than the original loop.")
+
+    print(f"{args.features} {args.kind} features, {args.stations} stations")
+    print(f"Before: {old_calls / args.features:.2f} predicate calls per feature, {old_seconds:.2f} s")
+    print(f"After:  {new_calls / args.features:.2f} predicate calls per feature, {new_seconds:.2f} s")
+    print(f"Speed-up: {old_seconds / new_seconds:.1f}x, results identical.")
+
+
+if __name__ == "__main__":
+    main()
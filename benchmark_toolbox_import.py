@@ -0,0 +1,82 @@
+# This script measures how long loading each toolbox module takes, the work ArcGIS Pro repeats for every toolbox
+# when the catalog refreshes. Every toolbox is loaded in a fresh interpreter with -X importtime; the report shows the
+# total load time and the slowest imports it triggered. Modules already imported by the interpreter itself
+# (and by ArcGIS Pro, like arcpy) cost nothing there, so the imports listed are what the toolbox adds.
+#
+# Usage:
+#     python benchmark_toolbox_import.py                   # every *_Toolbox.py / *.pyt next to this script
+#     python benchmark_toolbox_import.py --max-ms 50       # exit code 1 when a toolbox loads slower than 50 ms
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+LOADER = """
+import importlib.machinery, importlib.util, sys, time
+path = sys.argv[1]
+print('toolbox load starts', file=sys.stderr, flush=True)  # The imports of the interpreter and this loader come before
+start = time.perf_counter()
+loader = importlib.machinery.SourceFileLoader('toolbox_under_test', path)  # .pyt files have no .py suffix
+module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+loader.exec_module(module)
+print(f"{(time.perf_counter() - start) * 1000:.3f}")
+"""
+
+
+def toolbox_paths(folder):
+    return sorted(set(glob.glob(os.path.join(folder, '*_Toolbox.py')) + glob.glob(os.path.join(folder, '*.pyt'))))
+
+
+def measure_toolbox(path, repeat=5):
+    """
+    Return (fastest load time in ms, [(cumulative microseconds, module)] of the imports of that run), or (None, error).
+    """
+    best = None
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', LOADER, path], capture_output=True, text=True)
+        if process.returncode != 0:
+            return None, process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'failed'
+        imports = []
+        for line in process.stderr.split('toolbox load starts', 1)[-1].splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            name = name.rstrip()[1:]
+            if not name.startswith(' '):  # Top-level imports only, nested ones are in their cumulative time
+                imports.append((int(cumulative), name))
+        load_ms = float(process.stdout.strip().splitlines()[-1])
+        if best is None or load_ms < best[0]:
+            best = (load_ms, imports)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the load time of the toolbox modules.")
+    parser.add_argument('toolboxes', nargs='*', help="Toolbox files, default every toolbox next to this script")
+    parser.add_argument('--repeat', type=int, default=5, help="Loads per toolbox, the fastest is kept")
+    parser.add_argument('--top', type=int, default=5, help="Number of slowest imports shown per toolbox")
+    parser.add_argument('--max-ms', type=float, default=None, help="Fail when a toolbox loads slower than this")
+    arguments = parser.parse_args()
+
+    paths = arguments.toolboxes or toolbox_paths(os.path.dirname(os.path.abspath(__file__)))
+    too_slow = []
+    for path in paths:
+        load_ms, imports = measure_toolbox(path, arguments.repeat)
+        if load_ms is None:
+            print(f"{os.path.basename(path)}: could not be loaded ({imports}).")
+            too_slow.append(path)
+            continue
+        print(f"{os.path.basename(path)}: {load_ms:.1f} ms, {len(imports)} imports")
+        for cumulative, name in sorted(imports, reverse=True)[:arguments.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name.strip()}")
+        if arguments.max_ms is not None and load_ms > arguments.max_ms:
+            too_slow.append(path)
+    if too_slow:
+        print(f"Too slow or failed: {', '.join(os.path.basename(path) for path in too_slow)}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
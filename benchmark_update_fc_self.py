@@ -0,0 +1,65 @@
+# This script measures the row loop of update_fc_self in rows per second:
+# the original per-row interpretation (fields.index, 'TEXT' checks, list building) against the compiled plan.
+# Rows are synthetic CircuitSource rows held in memory, so only the Python work per row is measured, not the cursor.
+# Usage: python benchmark_update_fc_self.py --rows 1000000
+
+import argparse
+import time
+
+from field_update_plan import apply_field_update_plan, compile_field_update_plan, find_populated_targets, target_fields_of
+
+FIELD_UPDATES = [('OBJECTID', 'MIG_OID', 'MIG_OID_TEXT'), ('GLOBALID', 'MIG_GLOBALID')]
+
+
+def make_rows(row_count):
+    return [[number, None, None, f"{{{number:08X}-0000-4000-8000-{number:012X}}}", None] for number in range(1, row_count + 1)]
+
+
+def run_interpreted(rows, fields):
+    fields_populated = {field: False for field in fields}
+    for row in rows:
+        for update_sub_tuple in FIELD_UPDATES:
+            source_field = update_sub_tuple[0]
+            source_index = fields.index(source_field)
+            source_value = row[source_index]
+            for each_target_field in update_sub_tuple[1:]:
+                target_index = fields.index(each_target_field)
+                if row[target_index] not in [None, '', 0]:
+                    if not fields_populated[each_target_field]:
+                        fields_populated[each_target_field] = True
+                if 'TEXT' in each_target_field:
+                    row[target_index] = str(source_value)
+                else:
+                    row[target_index] = source_value
+
+
+def run_compiled(rows, fields):
+    plan = compile_field_update_plan(fields, FIELD_UPDATES)
+    unchecked_targets = target_fields_of(fields, FIELD_UPDATES)
+    for row in rows:  # Same loop body as update_fc_self
+        if unchecked_targets:
+            find_populated_targets(row, unchecked_targets)
+        apply_field_update_plan(row, plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the update_fc_self row loop.")
+    parser.add_argument('--rows', type=int, default=500000)
+    args = parser.parse_args()
+    fields = [item for sublist in FIELD_UPDATES for item in sublist]
+
+    results = {}
+    for name, run in (("interpreted", run_interpreted), ("compiled plan", run_compiled)):
+        rows = make_rows(args.rows)
+        start = time.perf_counter()
+        run(rows, fields)
+        elapsed = time.perf_counter() - start
+        results[name] = rows
+        print(f"{name:14} {args.rows / elapsed:12,.0f} rows per second ({elapsed:.2f} s)")
+    if results["interpreted"] != results["compiled plan"]:
+        raise AssertionError("The compiled plan produced different rows than the original loop.")
+    print("Rows identical.")
+
+
+if __name__ == "__main__":
+    main()
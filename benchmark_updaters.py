@@ -0,0 +1,323 @@
+# This script benchmarks every updater of import_py_file_mainlogic_for_toolbox.py on synthetic networks, without ArcGIS.
+# A network (stations, switching facilities, bays, schemes, junctions, lines, circuit breakers and sources) is generated
+# once per size / station density / seed into a GeoPackage and reused, so every commit is measured on the same data.
+# Each updater runs in a fresh process on a fresh copy of the network; wall time, peak memory and row counts are
+# appended to a JSON lines file together with the git commit, so time and memory curves can be compared across commits.
+# Every run gets its own temporary folder, removed with the -wal / -shm files of the GeoPackage after the run, so no
+# run ever replays the write-ahead log of an earlier one.
+# Usage: python benchmark_updaters.py --sizes 10000,100000,1000000 --station-density 5
+#        python benchmark_updaters.py --sizes 10000 --cases update_fc_self,update_mig_issource --compare 93337d7
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import shapely
+
+from data_backend import get_backend, set_backend
+
+DATASET_VERSION = 1  # Increase when the generated data changes, old cached networks are then not reused
+GENERATION_CHUNK = 100000
+MISSING_KEY_SHARE = 0.01  # Share of bays whose switching facility does not exist
+
+
+def benchmark_cases(workspace):
+    """
+    Return {case name: (function name, args, kwargs)} for every updater, with the paths of a generated network.
+    """
+    def path(name):
+        return os.path.join(workspace, name)
+
+    cases = {
+        'update_fc_from_dict': ('update_fc_from_dict',
+                                (path('SwitchingFacility'), path('Bay'), 'GLOBALID', 'SWITCHINGFACILITY_GUID',
+                                 [('STATION_GUID', 'MIG_STATIONGUID'), ('OPERATINGVOLTAGE', 'MIG_VOLTAGE')],
+                                 'SWITCHINGFACILITY_GUID IS NOT NULL')),
+        'update_fc_within': ('update_fc_within', (path('BayScheme'), path('StationScheme'))),
+        'update_fc_self': ('update_fc_self',
+                           (path('CircuitSource'), [('OBJECTID', 'MIG_OID', 'MIG_OID_TEXT'), ('GLOBALID', 'MIG_GLOBALID')])),
+        'update_voltage_from_multiple_sources': ('update_voltage_from_multiple_sources',
+                                                 (path('Lines'), [path('StationBoundary'), path('SwitchingFacility')],
+                                                  'MIG_VOLTAGE', 'OPERATINGVOLTAGE')),
+        'update_field_based_on_whether_it_lies': ('update_field_based_on_whether_it_lies',
+                                                  (path('Electric_Net_Junctions'),
+                                                   {path('StationBoundary'): 'Station', path('SwitchingFacility'): 'Switching'},
+                                                   'MIG_LOCATION', 'OBJECTID')),
+        'update_point_fc_within_station_boundary': ('update_point_fc_within_station_boundary',
+                                                    (path('Electric_Net_Junctions'), path('StationBoundary'))),
+        'update_line_fc_within_station_boundary': ('update_line_fc_within_station_boundary',
+                                                   (path('Lines'), path('StationBoundary'))),
+        'update_mig_issource': ('update_mig_issource', (path('CircuitBreaker'), path('CircuitSource'))),
+    }
+    cases = {name: (function_name, args, {}) for name, (function_name, args) in cases.items()}
+    for name in ('update_fc_from_dict', 'update_fc_self'):  # NumPy column mode of the attribute-only updaters
+        function_name, args, _ = cases[name]
+        cases[f"{name}_bulk"] = (function_name, args, {'bulk': True})
+    return cases
+
+
+def create_table(backend, workspace, name, geometry_type, fields):
+    table = backend.create_feature_class(workspace, name, geometry_type)
+    for field_name, field_type in fields:
+        backend.add_field(table, field_name, field_type, field_length=50)
+    return table
+
+
+def insert_rows(backend, table, fields, rows):
+    with backend.insert_cursor(table, fields) as cursor:
+        for row in rows:
+            cursor.insertRow(row)
+
+
+def generate_network(workspace, feature_count, station_density, seed):
+    """
+    Write a synthetic network with feature_count features per feature class into a new GeoPackage.
+    Parameters:
+    workspace (str): Path of the GeoPackage to create.
+    feature_count (int): Number of bays, bay schemes, junctions, lines, circuit breakers and circuit sources.
+    station_density (float): Stations per 1000 features.
+    seed (int): Random seed, the same seed gives the same network.
+    """
+    backend = set_backend('geopackage')
+    generator = random.Random(seed)
+    area_size = math.sqrt(feature_count) * 10  # About 100 square units per feature
+    station_count = max(1, int(feature_count * station_density / 1000))
+    facility_count = max(1, feature_count // 10)
+    station_size = 30.0
+
+    def random_xy():
+        return generator.uniform(0, area_size), generator.uniform(0, area_size)
+
+    stations = [random_xy() for _ in range(station_count)]
+
+    def near_station():
+        # Half of the features lie in or next to a station, like equipment of a substation
+        if generator.random() < 0.5:
+            x, y = stations[generator.randrange(station_count)]
+            return x + generator.uniform(-2, station_size + 2), y + generator.uniform(-2, station_size + 2)
+        return random_xy()
+
+    station_boundary = create_table(backend, workspace, 'StationBoundary', 'POLYGON', [('GLOBALID', 'TEXT'), ('OPERATINGVOLTAGE', 'LONG')])
+    insert_rows(backend, station_boundary, ['SHAPE@', 'GLOBALID', 'OPERATINGVOLTAGE'],
+                ([shapely.box(x, y, x + station_size, y + station_size), f"{{STATION-{number}}}", generator.choice([20, 110, 220])]
+                 for number, (x, y) in enumerate(stations)))
+    station_scheme = create_table(backend, workspace, 'StationScheme', 'POLYGON', [('GLOBALID', 'TEXT')])
+    insert_rows(backend, station_scheme, ['SHAPE@', 'GLOBALID'],
+                ([shapely.box(x - 1, y - 1, x + station_size + 1, y + station_size + 1), f"{{SCHEME-{number}}}"]
+                 for number, (x, y) in enumerate(stations)))
+
+    switching_facility = create_table(backend, workspace, 'SwitchingFacility', 'POLYGON',
+                                      [('GLOBALID', 'TEXT'), ('STATION_GUID', 'TEXT'), ('OPERATINGVOLTAGE', 'LONG')])
+    facility_rows = []
+    for number in range(facility_count):
+        station_number = generator.randrange(station_count)
+        x, y = stations[station_number]
+        x, y = x + generator.uniform(0, station_size - 5), y + generator.uniform(0, station_size - 5)
+        facility_rows.append([shapely.box(x, y, x + 5, y + 5), f"{{SF-{number}}}", f"{{STATION-{station_number}}}",
+                              generator.choice([20, 110, 220])])
+    insert_rows(backend, switching_facility, ['SHAPE@', 'GLOBALID', 'STATION_GUID', 'OPERATINGVOLTAGE'], facility_rows)
+    del facility_rows
+
+    tables = {
+        'Bay': ('POINT', [('GLOBALID', 'TEXT'), ('SWITCHINGFACILITY_GUID', 'TEXT'), ('MIG_STATIONGUID', 'TEXT'), ('MIG_VOLTAGE', 'LONG')]),
+        'BayScheme': ('POLYGON', [('GLOBALID', 'TEXT'), ('MIG_PARENTTYPE', 'TEXT')]),
+        'Electric_Net_Junctions': ('POINT', [('MIG_STATIONGUID', 'TEXT'), ('MIG_LOCATION', 'TEXT')]),
+        'Lines': ('LINESTRING', [('MIG_STATIONGUID', 'TEXT'), ('MIG_VOLTAGE', 'LONG')]),
+        'CircuitBreaker': (None, [('GLOBALID', 'TEXT'), ('OPERATINGVOLTAGE', 'LONG'), ('SUBSOURCE', 'SHORT'), ('MIG_ISSOURCE', 'SHORT')]),
+        'CircuitSource': (None, [('GLOBALID', 'TEXT'), ('CIRCUITBREAKER_GUID', 'TEXT'), ('MIG_OID', 'LONG'),
+                                 ('MIG_OID_TEXT', 'TEXT'), ('MIG_GLOBALID', 'TEXT')]),
+    }
+    paths = {name: create_table(backend, workspace, name, geometry_type, fields) for name, (geometry_type, fields) in tables.items()}
+
+    for start in range(0, feature_count, GENERATION_CHUNK):  # Chunks keep the memory flat for large networks
+        numbers = range(start, min(start + GENERATION_CHUNK, feature_count))
+        bay_rows = []
+        for number in numbers:
+            draw = generator.random()
+            if draw < MISSING_KEY_SHARE:
+                facility_guid = f"{{SF-MISSING-{number}}}"
+            elif draw < 0.1:
+                facility_guid = None
+            else:
+                facility_guid = f"{{SF-{generator.randrange(facility_count)}}}"
+            bay_rows.append([shapely.Point(near_station()), f"{{BAY-{number}}}", facility_guid])
+        insert_rows(backend, paths['Bay'], ['SHAPE@', 'GLOBALID', 'SWITCHINGFACILITY_GUID'], bay_rows)
+
+        scheme_rows = []
+        for number in numbers:
+            x, y = near_station()
+            scheme_rows.append([shapely.box(x, y, x + 1, y + 1), f"{{BAYSCHEME-{number}}}"])
+        insert_rows(backend, paths['BayScheme'], ['SHAPE@', 'GLOBALID'], scheme_rows)
+
+        insert_rows(backend, paths['Electric_Net_Junctions'], ['SHAPE@'], ([shapely.Point(near_station())] for _ in numbers))
+
+        line_rows = []
+        for _ in numbers:
+            x, y = near_station()
+            line_rows.append([shapely.LineString([(x, y), (x + generator.uniform(-20, 20), y + generator.uniform(-20, 20))])])
+        insert_rows(backend, paths['Lines'], ['SHAPE@'], line_rows)
+
+        insert_rows(backend, paths['CircuitBreaker'], ['GLOBALID', 'OPERATINGVOLTAGE', 'SUBSOURCE'],
+                    ([f"{{CB-{number}}}", generator.choice([1, 20, 110]), int(generator.random() < 0.1)] for number in numbers))
+        insert_rows(backend, paths['CircuitSource'], ['GLOBALID', 'CIRCUITBREAKER_GUID'],
+                    ([f"{{CS-{number}}}", f"{{CB-{generator.randrange(feature_count)}}}" if generator.random() < 0.3 else None]
+                     for number in numbers))
+    backend.close()
+
+
+def network_path(data_dir, feature_count, station_density, seed):
+    """
+    Return the cached network for these parameters, generating it first if it does not exist.
+    """
+    path = os.path.join(data_dir, f"network_{feature_count}_{station_density:g}_{seed}_v{DATASET_VERSION}.gpkg")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        temporary_path = path + '.tmp.gpkg'
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        start = time.perf_counter()
+        print(f"Generating network with {feature_count} features and density {station_density:g} ...")
+        generate_network(temporary_path, feature_count, station_density, seed)
+        os.replace(temporary_path, path)  # An interrupted generation never leaves a half-written network
+        print(f"Generated {path} in {time.perf_counter() - start:.1f} s.")
+    return path
+
+
+def run_case(case_name, workspace):
+    """
+    Run one updater on a workspace and return its metrics. Runs in a fresh worker process.
+    """
+    set_backend('geopackage')
+    import import_py_file_mainlogic_for_toolbox as mainlogic
+    from run_report import measure_step
+
+    function_name, args, kwargs = benchmark_cases(workspace)[case_name]
+    function = getattr(mainlogic, function_name)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # Messages would dominate the timing
+            _, metrics = measure_step(case_name, lambda: function(*args, **kwargs))
+    finally:
+        get_backend().close()  # Writes the write-ahead log into the file before the run folder is removed
+    return metrics
+
+
+def git_revision():
+    """
+    Return (commit, dirty) of the working tree, or ('unknown', False) outside a git checkout.
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=folder, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=folder, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(status.strip())
+
+
+def load_results(results_path):
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path) as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+def print_curves(records):
+    """
+    Print time and memory per case and size, with microseconds per feature to show how each updater scales.
+    """
+    print(f"{'case':42} {'features':>10} {'seconds':>9} {'us/feature':>11} {'peak MB':>9} {'rows read':>11}")
+    for record in sorted(records, key=lambda record: (record['case'], record['features'])):
+        per_feature = record['wall_seconds'] / record['features'] * 1e6
+        print(f"{record['case']:42} {record['features']:>10} {record['wall_seconds']:>9.2f} {per_feature:>11.1f} "
+              f"{record['peak_memory_mb'] or 0:>9.1f} {record['rows_read']:>11}")
+
+
+def print_comparison(records, all_records, baseline_commit):
+    """
+    Print time and memory of this run relative to the newest result of another commit for the same case and network.
+    """
+    baseline = {}
+    for record in all_records:
+        if record['commit'] == baseline_commit:
+            baseline[(record['case'], record['features'], record['station_density'], record['seed'])] = record
+    print(f"Compared with {baseline_commit} (ratio < 1 is faster / smaller):")
+    for record in records:
+        old = baseline.get((record['case'], record['features'], record['station_density'], record['seed']))
+        if old is None:
+            print(f"  {record['case']} ({record['features']} features): no result for {baseline_commit}")
+            continue
+        time_ratio = record['wall_seconds'] / old['wall_seconds'] if old['wall_seconds'] else float('nan')
+        memory_ratio = (record['peak_memory_mb'] / old['peak_memory_mb']
+                        if record['peak_memory_mb'] and old['peak_memory_mb'] else float('nan'))
+        print(f"  {record['case']} ({record['features']} features): time x{time_ratio:.2f}, memory x{memory_ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the updaters on synthetic networks.")
+    parser.add_argument('--sizes', default='10000,100000', help="Comma-separated feature counts, e.g. 10000,1000000,10000000")
+    parser.add_argument('--station-density', type=float, default=5.0, help="Stations per 1000 features")
+    parser.add_argument('--cases', default=None, help="Comma-separated case names, default all")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per case, the fastest is kept")
+    parser.add_argument('--data-dir', default='benchmark_data', help="Folder for the generated networks")
+    parser.add_argument('--results', default='benchmark_results.jsonl', help="JSON lines file the results are appended to")
+    parser.add_argument('--compare', default=None, help="Commit to compare this run with")
+    arguments = parser.parse_args()
+
+    sizes = [int(size) for size in arguments.sizes.split(',')]
+    case_names = arguments.cases.split(',') if arguments.cases else list(benchmark_cases(''))
+    unknown = set(case_names) - set(benchmark_cases(''))
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+    commit, dirty = git_revision()
+    context = multiprocessing.get_context('spawn')  # Fresh process per run: peak memory is the run's own
+
+    records = []
+    for feature_count in sizes:
+        network = network_path(arguments.data_dir, feature_count, arguments.station_density, arguments.seed)
+        for case_name in case_names:
+            best = None
+            for _ in range(arguments.repeat):
+                run_dir = tempfile.mkdtemp(prefix=f"run_{case_name}_", dir=arguments.data_dir)
+                workspace = os.path.join(run_dir, f"run_{case_name}.gpkg")
+                shutil.copyfile(network, workspace)  # Every run starts from the unmodified network
+                try:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        metrics = executor.submit(run_case, case_name, workspace).result()
+                finally:
+                    shutil.rmtree(run_dir, ignore_errors=True)  # The copy with its -wal and -shm files
+
+                if best is None or metrics['wall_seconds'] < best['wall_seconds']:
+                    best = metrics
+            record = {
+                'commit': commit, 'dirty': dirty, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(), 'machine': platform.node(),
+                'case': case_name, 'features': feature_count, 'station_density': arguments.station_density,
+                'seed': arguments.seed, 'dataset_version': DATASET_VERSION,
+                'wall_seconds': best['wall_seconds'], 'peak_memory_mb': best['peak_memory_mb'],
+                'rows_read': best['rows_read'], 'rows_written': best['rows_written'], 'rows_skipped': best['rows_skipped'],
+                'predicate_calls': best['predicate_calls'],
+            }
+            records.append(record)
+            print(f"{case_name} ({feature_count} features): {record['wall_seconds']:.2f} s, {record['peak_memory_mb']} MB")
+            with open(arguments.results, 'a') as results_file:
+                results_file.write(json.dumps(record) + '\n')
+
+    print(f"\nResults of commit {commit}{' (uncommitted changes)' if dirty else ''}, appended to {arguments.results}:")
+    print_curves(records)
+    if arguments.compare:
+        print_comparison(records, load_results(arguments.results), arguments.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# This module moves attribute values column by column with NumPy instead of row by row through Python tuples.
+# The key and value columns are read into arrays in one call (TableToNumPyArray with arcpy, one query with a GeoPackage),
+# the join is a vectorized sort + searchsorted, and only the rows whose values really change are written back in bulk.
+# It is used by update_fc_from_dict and update_fc_self when they are called with bulk=True (attribute fields only, no geometry).
+
+import numpy
+
+from data_backend import get_backend, selection_clauses
+from field_update_plan import EMPTY_VALUES
+from missing_keys import MissingKeyReport
+
+MISSING = -1
+
+
+def typed_keys(values):
+    """
+    Return the keys as a sortable array (unicode or int64), or None if they are not all strings or all integers.
+    None keys are allowed, valid tells where they are.
+    Parameters:
+    values (numpy object array): Key column.
+    """
+    valid = numpy.not_equal(values, None).astype(bool)
+    present = values[valid]
+    if all(type(value) is str for value in present):
+        keys = numpy.full(len(values), '', dtype=f'U{max((len(value) for value in present), default=1)}')
+    elif all(type(value) is int for value in present):
+        keys = numpy.zeros(len(values), dtype=numpy.int64)
+    else:
+        return None, valid
+    keys[valid] = present
+    return keys, valid
+
+
+def match_keys(source_keys, destination_keys):
+    """
+    Return for every destination key the position of the matching source row, or MISSING (-1).
+    Like a dict built from the source rows, the last source row with a key wins; None keys never match.
+    Parameters:
+    source_keys (numpy object array): Key column of the source.
+    destination_keys (numpy object array): Key column of the destination.
+    """
+    source_typed, source_valid = typed_keys(source_keys)
+    destination_typed, destination_valid = typed_keys(destination_keys)
+    positions = numpy.full(len(destination_keys), MISSING, dtype=numpy.int64)
+    if source_typed is None or destination_typed is None or source_typed.dtype.kind != destination_typed.dtype.kind:
+        if source_typed is not None and destination_typed is not None:
+            return positions  # Strings never equal integers
+        lookup = {key: position for position, key in enumerate(source_keys.tolist()) if key is not None}  # Mixed key types
+        return numpy.fromiter((lookup.get(key, MISSING) for key in destination_keys.tolist()), dtype=numpy.int64,
+                              count=len(destination_keys))
+
+    source_rows = numpy.flatnonzero(source_valid)
+    order = source_rows[numpy.argsort(source_typed[source_rows], kind='stable')]
+    sorted_keys = source_typed[order]
+    if len(sorted_keys) == 0:
+        return positions
+    last_of_run = numpy.append(sorted_keys[1:] != sorted_keys[:-1], True)  # Stable sort: the last row of a run wins
+    unique_keys = sorted_keys[last_of_run]
+    unique_rows = order[last_of_run]
+
+    index = numpy.searchsorted(unique_keys, destination_typed)
+    index[index == len(unique_keys)] = 0
+    found = destination_valid & (unique_keys[index] == destination_typed)
+    positions[found] = unique_rows[index[found]]
+    return positions
+
+
+def changed_rows(new_columns, old_columns, row_count):
+    """
+    Return a boolean array of row_count rows: True where any new value differs from the old one (== like ChangeWriter).
+    """
+    changed = numpy.zeros(row_count, dtype=bool)
+    for new_values, old_values in zip(new_columns, old_columns):
+        changed |= numpy.not_equal(new_values, old_values).astype(bool)  # Object arrays: Python != per element, in C
+    return changed
+
+
+def membership(values, wanted):
+    """
+    Return a boolean array that is True where the value is in the set wanted (OBJECTIDs, changed keys).
+    """
+    return numpy.fromiter((value in wanted for value in values.tolist()), dtype=bool, count=len(values))
+
+
+def read_selected_columns(table, fields, field, values, where_clause=None):
+    """
+    Return read_columns() of the rows whose field (one of fields, a column or 'OID@') has one of the values.
+    A few values are read with selection_clauses(), one read per clause; with many values the table is read whole
+    and filtered with membership(). values None reads every row.
+    """
+    backend = get_backend()
+    if values is None:
+        return backend.read_columns(table, fields, where_clause)
+    values = set(values)
+    clauses = selection_clauses(backend.oid_field(table) if field == 'OID@' else field, values, where_clause)
+    if clauses is None:
+        columns = backend.read_columns(table, fields, where_clause)
+        selected = membership(columns[field], values)
+        return {name: column[selected] for name, column in columns.items()}
+    parts = [backend.read_columns(table, fields, clause) for clause in clauses]
+    return {name: numpy.concatenate([part[name] for part in parts]) if parts else numpy.empty(0, dtype=object)
+            for name in fields}
+
+
+def bulk_update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs, where_clause,
+                             source_keys=None, destination_oids=None, missing_keys_dir=None):
+    """
+    Array version of update_fc_from_dict, with the same parameters and result.
+    """
+    backend = get_backend()
+    source_fields = [pair[0] for pair in field_pairs]
+    destination_fields = [pair[1] for pair in field_pairs]
+    destination_read = ['OID@', destination_key_field] + destination_fields
+    if source_keys is not None or destination_oids is not None:
+        # Incremental run: only the destination rows with a changed key or a changed row, and the source rows of their keys
+        parts = [read_selected_columns(destination_fc, destination_read, field, values or set(), where_clause)
+                 for field, values in (('OID@', destination_oids), (destination_key_field, source_keys))]
+        destination = {field: numpy.concatenate([part[field] for part in parts]) for field in destination_read}
+        _, first = numpy.unique(destination['OID@'].astype(numpy.int64), return_index=True)  # A row can be in both
+        destination = {field: column[first] for field, column in destination.items()}
+        source = read_selected_columns(source_fc, [source_key_field] + source_fields, source_key_field,
+                                       destination[destination_key_field].tolist())
+    else:
+        source = backend.read_columns(source_fc, [source_key_field] + source_fields)
+        destination = backend.read_columns(destination_fc, destination_read, where_clause)
+
+    positions = match_keys(source[source_key_field], destination[destination_key_field])
+    found = positions != MISSING
+    new_columns = [source[source_field][positions[found]] for source_field in source_fields]
+    old_columns = [destination[destination_field][found] for destination_field in destination_fields]
+    changed = changed_rows(new_columns, old_columns, int(found.sum()))
+
+    backend.update_columns(destination_fc, destination['OID@'][found][changed],
+                           {destination_field: new_values[changed]
+                            for destination_field, new_values in zip(destination_fields, new_columns)})
+
+    with MissingKeyReport(source_fc, destination_fc, missing_keys_dir) as missing:
+        missing.add_many(destination[destination_key_field][~found].tolist())
+    counts = {'written': int(changed.sum()), 'skipped': len(found) - int(changed.sum()), 'missing': missing.count}
+    print(f"{destination_fc}: {counts['written']} rows written, {counts['skipped']} unchanged rows skipped.")
+    return counts
+
+
+def bulk_update_fc_self(source_fc, field_updates, oids=None):
+    """
+    Array version of update_fc_self, with the same parameters and result.
+    """
+    backend = get_backend()
+    fields = list(dict.fromkeys(item for sublist in field_updates for item in sublist))
+    columns = read_selected_columns(source_fc, ['OID@'] + fields, 'OID@', oids)
+    old_columns = {field: columns[field] for field in fields}
+
+    reported = set()
+    for update_sub_tuple in field_updates:
+        for each_target_field in update_sub_tuple[1:]:
+            if each_target_field in reported:
+                continue
+            reported.add(each_target_field)
+            if any(value not in EMPTY_VALUES for value in old_columns[each_target_field].tolist()):
+                print(f"The field '{each_target_field}' in the feature class '{source_fc}' "
+                      f"already contains data. Any existing data will be overwritten.")
+
+    new_columns = dict(old_columns)
+    for update_sub_tuple in field_updates:  # Same order as the row loop, a later update sees an earlier one
+        source_values = new_columns[update_sub_tuple[0]]
+        for each_target_field in update_sub_tuple[1:]:
+            if 'TEXT' in each_target_field:
+                new_columns[each_target_field] = numpy.array([str(value) for value in source_values.tolist()], dtype=object)
+            else:
+                new_columns[each_target_field] = source_values
+    targets = [field for field in fields if new_columns[field] is not old_columns[field]]
+    row_count = len(columns['OID@'])
+    changed = changed_rows([new_columns[field] for field in targets], [old_columns[field] for field in targets], row_count)
+
+    backend.update_columns(source_fc, columns['OID@'][changed], {field: new_columns[field][changed] for field in targets})
+    counts = {'written': int(changed.sum()), 'skipped': row_count - int(changed.sum())}
+    print(f"{source_fc}: {counts['written']} rows written, {counts['skipped']} unchanged rows skipped.")
+    print("Self-update completed successfully.")
+    return counts
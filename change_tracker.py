@@ -0,0 +1,124 @@
+# This module keeps per-step watermarks of the feature classes a pipeline step uses, for incremental runs.
+# By default the watermark is a short content hash per OBJECTID of the fields the step uses, stored with the table
+# stamp (see table_stamp()): while the stamp is unchanged the table is not read at all, otherwise it is read whole.
+# With editor tracking an edit date field (for example last_edited_date) can be used instead, then only edited rows are read.
+# The watermarks are taken before the step runs: an edit made by someone else while the step runs is seen by the
+# next run. The step's own writes are seen as changes too; the next run processes those rows again, finds nothing to
+# change (the updaters only write changed values) and its watermark then includes them.
+# Each step has its own state file, so steps running at the same time never write the same file.
+
+import hashlib
+import json
+import os
+
+from data_backend import get_backend
+
+
+def row_digest(values):
+    """
+    Return a short hex digest of the values of one row. Bytes (SHAPE@WKB) are hashed as they are.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for value in values:
+        if isinstance(value, (bytes, bytearray)):
+            digest.update(bytes(value))
+        else:
+            digest.update(repr(value).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class ChangeTracker:
+    """
+    Watermarks of one pipeline step. Usage:
+        tracker = ChangeTracker(state_dir, "Bay")
+        changes = tracker.changed_rows(fc, fields)   # {oid: values}, or None on the first run
+        ...run the step...
+        tracker.commit()                             # the watermarks read before the step ran
+    """
+
+    def __init__(self, state_dir, step_name, edit_field=None):
+        """
+        Parameters:
+        state_dir (str): Folder for the state files.
+        step_name (str): Name of the pipeline step.
+        edit_field (str): Optional editor-tracking date field used instead of content hashes.
+        """
+        self.state_path = os.path.join(state_dir, f"{step_name}.json")
+        self.edit_field = edit_field
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as state_file:
+                self.state = json.load(state_file)
+        self.pending = {}
+
+    def _stored(self, feature_class, fields):
+        stored = self.state.get(feature_class)
+        if stored is None or stored.get('fields') != list(fields) or stored.get('edit_field') != self.edit_field:
+            return None
+        return stored
+
+    def changed_rows(self, feature_class, fields):
+        """
+        Return {oid: values} of the rows added or changed since the last committed run,
+        or None if there is no usable watermark yet (the step must process everything).
+        Parameters:
+        feature_class (str): Path to the feature class.
+        fields (list): Fields the step uses; use 'SHAPE@WKB' for geometry.
+        """
+        stored = self._stored(feature_class, fields)
+        if self.edit_field:
+            return self._changed_by_edit_date(feature_class, fields, stored)
+        return self._changed_by_hash(feature_class, fields, stored)
+
+    def _changed_by_hash(self, feature_class, fields, stored):
+        stamp = get_backend().table_stamp(feature_class, exact=True)  # None when the backend cannot see every edit
+        if stored and stamp is not None and stored.get('stamp') == stamp:
+            self.pending[feature_class] = stored
+            return {}
+        hashes = {}
+        changes = {}
+        old_hashes = stored['hashes'] if stored else {}
+        with get_backend().search_cursor(feature_class, ['OID@'] + list(fields)) as cursor:
+            for row in cursor:
+                digest = row_digest(row[1:])
+                hashes[str(row[0])] = digest
+                if old_hashes.get(str(row[0])) != digest:
+                    changes[row[0]] = row[1:]
+        self.pending[feature_class] = {'fields': list(fields), 'edit_field': None, 'hashes': hashes, 'stamp': stamp}
+        return changes if stored else None
+
+    def _changed_by_edit_date(self, feature_class, fields, stored):
+        watermark = stored['watermark'] if stored else None
+        where_clause = f"{self.edit_field} > date '{watermark}'" if watermark else None
+        changes = {}
+        newest = watermark
+        with get_backend().search_cursor(feature_class, ['OID@', self.edit_field] + list(fields), where_clause) as cursor:
+            for row in cursor:
+                changes[row[0]] = row[2:]
+                if row[1] is not None:
+                    edited = row[1].strftime('%Y-%m-%d %H:%M:%S')
+                    newest = edited if newest is None or edited > newest else newest
+        self.pending[feature_class] = {'fields': list(fields), 'edit_field': self.edit_field, 'watermark': newest}
+        return changes if stored else None
+
+
+    def commit(self):
+        """
+        Save the watermarks read in this run. Call it only after the step finished successfully.
+        """
+        self.state.update(self.pending)
+        self.pending = {}
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        temporary_path = self.state_path + '.tmp'
+        with open(temporary_path, 'w') as state_file:
+            json.dump(self.state, state_file)
+        os.replace(temporary_path, self.state_path)  # A crash never leaves a half-written state file
+
+
+def is_full_run(*changes):
+    """
+    Check if any of the changed_rows() results has no watermark, so the step has to process everything.
+    """
+    return any(change is None for change in changes)
+
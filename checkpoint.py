@@ -0,0 +1,261 @@
+# This module makes the update pipeline resumable after a crash (lock conflict, out of memory, killed process).
+# Every step keeps a checkpoint file in the checkpoint folder (one file per step, so steps running at the same time
+# never write the same file) with a fingerprint of its inputs: the step definition, the fields it reads from its
+# source feature classes and their exact table stamps (row count, highest OBJECTID and newest edit, see table_stamp()),
+# which the backend reads without a pass over the rows, so a run that is never resumed pays almost nothing for it.
+# A feature class without an exact stamp (arcpy without editor tracking, where an edit in place keeps the row count
+# and the highest OBJECTID) is fingerprinted by a content hash of the fields the step reads instead.
+# While a step runs, the update cursor on its target is wrapped: every CHUNK_SIZE rows the writes are committed and the
+# OBJECTIDs done so far are saved. A resumed run skips the steps finished with the same inputs and, inside an
+# interrupted step, the rows of the committed chunks. The updaters are row by row and idempotent, so a row done twice
+# (after the last committed chunk) gets the same values and is skipped by ChangeWriter.
+# Bulk steps (bulk=True) write with update_columns, not with a cursor; they are resumed per step only.
+
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from change_tracker import row_digest
+from data_backend import get_backend
+
+CHUNK_SIZE = 10000
+CHECKPOINT_FORMAT = 1
+
+
+def input_fingerprint(definition, context_fields):
+    """
+    Return a fingerprint of a step definition, of the fields it reads from other feature classes and of their stamps
+    (content hashes of those fields when the backend has no exact stamp).
+    Parameters:
+    definition (str): Text that identifies the step (function and arguments).
+    context_fields (dict): {feature class path: fields} of the feature classes the step reads.
+    """
+    backend = get_backend()
+    digest = hashlib.blake2b(definition.encode('utf-8'), digest_size=16)
+    for table, fields in sorted(context_fields.items()):
+        stamp = backend.table_stamp(table, exact=True)
+        digest.update(f"\x1e{table}\x1f{','.join(fields)}\x1f{stamp}".encode('utf-8'))
+        if stamp is None:
+            with backend.search_cursor(table, ['OID@'] + list(fields)) as cursor:
+                for row in cursor:
+                    digest.update(row_digest(row).encode('ascii'))
+    return digest.hexdigest()
+
+
+def add_to_ranges(ranges, oids):
+    """
+    Return the sorted, merged [first, last] OBJECTID ranges of ranges plus the OBJECTIDs in oids.
+    """
+    merged = []
+    for first, last in sorted([list(item) for item in ranges] + [[oid, oid] for oid in oids]):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+class OidRanges:
+    """
+    Membership test for sorted [first, last] OBJECTID ranges.
+    """
+
+    def __init__(self, ranges):
+        self.firsts = [first for first, _ in ranges]
+        self.lasts = [last for _, last in ranges]
+
+    def __contains__(self, oid):
+        position = bisect.bisect_right(self.firsts, oid) - 1
+        return position >= 0 and oid <= self.lasts[position]
+
+
+class StepCheckpoint:
+    """
+    Checkpoint file of one pipeline step: status ('running' or 'done'), input fingerprint, result and committed OBJECTIDs.
+    """
+
+    def __init__(self, checkpoint_dir, step_name):
+        self.path = os.path.join(checkpoint_dir, f"{step_name}.json")
+        self.state = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as checkpoint_file:
+                    self.state = json.load(checkpoint_file)
+            except ValueError:
+                self.state = {}  # Unreadable file: the step starts again
+        if self.state.get('format') != CHECKPOINT_FORMAT:
+            self.state = {}
+
+    def matches(self, fingerprint):
+        return self.state.get('fingerprint') == fingerprint
+
+    def start(self, fingerprint):
+        """
+        Keep the committed OBJECTIDs of an interrupted run with the same inputs, otherwise start empty.
+        """
+        if not self.matches(fingerprint) or self.state.get('status') != 'running':
+            self.state = {'format': CHECKPOINT_FORMAT, 'fingerprint': fingerprint, 'status': 'running', 'done': {}}
+        self.state['started'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.save()
+
+    def done_oids(self, table):
+        return self.state['done'].get(table, [])
+
+    def add_done(self, table, oids):
+        self.state['done'][table] = add_to_ranges(self.done_oids(table), oids)
+        self.save()
+
+    def finish(self, result):
+        self.state.update(status='done', finished=time.strftime('%Y-%m-%d %H:%M:%S'), done={},
+                          result=result if isinstance(result, dict) else None)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as checkpoint_file:
+            json.dump(self.state, checkpoint_file, default=str)
+        os.replace(temporary_path, self.path)  # A crash never leaves a half-written checkpoint
+
+
+class ChunkCheckpointCursor:
+    """
+    Update cursor wrapper that hides the rows of committed chunks and saves the progress every chunk_size rows.
+    'OID@' is added to the cursor fields when the updater did not ask for it, and removed from the rows it sees.
+    """
+
+    def __init__(self, cursor, fields, table, checkpoint, chunk_size):
+        self._cursor = cursor
+        self._table = table
+        self._checkpoint = checkpoint
+        self._chunk_size = chunk_size
+        self._done = OidRanges(checkpoint.done_oids(table))
+        self._added_oid = 'OID@' not in fields
+        self._oid_position = len(fields) if self._added_oid else fields.index('OID@')
+        self._chunk = []
+        self._oid = None
+        self.resumed_rows = 0
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        result = self._cursor.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self._save_chunk()  # The cursor committed the last chunk when it closed
+        return result
+
+    def __iter__(self):
+        for row in self._cursor:
+            if self._oid is not None:
+                self._chunk.append(self._oid)  # The previous row is finished
+                if len(self._chunk) >= self._chunk_size:
+                    self._commit()
+            self._oid = row[self._oid_position]
+            if self._oid in self._done:
+                self._oid = None
+                self.resumed_rows += 1
+                continue
+            yield row[:-1] if self._added_oid else row
+        if self._oid is not None:
+            self._chunk.append(self._oid)
+            self._oid = None
+
+    def _commit(self):
+        commit = getattr(self._cursor, 'commit', None)
+        if commit:
+            commit()  # arcpy writes every updateRow outside an edit session, a GeoPackage cursor commits here
+        self._save_chunk()
+
+    def _save_chunk(self):
+        if self._chunk:
+            self._checkpoint.add_done(self._table, self._chunk)
+            self._chunk = []
+
+    def updateRow(self, row):
+        return self._cursor.updateRow(list(row) + [self._oid] if self._added_oid else row)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ChunkCheckpoints:
+    """
+    Context manager that wraps the update cursors the data backend opens on one target table with ChunkCheckpointCursor.
+    """
+
+    def __init__(self, target_fc, checkpoint, chunk_size=None):
+        self.target = os.path.normcase(os.path.normpath(str(target_fc)))
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.backend = get_backend()
+        self.previous = None
+        self.cursors = []
+
+    def __enter__(self):
+        self.previous = self.backend.__dict__.get('update_cursor')  # Kept when the run report already wraps the cursors
+        original = getattr(self.backend, 'update_cursor')
+
+        def update_cursor(table, fields, where_clause=None):
+            if os.path.normcase(os.path.normpath(str(table))) != self.target:
+                return original(table, fields, where_clause)
+            fields = list(fields)
+            cursor_fields = fields + ['OID@'] if 'OID@' not in fields else fields
+            cursor = ChunkCheckpointCursor(original(table, cursor_fields, where_clause), fields, self.target,
+                                           self.checkpoint, self.chunk_size)
+            self.cursors.append(cursor)
+            return cursor
+
+        self.backend.update_cursor = update_cursor
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.previous is None:
+            del self.backend.update_cursor
+        else:
+            self.backend.update_cursor = self.previous
+        return False
+
+    @property
+    def resumed_rows(self):
+        return sum(cursor.resumed_rows for cursor in self.cursors)
+
+
+def run_resumable(checkpoint_dir, step_name, definition, context_fields, target_fc, function, args=(), kwargs=None):
+    """
+    Run a pipeline step with a checkpoint: skip it when it finished earlier with the same inputs,
+    otherwise run it and skip the rows of the chunks an interrupted run already committed.
+    Parameters:
+    checkpoint_dir (str): Folder with one checkpoint file per step.
+    step_name (str): Name of the pipeline step.
+    definition (str): Text that identifies the step, part of the input fingerprint.
+    context_fields (dict): {feature class path: fields} the step reads, part of the input fingerprint.
+    target_fc (str): Path to the feature class the step writes.
+    function (callable): The step function, called as function(*args, **kwargs).
+    """
+    checkpoint = StepCheckpoint(checkpoint_dir, step_name)
+    fingerprint = input_fingerprint(definition, context_fields)
+    if checkpoint.state.get('status') == 'done' and checkpoint.matches(fingerprint):
+        print(f"Step '{step_name}' finished at {checkpoint.state.get('finished')} with the same inputs, skipped.")
+        return {'written': 0, 'skipped': 0, 'resumed': 'finished earlier'}
+    checkpoint.start(fingerprint)
+    with ChunkCheckpoints(target_fc, checkpoint) as chunks:
+        result = function(*args, **(kwargs or {}))
+    if chunks.resumed_rows:
+        print(f"Step '{step_name}' resumed, {chunks.resumed_rows} rows of committed chunks were not processed again.")
+        if isinstance(result, dict):
+            result = dict(result, resumed_rows=chunks.resumed_rows)
+    checkpoint.finish(result)
+    return result
+
+
+def clear_checkpoints(checkpoint_dir):
+    """
+    Remove every checkpoint, so the next run starts from the beginning.
+    """
+    if os.path.isdir(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir)
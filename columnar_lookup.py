@@ -0,0 +1,393 @@
+# This module keeps lookup rows (key -> values of several fields) packed in one NumPy array instead of one dict per row.
+# Rows are read in chunks of CHUNK_ROWS and every chunk is packed as soon as it is read (NumPy and C-level map(), no
+# Python loop per row), so only one chunk of row tuples is alive at a time: the keys go into a fixed-width byte array
+# (int64 for integer keys) with their hashes, and every value field into 4 byte codes of the distinct values seen so far.
+# compact() then orders the rows by hash bucket and writes one fixed-size record per row: the value codes (1, 2 or
+# 4 bytes, the distinct values are kept once) followed by the UTF-8 key padded with NUL (or the int64 key).
+# An offsets array tells where the rows of every bucket start, so a lookup hashes the key once and reads one or two
+# records with struct.unpack_from(), which returns the key to compare and the value codes of the row together.
+# Fields of mostly unique values (names, GUIDs) are not encoded and go into array('q') / array('d') or a plain list.
+# No str object and no dict entry is kept per row, which is what makes a dict of millions of rows several GB.
+# hash() of a str differs between processes, so a lookup is built and used in the same process (it is not pickled).
+# Keys of another type than the key column (None, mixed types) and keys with NUL characters are kept in a small dict.
+
+import itertools
+from array import array
+from operator import getitem, itemgetter
+from struct import Struct
+
+import numpy
+
+CHUNK_ROWS = 16384
+ENCODING_CHECK_ROWS = 10000
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+CODE_TYPES = [(2 ** 8, 'B', '<u1'), (2 ** 16, 'H', '<u2'), (2 ** 31, 'i', '<i4'), (2 ** 63, 'q', '<i8')]
+CODE_DTYPES = {typecode: dtype for _, typecode, dtype in CODE_TYPES}
+
+
+class ValueColumn:
+    """
+    One value field while the rows are added: dictionary codes while the values repeat, otherwise the values.
+    """
+
+    def __init__(self):
+        self.distinct = {}  # type: {value: code}; 1 and 1.0 stay different values
+        self.counter = itertools.count()
+        self.code_chunks = []
+        self.row_count = 0
+        self.values = None  # List of the values once the column is not encoded
+
+    def extend(self, values):
+        if self.values is None:
+            try:
+                codes = numpy.fromiter(self.codes(values), dtype=numpy.int64, count=len(values))
+            except TypeError:  # Unhashable values (for example geometries) cannot be encoded
+                self.decode()
+            else:
+                self.code_chunks.append(codes.astype(numpy.int32) if self.row_count < 2 ** 31 else codes)
+                self.row_count += len(values)
+                distinct_count = sum(len(by_value) for by_value in self.distinct.values())
+                if self.row_count >= ENCODING_CHECK_ROWS and distinct_count > self.row_count // 2:
+                    self.decode()  # Mostly unique values (GUIDs, names) gain nothing from encoding
+                return
+        self.values.extend(values)
+
+    def codes(self, values):
+        types = set(map(type, values))
+        if len(types) == 1:
+            return map(self.distinct.setdefault(types.pop(), {}).setdefault, values, self.counter)
+        return (self.distinct.setdefault(type(value), {}).setdefault(value, code)
+                for value, code in zip(values, self.counter))
+
+    def distinct_values(self):
+        """
+        Return (codes array, values list) of the distinct values, in the order they were first seen.
+        """
+        pairs = sorted((code, value) for by_value in self.distinct.values() for value, code in by_value.items())
+        return numpy.array([code for code, _ in pairs], dtype=numpy.int64), [value for _, value in pairs]
+
+    def decode(self):
+        codes, values = self.distinct_values()
+        by_code = dict(zip(codes.tolist(), values))
+        self.values = [by_code[code] for chunk in self.code_chunks for code in chunk.tolist()]
+        self.distinct = self.code_chunks = None
+
+    def compact(self, order):
+        """
+        Return (values, codes, struct typecode) of the column with the rows in the given order: the value of row i
+        is values[codes[i]]. Columns that are not encoded return (values, None, None) and the value of row i is values[i].
+        """
+        if self.values is None:
+            used, values = self.distinct_values()
+            remap = numpy.zeros(int(used.max()) + 1 if len(used) else 1, dtype=numpy.int64)
+            remap[used] = numpy.arange(len(used))  # Contiguous codes, every value seen is used by a row
+            codes = numpy.concatenate(self.code_chunks) if self.code_chunks else numpy.empty(0, dtype=numpy.int32)
+            self.code_chunks = self.distinct = None
+            for limit, typecode, dtype in CODE_TYPES:
+                if len(values) <= limit:
+                    return values, remap.astype(dtype)[codes][order], typecode
+        values = list(map(self.values.__getitem__, order.tolist()))
+        self.values = None
+        types = set(map(type, values))
+        if types == {int} and INT64_MIN <= min(values) and max(values) <= INT64_MAX:
+            values = array('q', values)
+        elif types == {float}:
+            values = array('d', values)
+        return values, None, None
+
+
+def value_decoder(encoded_values, plain_fields):
+    """
+    Return decode(record, position), which turns the value codes of a record and the values of the fields that are not
+    encoded into the tuple of values. Up to four encoded fields are indexed one by one, which is several times faster
+    than tuple(map()) on three-value rows.
+    Parameters:
+    encoded_values (list): Distinct values of every encoded field, in record order.
+    plain_fields (list): (field index, values of every row) of the fields that are not encoded.
+    """
+    if not plain_fields and 1 <= len(encoded_values) <= 4:
+        first = encoded_values[0]
+        if len(encoded_values) == 1:
+            return lambda record, position: (first[record[0]],)
+        second = encoded_values[1]
+        if len(encoded_values) == 2:
+            return lambda record, position: (first[record[0]], second[record[1]])
+        third = encoded_values[2]
+        if len(encoded_values) == 3:
+            return lambda record, position: (first[record[0]], second[record[1]], third[record[2]])
+        fourth = encoded_values[3]
+        return lambda record, position: (first[record[0]], second[record[1]], third[record[2]], fourth[record[3]])
+
+    def decode(record, position):
+        values = list(map(getitem, encoded_values, record))
+        for index, column in plain_fields:
+            values.insert(index, column[position])
+        return tuple(values)
+    return decode
+
+
+class ColumnarLookup:
+    """
+    Memory-compact replacement for {key: values} with the same "last row wins" behaviour. Usage:
+        lookup = ColumnarLookup.from_rows(field_names, cursor)
+        values = lookup.get(key)   # Tuple in field_names order, or None
+    """
+
+    def __init__(self, field_names):
+        """
+        Parameters:
+        field_names (list): Names of the value fields, in the order the values are added.
+        """
+        self.field_names = list(field_names)
+        self.value_columns = [ValueColumn() for _ in self.field_names]
+        self.key_type = None
+        self.key_chunks = []
+        self.hash_chunks = []
+        self.min_width = None
+        self.other_keys = {}  # Keys that are not packable() (None, other types): row position
+        self.other_rows = []
+        self.row_count = 0
+        self.records = None
+        self.record = None  # Struct of one record: the value codes, then the key
+        self.key_width = 0
+        self.padded = False  # Some keys are shorter than key_width and padded with NUL
+        self.fixed_width = False  # Compacted, and every key is a str of key_width bytes: get() takes the short path
+        self.offsets = None
+        self.mask = 0
+        self.encoded_values = []  # Distinct values of the encoded fields, in record order
+        self.fields = []  # Per field: (index of the code in the record, values) or (None, values of every row)
+        self.plain_fields = []  # (field index, values of every row) of the fields that are not encoded
+        self.decode = None  # decode(record, position) -> tuple of the values
+
+    def __len__(self):
+        return self.row_count
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def extend(self, rows):
+        """
+        Add rows of (key, value1, value2, ...); a later row with the same key replaces an earlier one.
+        Only valid before compact().
+        """
+        if self.offsets is not None:
+            raise RuntimeError("Rows cannot be added to a compacted lookup.")
+        rows = iter(rows)
+        getters = [itemgetter(index) for index in range(len(self.field_names) + 1)]
+        while True:
+            chunk = list(itertools.islice(rows, CHUNK_ROWS))
+            if not chunk:
+                return
+            if set(map(len, chunk)) != {len(getters)}:
+                raise ValueError(f"Expected rows of a key and {len(self.field_names)} values.")
+            # One list per field; zip(*chunk) would allocate an iterator per row and trigger full garbage collections
+            self._add_keys(list(map(getters[0], chunk)))
+            for column, getter in zip(self.value_columns, getters[1:]):
+                column.extend(list(map(getter, chunk)))
+            self.row_count += len(chunk)
+
+    def add(self, key, values):
+        """
+        Add or replace the values for one key. Only valid before compact().
+        """
+        self.extend([(key,) + tuple(values)])
+
+    def _add_keys(self, keys):
+        types = set(map(type, keys))
+        if self.key_type is None:
+            self.key_type = str if str in types else int
+        if self.key_type is str:
+            packable = types == {str} and '\x00' not in ''.join(keys)
+        else:
+            packable = types == {int} and INT64_MIN <= min(keys) and max(keys) <= INT64_MAX
+        if not packable:
+            positions = [position for position, key in enumerate(keys) if not self.packable(key)]
+            for position in positions:
+                self.other_keys[keys[position]] = self.row_count + position  # Later rows replace earlier ones
+                self.other_rows.append(self.row_count + position)
+                keys[position] = self.key_type()  # Placeholder, kept out of the hash index by compact()
+        self.hash_chunks.append(numpy.fromiter(map(hash, keys), dtype=numpy.int64, count=len(keys)))
+        if self.key_type is str:
+            if not all(map(str.isascii, keys)):
+                keys = [key.encode('utf-8', 'surrogatepass') for key in keys]
+            widths = list(map(len, keys))
+            self.min_width = min(widths) if self.min_width is None else min(self.min_width, min(widths))
+            self.key_chunks.append(numpy.array(keys, dtype=f"S{max(max(widths), 1)}"))
+        else:
+            self.key_chunks.append(numpy.array(keys, dtype=numpy.int64))
+
+    def packable(self, key):
+        """
+        Return True if the key goes into the records, False if it is kept in other_keys.
+        """
+        if self.key_type is str:
+            return type(key) is str and '\x00' not in key
+        return type(key) is int and INT64_MIN <= key <= INT64_MAX
+
+    def compact(self):
+        """
+        Build the hash index and the records. Call it once, after all rows are added.
+        """
+        if self.offsets is not None:
+            return
+        bucket_count = 1 << (2 * self.row_count - 1).bit_length() if self.row_count else 1  # About two per row
+        self.mask = bucket_count - 1
+        buckets = numpy.empty(self.row_count, dtype=numpy.int64)
+        start = 0
+        for hashes in self.hash_chunks:
+            numpy.bitwise_and(hashes, self.mask, out=buckets[start:start + len(hashes)])
+            start += len(hashes)
+        self.hash_chunks = None
+        buckets[self.other_rows] = bucket_count  # After the last bucket, never searched
+        order = numpy.argsort(buckets, kind='stable')  # Rows of one bucket stay in the order they were added
+        offsets = numpy.zeros(bucket_count + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(buckets, minlength=bucket_count + 1)[:bucket_count], out=offsets[1:])
+        del buckets
+        typecode = 'i' if self.row_count < 2 ** 31 else 'q'
+        self.offsets = array(typecode, offsets.astype(CODE_DTYPES[typecode]).tobytes())
+        del offsets
+        record_position = numpy.empty(self.row_count, dtype=numpy.int64)  # Record of every row, in the order added
+        record_position[order] = numpy.arange(self.row_count)
+        self.other_keys = {key: int(record_position[row]) for key, row in self.other_keys.items()}
+        formats = []
+        dtypes = []
+        columns = []
+        for index, column in enumerate(self.value_columns):
+            values, codes, code_typecode = column.compact(order)
+            if codes is None:
+                self.fields.append((None, values))
+                self.plain_fields.append((index, values))
+            else:
+                self.fields.append((len(columns), values))
+                self.encoded_values.append(values)
+                formats.append(code_typecode)
+                dtypes.append((f"code{len(columns)}", CODE_DTYPES[code_typecode]))
+                columns.append(codes)
+        self.value_columns = self.other_rows = None
+        del order
+        if self.key_type is int:
+            formats.append('q')
+            dtypes.append(('key', '<i8'))
+        else:
+            self.key_width = max([chunk.dtype.itemsize for chunk in self.key_chunks] or [1])
+            self.padded = self.min_width is not None and self.min_width < self.key_width
+            formats.append(f"{self.key_width}s")
+            dtypes.append(('key', f"S{self.key_width}"))
+        self.record = Struct('<' + ''.join(formats))
+        records = numpy.empty(self.row_count, dtype=numpy.dtype(dtypes))
+        for index, codes in enumerate(columns):
+            records[f"code{index}"] = codes
+        del columns
+        start = 0
+        while self.key_chunks:  # One chunk at a time, so the chunks and the records are never all alive together
+            chunk = self.key_chunks.pop(0)
+            records['key'][record_position[start:start + len(chunk)]] = chunk
+            start += len(chunk)
+        self.key_chunks = None
+        self.records = memoryview(records)
+        self.fixed_width = self.key_type is str and not self.padded
+        self.decode = value_decoder(self.encoded_values, self.plain_fields)
+
+    def find(self, key):
+        """
+        Return (position, record) of a key, or None if the key is missing. The record is the tuple of the value codes
+        followed by the packed key.
+        """
+        if self.offsets is None:
+            self.compact()
+        if type(key) is not self.key_type:
+            if self.key_type is int and type(key) in (bool, float) and float(key).is_integer():
+                return self.find(int(key))  # 3.0 finds the row of 3, like in a dict
+            return self.find_other(key)
+        offsets = self.offsets
+        bucket = hash(key) & self.mask
+        start = offsets[bucket]
+        position = offsets[bucket + 1]
+        if self.key_type is str:
+            packed_key = key.encode('utf-8', 'surrogatepass')
+            width = self.key_width
+            if len(packed_key) != width or self.padded:
+                if len(packed_key) > width or b'\x00' in packed_key:
+                    return self.find_other(key)
+                packed_key = packed_key.ljust(width, b'\x00')
+        else:
+            packed_key = key
+        unpack_from = self.record.unpack_from
+        records = self.records
+        size = self.record.size
+        while position > start:  # Backwards: the last row with the key wins
+            position -= 1
+            record = unpack_from(records, position * size)
+            if record[-1] == packed_key:
+                return position, record
+        return self.find_other(key)  # Integers outside int64, keys with NUL characters
+
+    def find_other(self, key):
+        """
+        Return (position, record) of a key kept in other_keys, or None.
+        """
+        position = self.other_keys.get(key)
+        if position is None:
+            return None
+        return position, self.record.unpack_from(self.records, position * self.record.size)
+
+    def position(self, key):
+        """
+        Return the row position of a key, or None if the key is missing.
+        """
+        found = self.find(key)
+        return None if found is None else found[0]
+
+    def get(self, key, default=None):
+        """
+        Return the values for a key as a tuple in field_names order, or default if the key is missing.
+        """
+        if self.fixed_width and type(key) is str:
+            # get() runs once per destination row: the last record of the bucket is read first, without find(),
+            # which finds the other records of the bucket and the keys that are not packed
+            offsets = self.offsets
+            bucket = hash(key) & self.mask
+            position = offsets[bucket + 1] - 1
+            if position >= offsets[bucket]:
+                record = self.record.unpack_from(self.records, position * self.record.size)
+                if record[-1] == key.encode('utf-8', 'surrogatepass'):
+                    return self.decode(record, position)
+        found = self.find(key)
+        if found is None:
+            return default
+        return self.decode(found[1], found[0])
+
+    def get_value(self, key, field_name, default=None):
+        """
+        Return one field value for a key, or default if the key is missing.
+        """
+        found = self.find(key)
+        if found is None:
+            return default
+        position, record = found
+        code_index, values = self.fields[self.field_names.index(field_name)]
+        return values[position] if code_index is None else values[record[code_index]]
+
+    @classmethod
+    def from_rows(cls, field_names, rows):
+        """
+        Build a lookup from rows of (key, value1, value2, ...), for example a SearchCursor.
+        """
+        lookup = cls(field_names)
+        lookup.extend(rows)
+        lookup.compact()
+        return lookup
+
+
+def build_lookup(field_names, rows, compact=True):
+    """
+    Return a lookup whose get(key) returns the values of the last row with that key as a tuple, or None.
+    Parameters:
+    field_names (list): Names of the value fields.
+    rows (iterable): Rows of (key, value1, value2, ...), for example a SearchCursor.
+    compact (bool): Build a ColumnarLookup; False builds a {key: values} dict, which takes several times the memory.
+    """
+    if compact:
+        return ColumnarLookup.from_rows(field_names, rows)
+    return {row[0]: tuple(row[1:]) for row in rows}
@@ -1,25 +1,24 @@
 # This code creates a new polygon feature class in a geodatabase, 
 # then generates square polygons centered at given coordinates from a dictionary of station points, 
-# finally inserts these polygons into the feature class using an ArcPy InsertCursor.
+# finally inserts these polygons into the feature class using an InsertCursor.
+# The data backend (arcpy or a local GeoPackage) does the work, see data_backend.py.
 
-# Arcpy module is for working with spatial data
-import arcpy
+import os
 
-# First set the workspace where the data will be stored
-arcpy.env.workspace = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb"
+from data_backend import get_backend
 
 
 # This function will create a square polygon based on a center point and size
 def square_polygon(center_x, center_y, size):
     middle_point = size / 2
     vertices = [
-              arcpy.Point(center_x - middle_point, center_y - middle_point),
-              arcpy.Point(center_x + middle_point, center_y - middle_point),
-              arcpy.Point(center_x + middle_point, center_y + middle_point),
-              arcpy.Point(center_x - middle_point, center_y + middle_point),
-              arcpy.Point(center_x - middle_point, center_y - middle_point)  # Closing the polygon
+              (center_x - middle_point, center_y - middle_point),
+              (center_x + middle_point, center_y - middle_point),
+              (center_x + middle_point, center_y + middle_point),
+              (center_x - middle_point, center_y + middle_point),
+              (center_x - middle_point, center_y - middle_point)  # Closing the polygon
               ]
-    return arcpy.Polygon(arcpy.Array(vertices))
+    return get_backend().polygon(vertices)
 
 
 # A dictionary of station values: {OBJECTID: [Geometry Type, Name, X_coordinate, Y_coordinate]}
@@ -33,26 +32,34 @@ stations_point_fc = {
     7: ["Point", "PTCZ 1114 GAVANA", 1.530723, -0.815964],
 }
 
-# Local variables for creating a new feature class Station_polygon (or shapefile + .shp)
-output_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb"
-output_name = "Station_polygon"
-geometry_type = "POLYGON"
-template = None
-has_m = "DISABLED"
-has_z = "DISABLED"
-spatial_reference = arcpy.Describe(r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\StationBoundary").spatialReference  #get from existing fc
-
-arcpy.management.CreateFeatureclass(output_path, output_name, geometry_type, template, has_m, has_z, spatial_reference)
-station_polygon_fc = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\Station_polygon.shp"
-
-# InsertCursor adds square polygons to the new feature class
-with arcpy.da.InsertCursor(station_polygon_fc, ["SHAPE@"]) as cursor:
-    for OBJECTID, station_values in stations_point_fc.items():
-        SIZE_SQUARE = 1
-        station_name = station_values[1]
-        center_x = station_values[2]
-        center_y = station_values[3]
-        polygon = square_polygon(center_x, center_y, SIZE_SQUARE)  # Create a square polygon
-        cursor.insertRow([polygon])  # Insert the polygon into the feature class
-
-print("Successful")
+
+def create_station_polygons(output_path, output_name, stations, spatial_reference_of=None, size_square=1):
+    """
+    Create a polygon feature class and insert one square polygon per station.
+    Parameters:
+    output_path (str): Geodatabase (or GeoPackage) for the new feature class.
+    output_name (str): Name of the new feature class.
+    stations (dict): {OBJECTID: [Geometry Type, Name, X_coordinate, Y_coordinate]}.
+    spatial_reference_of (str): Existing feature class whose spatial reference is used.
+    size_square (float): Side length of the squares.
+    """
+    backend = get_backend()
+    station_polygon_fc = backend.create_feature_class(output_path, output_name, "POLYGON", spatial_reference_of)
+
+    # InsertCursor adds square polygons to the new feature class
+    with backend.insert_cursor(station_polygon_fc, ["SHAPE@"]) as cursor:
+        for OBJECTID, station_values in stations.items():
+            station_name = station_values[1]
+            center_x = station_values[2]
+            center_y = station_values[3]
+            polygon = square_polygon(center_x, center_y, size_square)  # Create a square polygon
+            cursor.insertRow([polygon])  # Insert the polygon into the feature class
+    return station_polygon_fc
+
+
+if __name__ == "__main__":
+    # Local variables for creating a new feature class Station_polygon
+    output_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb"
+    create_station_polygons(output_path, "Station_polygon", stations_point_fc,
+                            spatial_reference_of=os.path.join(output_path, "StationBoundary"))  #get from existing fc
+    print("Successful")
@@ -0,0 +1,868 @@
+# This module hides where the data lives behind a small backend interface:
+# search / update / insert cursors, exists, list fields, add / delete fields, spatial selection and feature class creation.
+# ArcpyBackend calls arcpy (imported only when it is used). GeoPackageBackend stores the feature classes in a
+# GeoPackage (SQLite) file and returns shapely geometries, so the update logic can be run and profiled without ArcGIS.
+# The backend is chosen with set_backend() or the DATA_BACKEND environment variable ('arcpy' or 'geopackage');
+# worker processes of the pipeline inherit the variable.
+# GeoPackage paths look like geodatabase paths: r"C:\data\pilot.gpkg\Bay" is the table Bay in pilot.gpkg.
+# Only create_feature_class creates a missing GeoPackage file; reads open the file read-only, writes read-write,
+# so a mistyped path fails instead of leaving an empty GeoPackage behind.
+# SelectionCursor opens the cursors of both backends on the rows with given OBJECTIDs or keys only, with
+# "IN (...)" where clauses in chunks, so incremental runs do not read whole tables to process a few rows.
+
+
+import datetime
+import os
+import pathlib
+import re
+import sqlite3
+import struct
+from collections import namedtuple
+
+BACKEND_VARIABLE = 'DATA_BACKEND'
+
+FieldInfo = namedtuple('FieldInfo', ['name', 'type', 'length'])
+
+_backend = None
+
+
+def get_backend():
+    """
+    Return the active backend, creating it on first use from the DATA_BACKEND environment variable (default 'arcpy').
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend(os.environ.get(BACKEND_VARIABLE, 'arcpy'))
+    return _backend
+
+
+def set_backend(name):
+    """
+    Select the backend for this process and for the worker processes started after this call.
+    Parameters:
+    name (str): 'arcpy' or 'geopackage'.
+    """
+    global _backend
+    _backend = create_backend(name)
+    os.environ[BACKEND_VARIABLE] = name
+    return _backend
+
+
+def create_backend(name):
+    if name == 'arcpy':
+        return ArcpyBackend()
+    if name in ('geopackage', 'gpkg'):
+        return GeoPackageBackend()
+    raise ValueError(f"Unknown data backend '{name}', use 'arcpy' or 'geopackage'.")
+
+
+class ArcpyBackend:
+    """
+    Backend that passes every call to arcpy.
+    """
+
+    name = 'arcpy'
+
+    def __init__(self):
+        import arcpy  # Only imported when this backend is used
+        self.arcpy = arcpy
+
+    def search_cursor(self, table, fields, where_clause=None):
+        return self.arcpy.da.SearchCursor(table, fields, where_clause)
+
+    def update_cursor(self, table, fields, where_clause=None):
+        return self.arcpy.da.UpdateCursor(table, fields, where_clause)
+
+    def insert_cursor(self, table, fields):
+        return self.arcpy.da.InsertCursor(table, fields)
+
+    def exists(self, table):
+        return bool(self.arcpy.Exists(table))
+
+    def list_fields(self, table):
+        return [FieldInfo(field.name, field.type, field.length) for field in self.arcpy.ListFields(table)]
+
+    def add_field(self, table, field_name, field_type, field_length=None):
+        self.arcpy.AddField_management(table, field_name, field_type, field_length=field_length)
+
+    def add_fields(self, table, fields):
+        """
+        Add several fields (FieldInfo or (name, type, length)) with one AddFields call, one schema lock for all of them.
+        """
+        descriptions = [[name, _ADD_FIELDS_TYPES.get(field_type, field_type), '', length if length else '']
+                        for name, field_type, length in fields]
+        if descriptions:
+            self.arcpy.management.AddFields(table, descriptions)
+
+    def delete_field(self, table, field_name):
+        self.arcpy.DeleteField_management(table, field_name)
+
+    def xy_tolerance(self, table):
+        tolerance = self.arcpy.Describe(table).spatialReference.XYTolerance
+        if tolerance is None or tolerance != tolerance:  # NaN for unknown spatial references
+            return 0.0
+        return tolerance
+
+    def read_columns(self, table, fields, where_clause=None):
+        """
+        Return {field: NumPy object array} of attribute fields (and 'OID@'), read with TableToNumPyArray; nulls become None.
+        Text and integer columns get a stand-in value for nulls, which real values can have too (NumPy also cuts
+        trailing NULs from strings), so their nulls are found with null_oids() instead, one query for all of them.
+        """
+        import numpy
+        null_values = {}
+        queried = []  # Fields whose nulls are read with null_oids()
+        field_types = {field.name.upper(): field.type for field in self.arcpy.ListFields(table)}
+        for field in fields:
+            field_type = field_types.get(field.upper(), 'OID')
+            if field_type in ('String', 'Guid', 'GlobalID'):
+                null_values[field] = NULL_TEXT
+                queried.append(field)
+            elif field_type in ('Integer', 'SmallInteger', 'BigInteger'):
+                null_values[field] = NULL_INTEGERS[field_type]
+                queried.append(field)
+            elif field_type in ('Double', 'Single'):
+                null_values[field] = numpy.nan
+            elif field_type != 'OID':
+                return read_columns_with_cursor(self, table, fields, where_clause)  # Dates and other types: row by row
+        read_fields = list(fields) if 'OID@' in fields else list(fields) + ['OID@']
+        array = self.arcpy.da.TableToNumPyArray(table, read_fields, where_clause, null_value=null_values)
+        null_oids = self.null_oids(table, queried, where_clause)
+        columns = {}
+        for field in fields:
+            values = array[field]
+            column = values.astype(object)
+            if field in null_values:
+                if field in null_oids:
+                    nulls = numpy.isin(array['OID@'], null_oids[field])
+                else:
+                    nulls = values != values
+                column[nulls] = None
+            columns[field] = column
+        return columns
+
+    def null_oids(self, table, fields, where_clause=None):
+        """
+        Return {field: list of the OBJECTIDs of the rows where field is null} for several fields, read with one
+        SearchCursor over the rows where any of them is null.
+        """
+        null_oids = {field: [] for field in fields}
+        if not fields:
+            return null_oids
+        condition = ' OR '.join(f"{self.arcpy.AddFieldDelimiters(table, field)} IS NULL" for field in fields)
+        if where_clause:
+            condition = f"({where_clause}) AND ({condition})"
+        with self.arcpy.da.SearchCursor(table, ['OID@'] + list(fields), condition) as cursor:
+            for row in cursor:
+                for field, value in zip(fields, row[1:]):
+                    if value is None:
+                        null_oids[field].append(row[0])
+        return null_oids
+
+    def update_columns(self, table, oids, columns):
+        """
+        Write new values {field: array} to the rows with the given OBJECTIDs. The rows are selected with
+        selection_clauses() on the OBJECTID field, one UpdateCursor per clause, so only they are read; only when
+        there are too many OBJECTIDs for SELECTION_MAX_QUERIES clauses one UpdateCursor passes over the whole table.
+        """
+        if len(oids) == 0:
+            return
+        fields = list(columns)
+        positions = {oid: position for position, oid in enumerate(oids.tolist())}
+        values = [columns[field].tolist() for field in fields]
+        for where_clause in selection_clauses(self.oid_field(table), positions) or [None]:
+            with self.arcpy.da.UpdateCursor(table, ['OID@'] + fields, where_clause) as cursor:
+                for row in cursor:
+                    position = positions.get(row[0])
+                    if position is not None:
+                        cursor.updateRow([row[0]] + [column[position] for column in values])
+
+    def schema_stamp(self, workspace):
+        """
+        Return a value that changes whenever a schema in the workspace changes, or None when there is no cheap one.
+        A file geodatabase rewrites its GDB_Items table (a00000004.gdbtable) on every schema change.
+        """
+        items_table = os.path.join(workspace, 'a00000004.gdbtable')
+        if str(workspace).lower().endswith('.gdb') and os.path.isfile(items_table):
+            status = os.stat(items_table)
+            return f"{status.st_mtime_ns}:{status.st_size}"
+        return None
+
+    def edit_date_field(self, table):
+        """
+        Return the editor-tracking "edited at" field of a table, or None when editor tracking is off.
+        """
+        description = self.arcpy.Describe(table)
+        if getattr(description, 'editorTrackingEnabled', False):
+            return description.editedAtFieldName or None
+        return None
+
+    def oid_field(self, table):
+        return self.arcpy.Describe(table).OIDFieldName
+
+    def table_stamp(self, table, exact=False):
+        """
+        Return a value that changes when rows of the table change, read without a pass over the rows:
+        row count, highest OBJECTID and, with editor tracking, the newest edit date. Without editor tracking
+        an edit that keeps the row count and the highest OBJECTID is not seen; exact=True returns None then.
+        """
+        description = self.arcpy.Describe(table)
+        edit_field = description.editedAtFieldName if getattr(description, 'editorTrackingEnabled', False) else None
+        if exact and not edit_field:
+            return None
+        count = int(self.arcpy.management.GetCount(table).getOutput(0))
+        stamp = f"rows:{count}:{self.highest_value(table, description.OIDFieldName)}"
+        if edit_field:
+            stamp += f":edited:{self.highest_value(table, edit_field)}"
+        return stamp
+
+    def highest_value(self, table, field):
+        """
+        Return the highest non-null value of a field, read from the first row of a sorted cursor.
+        """
+        delimited = self.arcpy.AddFieldDelimiters(table, field)
+        with self.arcpy.da.SearchCursor(table, [field], f"{delimited} IS NOT NULL",
+                                        sql_clause=(None, f"ORDER BY {delimited} DESC")) as cursor:
+            row = next(iter(cursor), None)
+        return row[0] if row else None
+
+    def geometries_from_wkb(self, wkbs, table):
+        """
+        Return arcpy geometries (in the spatial reference of table) for a list of WKB values; None stays None.
+        """
+        spatial_reference = self.arcpy.Describe(table).spatialReference
+        return [self.arcpy.FromWKB(bytearray(wkb), spatial_reference) if wkb else None for wkb in wkbs]
+
+    def select_by_location(self, table, overlap_type, select_table):
+        """
+        Return the OBJECTIDs of the features of table that have the relationship overlap_type with any feature of select_table.
+        """
+        layer = self.arcpy.management.MakeFeatureLayer(table, self.arcpy.CreateUniqueName('selection_layer')).getOutput(0)
+        try:
+            self.arcpy.management.SelectLayerByLocation(layer, overlap_type, select_table)
+            with self.arcpy.da.SearchCursor(layer, ['OID@']) as cursor:
+                return {row[0] for row in cursor}
+        finally:
+            self.arcpy.management.Delete(layer)
+
+    def create_feature_class(self, out_path, out_name, geometry_type, spatial_reference_of=None):
+        """
+        Create a feature class (geometry_type None creates a table) and return its path.
+        spatial_reference_of is the path of an existing feature class whose spatial reference is used.
+        """
+        if geometry_type is None:
+            self.arcpy.management.CreateTable(out_path, out_name)
+        else:
+            spatial_reference = self.arcpy.Describe(spatial_reference_of).spatialReference if spatial_reference_of else None
+            self.arcpy.management.CreateFeatureclass(out_path, out_name, geometry_type, None, "DISABLED", "DISABLED",
+                                                     spatial_reference)
+        return os.path.join(out_path, out_name)
+
+    def polygon(self, coordinates):
+        """
+        Return a polygon geometry from a list of (x, y) vertices.
+        """
+        return self.arcpy.Polygon(self.arcpy.Array([self.arcpy.Point(x, y) for x, y in coordinates]))
+
+    def add_warning(self, message):
+        self.arcpy.AddWarning(message)
+
+
+def read_columns_with_cursor(backend, table, fields, where_clause=None):
+    """
+    Return {field: NumPy object array} read with a search cursor.
+    """
+    import numpy
+    with backend.search_cursor(table, fields, where_clause) as cursor:
+        rows = list(cursor)
+    columns = {}
+    for number, field in enumerate(fields):
+        column = numpy.empty(len(rows), dtype=object)
+        column[:] = [row[number] for row in rows]
+        columns[field] = column
+    return columns
+
+
+NULL_TEXT = ''  # Stand-ins for nulls while TableToNumPyArray reads a table, the nulls are found with null_oids()
+NULL_INTEGERS = {'SmallInteger': -2 ** 15, 'Integer': -2 ** 31, 'BigInteger': -2 ** 63}
+
+
+# Row selection
+
+SELECTION_CHUNK_SIZE = 1000  # Values per "IN (...)" list; Oracle rejects longer lists
+SELECTION_MAX_QUERIES = 20  # With more chunks one pass over the table is cheaper than a query per chunk
+
+
+def selection_clauses(field, values, where_clause=None):
+    """
+    Return the where clauses that together select the rows whose field has one of the values ("IN (...)" lists of
+    SELECTION_CHUNK_SIZE values, "IS NULL" for None), each combined with where_clause.
+    Return None when they would be more than SELECTION_MAX_QUERIES or a value is not a string or an integer.
+    Parameters:
+    field (str): Column name (not a token like 'OID@').
+    values (iterable): Wanted values.
+    where_clause (str): Optional condition every selected row must meet too.
+    """
+    values = set(values)
+    has_null = None in values
+    values.discard(None)
+    if any(type(value) not in (str, int) for value in values):
+        return None
+    literals = ["'" + value.replace("'", "''") + "'" if type(value) is str else str(value)
+                for value in sorted(values, key=lambda value: (type(value) is str, value))]
+
+    conditions = [f"{field} IN ({', '.join(literals[start:start + SELECTION_CHUNK_SIZE])})"
+                  for start in range(0, len(literals), SELECTION_CHUNK_SIZE)]
+    if has_null:
+        conditions.append(f"{field} IS NULL")
+    if len(conditions) > SELECTION_MAX_QUERIES:
+        return None
+    return [f"({where_clause}) AND {condition}" if where_clause else condition for condition in conditions]
+
+
+class SelectionCursor:
+    """
+    Search or update cursor over the rows of a table whose field (a column or 'OID@') has one of the given values.
+    A few values are selected by the database with selection_clauses(), one backend cursor per clause; with many
+    values one backend cursor reads every row and the other rows are left out here. values None selects every row.
+    Usage:
+        with SelectionCursor(table, ['MIG_STATIONGUID'], 'OID@', oids) as cursor:
+            for row in cursor:
+                ...
+                cursor.updateRow(row)
+    """
+
+    def __init__(self, table, fields, field, values, where_clause=None, mode='update'):
+        self.backend = get_backend()
+        self.table = table
+        self.fields = list(fields)
+        self.mode = mode
+        self.values = None if values is None else set(values)
+        self.clauses = [where_clause]
+        self.filter_position = None
+        self.added_field = None
+        if self.values is not None:
+            column = self.backend.oid_field(table) if field.upper() == 'OID@' else field
+            clauses = selection_clauses(column, self.values, where_clause)
+            if clauses is not None:
+                self.clauses = clauses
+            elif field in self.fields:
+                self.filter_position = self.fields.index(field)
+            else:
+                self.added_field = field  # Read for the filter, left out of the rows the caller sees
+                self.filter_position = len(self.fields)
+        self.cursor = None
+        self.filter_value = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.cursor is not None:
+            cursor, self.cursor = self.cursor, None
+            cursor.__exit__(exc_type, exc_value, traceback)
+        return False
+
+    def __iter__(self):
+        cursor_fields = self.fields + [self.added_field] if self.added_field else self.fields
+        for where_clause in self.clauses:
+            if self.mode == 'update':
+                cursor = self.backend.update_cursor(self.table, cursor_fields, where_clause)
+            else:
+                cursor = self.backend.search_cursor(self.table, cursor_fields, where_clause)
+            cursor.__enter__()
+            self.cursor = cursor
+            for row in cursor:
+                if self.filter_position is not None:
+                    self.filter_value = row[self.filter_position]
+                    if self.filter_value not in self.values:
+                        continue
+                    if self.added_field:
+                        row = row[:-1]
+                yield row
+            self.cursor = None
+            cursor.__exit__(None, None, None)
+
+    def updateRow(self, row):
+        return self.cursor.updateRow(list(row) + [self.filter_value] if self.added_field else row)
+
+    def deleteRow(self):
+        return self.cursor.deleteRow()
+
+
+# GeoPackage backend
+
+GEOPACKAGE_PAGE_SIZE = 10000  # Rows read per query; an update cursor commits after every page
+
+GEOMETRY_TOKENS = ('SHAPE@', 'SHAPE@WKB')
+
+_ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+_FIELD_TYPES = {'TEXT': 'TEXT', 'STRING': 'TEXT', 'GUID': 'TEXT', 'GLOBALID': 'TEXT', 'SHORT': 'INTEGER',
+                'LONG': 'INTEGER', 'BIGINTEGER': 'INTEGER', 'FLOAT': 'REAL', 'DOUBLE': 'REAL', 'DATE': 'DATETIME',
+                'BLOB': 'BLOB', 'SMALLINTEGER': 'INTEGER', 'INTEGER': 'INTEGER', 'SINGLE': 'REAL'}
+
+# Field types of ListFields as AddFields expects them
+_ADD_FIELDS_TYPES = {'String': 'TEXT', 'SmallInteger': 'SHORT', 'Integer': 'LONG', 'BigInteger': 'BIGINTEGER',
+                     'Single': 'FLOAT', 'Double': 'DOUBLE', 'Date': 'DATE', 'DateOnly': 'DATEONLY',
+                     'TimeOnly': 'TIMEONLY', 'TimestampOffset': 'TIMESTAMPOFFSET', 'Guid': 'GUID', 'Blob': 'BLOB',
+                     'Raster': 'RASTER'}
+
+_SELECTION_PREDICATES = {'INTERSECT': 'intersects', 'WITHIN': 'within', 'CONTAINS': 'contains'}
+
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat())
+sqlite3.register_converter('DATETIME', lambda value: datetime.datetime.fromisoformat(value.decode().rstrip('Z')))
+
+
+def split_geopackage_path(path):
+    """
+    Return (GeoPackage file, table name) of a path like C:\\data\\pilot.gpkg\\Bay.
+    """
+    match = re.match(r'^(.*?\.gpkg)[\\/]+([^\\/]+)$', str(path), re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"'{path}' is not a table in a GeoPackage (expected <file>.gpkg/<table>).")
+    return match.group(1), match.group(2)
+
+
+def encode_geometry(wkb, bounds, srs_id):
+    """
+    Return a GeoPackage geometry blob: the standard header with an XY envelope, followed by the WKB.
+    """
+    if bounds is None:  # Empty geometry: no envelope, empty flag set
+        return b'GP\x00' + bytes([0b00010001]) + struct.pack('<i', srs_id) + wkb
+    min_x, min_y, max_x, max_y = bounds
+    return b'GP\x00' + bytes([0b00000011]) + struct.pack('<i4d', srs_id, min_x, max_x, min_y, max_y) + wkb
+
+
+def geometry_wkb(blob):
+    """
+    Return the WKB part of a GeoPackage geometry blob.
+    """
+    if blob is None:
+        return None
+    flags = blob[3]
+    return bytes(blob[8 + _ENVELOPE_SIZES[(flags >> 1) & 0b111]:])
+
+
+def translate_where_clause(where_clause):
+    """
+    Translate the geodatabase date literal (date 'YYYY-MM-DD HH:MM:SS') to the ISO text stored in a GeoPackage.
+    """
+    if not where_clause:
+        return None
+    return re.sub(r"\bdate\s+'(\d{4}-\d{2}-\d{2})(?: (\d{2}:\d{2}:\d{2}))?'",
+                  lambda match: f"'{match.group(1)}T{match.group(2) or '00:00:00'}'", where_clause, flags=re.IGNORECASE)
+
+
+class GeoPackageTable:
+    """
+    Column names of one table: the OBJECTID primary key, the geometry column (or None) and the SRS id.
+    """
+
+    def __init__(self, connection, table_name):
+        self.name = table_name
+        columns = connection.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+        if not columns:
+            raise ValueError(f"Table '{table_name}' does not exist.")
+        self.columns = {column[1].upper(): column[1] for column in columns}
+        self.column_types = {column[1]: column[2] for column in columns}
+        self.oid_column = next(column[1] for column in columns if column[5])
+        geometry = connection.execute("SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?)",
+                                      (table_name,)).fetchone()
+        self.geometry_column, self.srs_id = geometry if geometry else (None, 0)
+
+    def column(self, field):
+        """
+        Return the column name of a cursor field or token (OID@, SHAPE@, SHAPE@WKB).
+        """
+        upper_field = field.upper()
+        if upper_field == 'OID@':
+            return self.oid_column
+        if upper_field in GEOMETRY_TOKENS or upper_field == 'SHAPE':
+            if self.geometry_column is None:
+                raise ValueError(f"Table '{self.name}' has no geometry column.")
+            return self.geometry_column
+        if upper_field not in self.columns:
+            raise ValueError(f"Field '{field}' does not exist in table '{self.name}'.")
+        return self.columns[upper_field]
+
+
+class GeoPackageCursor:
+    """
+    Search / update / insert cursor on a GeoPackage table with the arcpy.da cursor methods.
+    Rows are read in pages by OBJECTID, so updates between pages never touch a running query.
+    """
+
+    def __init__(self, backend, table, fields, where_clause=None, mode='search'):
+        if isinstance(fields, str):
+            fields = [fields]
+        self.fields = list(fields)
+        self.connection, table_name = backend.connect(table, 'ro' if mode == 'search' else 'rw')
+        self.table = GeoPackageTable(self.connection, table_name)
+        self.columns = [self.table.column(field) for field in self.fields]
+        self.geometry_positions = [position for position, field in enumerate(self.fields) if field.upper() in GEOMETRY_TOKENS]
+        self.shape_positions = [position for position, field in enumerate(self.fields) if field.upper() == 'SHAPE@']
+        self.where_clause = translate_where_clause(where_clause)
+        self.mode = mode
+        self.current_oid = None
+        self.current_row = None
+        self.changed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.connection.rollback()
+        return False
+
+    def _pages(self):
+        column_list = ', '.join(f'"{column}"' for column in [self.table.oid_column] + self.columns)
+        condition = f" AND ({self.where_clause})" if self.where_clause else ''
+        query = (f'SELECT {column_list} FROM "{self.table.name}" WHERE "{self.table.oid_column}" > ?{condition} '
+                 f'ORDER BY "{self.table.oid_column}" LIMIT {GEOPACKAGE_PAGE_SIZE}')
+        last_oid = float('-inf')
+        while True:
+            page = self.connection.execute(query, (last_oid,)).fetchall()
+            if not page:
+                return
+            last_oid = page[-1][0]
+            yield page
+            if self.mode == 'update':
+                self.commit()  # Releases the write lock between pages, other processes can write too
+            if len(page) < GEOPACKAGE_PAGE_SIZE:
+                return
+
+    def _decode_page(self, page):
+        rows = [list(row) for row in page]
+        for position in self.geometry_positions:
+            column = position + 1
+            for row in rows:
+                row[column] = geometry_wkb(row[column])
+        if self.shape_positions:
+            import shapely
+            for position in self.shape_positions:
+                column = position + 1
+                geometries = shapely.from_wkb([row[column] for row in rows])  # One vectorized call per page
+                for row, geometry in zip(rows, geometries):
+                    row[column] = geometry
+        return rows
+
+    def __iter__(self):
+        for page in self._pages():
+            for row in self._decode_page(page):
+                self.current_oid = row[0]
+                if self.mode == 'search':
+                    yield tuple(row[1:])
+                else:
+                    self.current_row = row[1:]
+                    yield list(self.current_row)
+        self.current_oid = None
+
+    def _encode(self, position, value):
+        field = self.fields[position].upper()
+        if value is None or field not in GEOMETRY_TOKENS:
+            return value
+        import shapely
+        if field == 'SHAPE@WKB':
+            geometry = shapely.from_wkb(value)
+            wkb = bytes(value)
+        else:
+            geometry = value
+            wkb = shapely.to_wkb(value)
+        bounds = None if geometry.is_empty else geometry.bounds
+        return encode_geometry(wkb, bounds, self.table.srs_id)
+
+    def updateRow(self, row):
+        if self.current_oid is None:
+            raise RuntimeError("updateRow() must be called while iterating the cursor.")
+        assignments = []
+        values = []
+        for position, (column, value) in enumerate(zip(self.columns, row)):
+            old_value = self.current_row[position]
+            if column == self.table.oid_column or value is old_value or value == old_value:
+                continue  # Only changed columns are written; an untouched geometry is never re-encoded
+            assignments.append(f'"{column}" = ?')
+            values.append(self._encode(position, value))
+        if assignments:
+            self.connection.execute(f'UPDATE "{self.table.name}" SET {", ".join(assignments)} '
+                                    f'WHERE "{self.table.oid_column}" = ?', values + [self.current_oid])
+            self.changed = True
+
+    def commit(self):
+        if self.changed:
+            touch_contents(self.connection, self.table.name)
+            self.changed = False
+        self.connection.commit()
+
+    def deleteRow(self):
+        if self.current_oid is None:
+            raise RuntimeError("deleteRow() must be called while iterating the cursor.")
+        self.connection.execute(f'DELETE FROM "{self.table.name}" WHERE "{self.table.oid_column}" = ?', (self.current_oid,))
+        self.changed = True
+
+    def insertRow(self, row):
+        pairs = [(column, self._encode(position, value)) for position, (column, value) in enumerate(zip(self.columns, row))
+                 if column != self.table.oid_column]
+        column_list = ', '.join(f'"{column}"' for column, _ in pairs)
+        placeholders = ', '.join('?' for _ in pairs)
+        cursor = self.connection.execute(f'INSERT INTO "{self.table.name}" ({column_list}) VALUES ({placeholders})',
+                                         [value for _, value in pairs])
+        self.changed = True
+        return cursor.lastrowid
+
+
+
+class GeoPackageBackend:
+    """
+    Backend that reads and writes GeoPackage files with sqlite3 and shapely. One connection per file and process.
+    """
+
+    name = 'geopackage'
+
+    def __init__(self):
+        self.connections = {}
+        self.process_id = os.getpid()
+
+    def connect(self, table, mode='rw'):
+        """
+        Return (connection, table name) for a path like pilot.gpkg/Bay.
+        Parameters:
+        table (str): Path to the table.
+        mode (str): 'ro' to read, 'rw' to write, 'rwc' to write and create the GeoPackage when it does not exist.
+        """
+        database, table_name = split_geopackage_path(table)
+        database = os.path.abspath(database)
+        if os.getpid() != self.process_id:  # A forked worker never uses the connections of its parent
+            self.connections = {}
+            self.process_id = os.getpid()
+        new_database = not os.path.exists(database)
+        if new_database and mode != 'rwc':
+            raise FileNotFoundError(f"GeoPackage {database} does not exist.")
+        key = (database, 'ro' if mode == 'ro' else 'rw')
+        if key not in self.connections:
+            uri = f"{pathlib.Path(database).as_uri()}?mode={'ro' if mode == 'ro' else 'rwc'}"
+            connection = sqlite3.connect(uri, uri=True, timeout=300, detect_types=sqlite3.PARSE_DECLTYPES)
+            if mode != 'ro':
+                connection.execute('PRAGMA journal_mode=WAL')  # Readers do not block the writer of another step
+            if new_database:
+                initialize_geopackage(connection)
+            self.connections[key] = connection
+        return self.connections[key], table_name
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+    def search_cursor(self, table, fields, where_clause=None):
+        return GeoPackageCursor(self, table, fields, where_clause, 'search')
+
+    def update_cursor(self, table, fields, where_clause=None):
+        return GeoPackageCursor(self, table, fields, where_clause, 'update')
+
+    def insert_cursor(self, table, fields):
+        return GeoPackageCursor(self, table, fields, mode='insert')
+
+    def read_columns(self, table, fields, where_clause=None):
+        """
+        Return {field: NumPy object array} of attribute fields (and 'OID@'), read with one query.
+        """
+        import numpy
+        connection, table_name = self.connect(table, 'ro')
+        description = GeoPackageTable(connection, table_name)
+        columns = [description.column(field) for field in fields]
+        if description.geometry_column in columns:
+            raise ValueError("read_columns() reads attribute fields only.")
+        condition = f" WHERE {translate_where_clause(where_clause)}" if where_clause else ''
+        rows = connection.execute(f'SELECT {", ".join(f"{chr(34)}{column}{chr(34)}" for column in columns)} '
+                                  f'FROM "{table_name}"{condition} ORDER BY "{description.oid_column}"').fetchall()
+        result = {}
+        for field, values in zip(fields, zip(*rows) if rows else [()] * len(fields)):
+            column = numpy.empty(len(values), dtype=object)
+            column[:] = values
+            result[field] = column
+        return result
+
+    def update_columns(self, table, oids, columns):
+        """
+        Write new values {field: array} to the rows with the given OBJECTIDs, with one executemany().
+        """
+        if len(oids) == 0:
+            return
+        connection, table_name = self.connect(table)
+        description = GeoPackageTable(connection, table_name)
+        fields = list(columns)
+        assignments = ', '.join(f'"{description.column(field)}" = ?' for field in fields)
+        connection.executemany(f'UPDATE "{table_name}" SET {assignments} WHERE "{description.oid_column}" = ?',
+                               zip(*[columns[field].tolist() for field in fields], oids.tolist()))
+        touch_contents(connection, table_name)
+        connection.commit()
+
+    def exists(self, table):
+        if not os.path.isfile(split_geopackage_path(table)[0]):
+            return False
+        connection, table_name = self.connect(table, 'ro')
+        return connection.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+                                  (table_name,)).fetchone() is not None
+
+    def list_fields(self, table):
+        connection, table_name = self.connect(table, 'ro')
+        description = GeoPackageTable(connection, table_name)
+        fields = []
+        for column, column_type in description.column_types.items():
+            if column == description.oid_column:
+                fields.append(FieldInfo(column, 'OID', 4))
+            elif column == description.geometry_column:
+                fields.append(FieldInfo(column, 'Geometry', 0))
+            else:
+                length = re.search(r'\((\d+)\)', column_type)
+                base_type = column_type.split('(')[0].upper()
+                field_type = {'TEXT': 'String', 'INTEGER': 'Integer', 'REAL': 'Double', 'DATETIME': 'Date'}.get(base_type, base_type)
+                fields.append(FieldInfo(column, field_type, int(length.group(1)) if length else 0))
+        return fields
+
+    def add_field(self, table, field_name, field_type, field_length=None):
+        self.add_fields(table, [(field_name, field_type, field_length)])
+
+    def add_fields(self, table, fields):
+        """
+        Add several fields (FieldInfo or (name, type, length)) in one transaction.
+        """
+        connection, table_name = self.connect(table)
+        for field_name, field_type, field_length in fields:
+            column_type = _FIELD_TYPES.get(field_type.upper(), field_type.upper())
+            if column_type == 'TEXT' and field_length:
+                column_type = f'TEXT({field_length})'
+            connection.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{field_name}" {column_type}')
+        connection.commit()
+
+    def delete_field(self, table, field_name):
+        connection, table_name = self.connect(table)
+        connection.execute(f'ALTER TABLE "{table_name}" DROP COLUMN "{field_name}"')
+        connection.commit()
+
+    def xy_tolerance(self, table):
+        return 0.0  # GeoPackage geometries are compared exactly
+
+    def schema_stamp(self, workspace):
+        """
+        Return the SQLite schema version of the GeoPackage, incremented by every schema change.
+        """
+        if not os.path.isfile(workspace):
+            return None
+        connection, _ = self.connect(os.path.join(workspace, 'gpkg_contents'), 'ro')
+        return str(connection.execute('PRAGMA schema_version').fetchone()[0])
+
+    def edit_date_field(self, table):
+        return None  # No editor tracking in a GeoPackage
+
+    def oid_field(self, table):
+        connection, table_name = self.connect(table, 'ro')
+        return GeoPackageTable(connection, table_name).oid_column
+
+    def table_stamp(self, table, exact=False):
+        """
+        Return a value that changes when rows of the table change: row count, highest OBJECTID and the last_change
+        of the table in gpkg_contents, which every write of this backend (and of GDAL) updates, so exact is not needed.
+        """
+        connection, table_name = self.connect(table, 'ro')
+        description = GeoPackageTable(connection, table_name)
+        count, highest_oid = connection.execute(f'SELECT count(*), max("{description.oid_column}") '
+                                                f'FROM "{table_name}"').fetchone()
+        last_change = connection.execute('SELECT last_change FROM gpkg_contents WHERE lower(table_name) = lower(?)',
+                                         (table_name,)).fetchone()
+        return f"rows:{count}:{highest_oid}:changed:{last_change[0] if last_change else None}"
+
+    def geometries_from_wkb(self, wkbs, table):
+        """
+        Return shapely geometries for a list of WKB values (one vectorized call); None stays None.
+        """
+        import shapely
+        return list(shapely.from_wkb(list(wkbs))) if wkbs else []
+
+    def select_by_location(self, table, overlap_type, select_table):
+        """
+        Return the OBJECTIDs of the features of table that have the relationship overlap_type with any feature of select_table.
+        """
+        import shapely
+        if overlap_type.upper() not in _SELECTION_PREDICATES:
+            raise ValueError(f"Unsupported overlap type '{overlap_type}', use one of {sorted(_SELECTION_PREDICATES)}.")
+        with self.search_cursor(select_table, ['SHAPE@']) as cursor:
+            tree = shapely.STRtree([row[0] for row in cursor if row[0] is not None])
+        with self.search_cursor(table, ['OID@', 'SHAPE@']) as cursor:
+            rows = [row for row in cursor if row[1] is not None]
+        if not rows or not len(tree):
+            return set()
+        hits = tree.query([row[1] for row in rows], predicate=_SELECTION_PREDICATES[overlap_type.upper()])
+        return {rows[position][0] for position in set(hits[0].tolist())}
+
+    def create_feature_class(self, out_path, out_name, geometry_type, spatial_reference_of=None):
+        """
+        Create a feature class (geometry_type None creates a table) and return its path.
+        spatial_reference_of is the path of an existing feature class in the same GeoPackage whose SRS id is used.
+        """
+        table = os.path.join(out_path, out_name)
+        connection, table_name = self.connect(table, 'rwc')  # The only call that creates a new GeoPackage
+        srs_id = 0
+        if spatial_reference_of:
+            source_connection, source_name = self.connect(spatial_reference_of, 'ro')
+            srs_id = GeoPackageTable(source_connection, source_name).srs_id
+        if geometry_type is None:
+            connection.execute(f'CREATE TABLE "{table_name}" (OBJECTID INTEGER PRIMARY KEY AUTOINCREMENT)')
+            connection.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier) VALUES (?, 'attributes', ?)",
+                               (table_name, table_name))
+        else:
+            connection.execute(f'CREATE TABLE "{table_name}" (OBJECTID INTEGER PRIMARY KEY AUTOINCREMENT, SHAPE {geometry_type.upper()})')
+            connection.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+                               (table_name, table_name, srs_id))
+            connection.execute("INSERT INTO gpkg_geometry_columns VALUES (?, 'SHAPE', ?, ?, 0, 0)",
+                               (table_name, geometry_type.upper(), srs_id))
+        connection.commit()
+        return table
+
+    def polygon(self, coordinates):
+        """
+        Return a polygon geometry from a list of (x, y) vertices.
+        """
+        import shapely
+        return shapely.Polygon(coordinates)
+
+    def add_warning(self, message):
+        print(f"WARNING: {message}")
+
+
+def touch_contents(connection, table_name):
+    """
+    Set the last_change of a table in gpkg_contents to now, as the GeoPackage specification asks after a write.
+    """
+    connection.execute("UPDATE gpkg_contents SET last_change = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') "
+                       "WHERE lower(table_name) = lower(?)", (table_name,))
+
+
+def initialize_geopackage(connection):
+    """
+    Create the GeoPackage metadata tables in a new, empty SQLite file.
+    """
+    connection.execute('PRAGMA application_id = 1196444487')  # 'GPKG'
+    connection.execute('PRAGMA user_version = 10300')
+    connection.execute('CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, '
+                       'organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, '
+                       'description TEXT)')
+    connection.executemany('INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)', [
+        ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', None),
+        ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', None),
+        ('WGS 84 geodetic', 4326, 'EPSG', 4326,
+         'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],PRIMEM["Greenwich",0],'
+         'UNIT["degree",0.0174532925199433]]', None),
+    ])
+    connection.execute('CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, '
+                       'identifier TEXT UNIQUE, description TEXT DEFAULT \'\', '
+                       "last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')), "
+                       'min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER)')
+    connection.execute('CREATE TABLE gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL, '
+                       'geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL, '
+                       'CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name))')
+    connection.commit()
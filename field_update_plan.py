@@ -0,0 +1,58 @@
+# This module compiles the field_updates spec of update_fc_self once into a plan of column indexes and converters,
+# so the row loop does no fields.index() lookups, no 'TEXT' name checks and no list building per row.
+
+EMPTY_VALUES = (None, '', 0)
+
+
+def compile_field_update_plan(fields, field_updates):
+    """
+    Compile field_updates into a list of (source index, target index, converter) steps, in the original order.
+    Parameters:
+    fields (list): Cursor field names.
+    field_updates (list of tuples): Each tuple contains the original field and the new fields to populate.
+    Fields with 'TEXT' in the name get the value converted with str().
+    """
+    plan = []
+    for update_sub_tuple in field_updates:
+        source_index = fields.index(update_sub_tuple[0])
+        for each_target_field in update_sub_tuple[1:]:
+            converter = str if 'TEXT' in each_target_field else None
+            plan.append((source_index, fields.index(each_target_field), converter))
+    return plan
+
+
+def target_fields_of(fields, field_updates):
+    """
+    Return (target index, target field name) for every distinct target field, in the original order.
+    """
+    targets = []
+    for update_sub_tuple in field_updates:
+        for each_target_field in update_sub_tuple[1:]:
+            target = (fields.index(each_target_field), each_target_field)
+            if target not in targets:
+                targets.append(target)
+    return targets
+
+
+def apply_field_update_plan(row, plan):
+    """
+    Run a compiled plan on one row (a list) in place.
+    """
+    for source_index, target_index, converter in plan:
+        row[target_index] = row[source_index] if converter is None else converter(row[source_index])
+
+
+def find_populated_targets(row, unchecked_targets):
+    """
+    Return the target fields that already hold data in this row and remove them from unchecked_targets,
+    so every field is reported only once.
+    """
+    for target_index, _ in unchecked_targets:
+        if row[target_index] not in EMPTY_VALUES:
+            break
+    else:
+        return []  # Common case: nothing to report, no list is built
+    populated = [target for target in unchecked_targets if row[target[0]] not in EMPTY_VALUES]
+    for target in populated:
+        unchecked_targets.remove(target)
+    return [target[1] for target in populated]
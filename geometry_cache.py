@@ -0,0 +1,156 @@
+# This module caches the decoded station polygons (StationBoundary, StationScheme) that several updaters read.
+# Entries are keyed by feature class path and key field and carry a fingerprint of the feature class: its exact
+# table stamp (row count, highest OBJECTID and newest edit, see table_stamp()), which is read without a pass over
+# the rows. A changed stamp invalidates the entry.
+# Within a run the decoded (and for shapely, prepared) geometries are kept in memory; with a cache folder the WKB
+# is also written to disk, so the next run can skip the slow SHAPE@ read when the feature class did not change.
+# With arcpy and no editor tracking there is no exact stamp (an edited polygon keeps the row count and the highest
+# OBJECTID): the WKB is then read on every call and the fingerprint is a hash of it, so only the decoding is cached
+# and the disk cache is not used.
+
+import hashlib
+import json
+import os
+import struct
+
+from data_backend import get_backend
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+CACHE_FORMAT = 1
+
+_memory_cache = {}
+
+
+def cache_key(table, key_field):
+    return os.path.normcase(os.path.normpath(str(table))), key_field
+
+
+def table_fingerprint(table, key_field):
+    """
+    Return the fingerprint of the cached geometries of a feature class: key field and exact table stamp,
+    or None when the backend has no exact stamp for it.
+    Parameters:
+    table (str): Path to the feature class.
+    key_field (str): Field used as key of every polygon, None for the OBJECTID.
+    """
+    stamp = get_backend().table_stamp(table, exact=True)
+    return None if stamp is None else f"{key_field}:{stamp}"
+
+
+def content_fingerprint(key_field, items):
+    """
+    Return a fingerprint of the keys and WKB of every feature, for feature classes without an exact table stamp.
+    """
+    digest = hashlib.blake2b(str(key_field).encode('utf-8'), digest_size=16)
+    for key, wkb in items:
+        digest.update(json.dumps(key).encode('utf-8') + b'\x1f' + (wkb or b'') + b'\x1e')
+    return f"{key_field}:content:{digest.hexdigest()}"
+
+
+def read_wkb_items(table, key_field):
+    """
+    Return [(key, WKB)] of every feature, in cursor order.
+    """
+    fields = [key_field or 'OID@', 'SHAPE@WKB']
+    with get_backend().search_cursor(table, fields) as cursor:
+        return [(key, bytes(wkb) if wkb is not None else None) for key, wkb in cursor]
+
+
+def cache_file_path(cache_dir, table, key_field):
+    name = hashlib.blake2b(repr(cache_key(table, key_field)).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f"{name}.wkbcache")
+
+
+def write_cache_file(path, table, key_field, fingerprint, items):
+    """
+    Write a JSON header line and then every (key, WKB) as length-prefixed records. The file is replaced atomically.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    header = {'format': CACHE_FORMAT, 'table': str(table), 'key_field': key_field, 'fingerprint': fingerprint, 'count': len(items)}
+    with open(temporary_path, 'wb') as cache_file:
+        cache_file.write(json.dumps(header).encode('utf-8') + b'\n')
+        for key, wkb in items:
+            encoded_key = json.dumps(key).encode('utf-8')
+            wkb = wkb or b''
+            cache_file.write(struct.pack('<II', len(encoded_key), len(wkb)) + encoded_key + wkb)
+    os.replace(temporary_path, path)
+
+
+def read_cache_file(path, fingerprint):
+    """
+    Return the [(key, WKB)] stored in a cache file, or None if it is missing, unreadable or has another fingerprint.
+    """
+    try:
+        with open(path, 'rb') as cache_file:
+            header = json.loads(cache_file.readline())
+            if header.get('format') != CACHE_FORMAT or header.get('fingerprint') != fingerprint:
+                return None
+            items = []
+            for _ in range(header['count']):
+                key_length, wkb_length = struct.unpack('<II', cache_file.read(8))
+                key = json.loads(cache_file.read(key_length))
+                wkb = cache_file.read(wkb_length)
+                items.append((key, wkb or None))
+            return items
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def decode_items(table, items):
+    """
+    Turn [(key, WKB)] into [(key, geometry)] with the backend's geometry type; shapely polygons are prepared once.
+    """
+    backend = get_backend()
+    geometries = backend.geometries_from_wkb([wkb for _, wkb in items], table)
+    if shapely is not None:
+        for geometry in geometries:
+            if isinstance(geometry, shapely.Geometry):
+                shapely.prepare(geometry)
+    return [(key, geometry) for (key, _), geometry in zip(items, geometries) if geometry is not None]
+
+
+def load_geometries(table, key_field='GLOBALID', cache_dir=None):
+    """
+    Return [(key, geometry)] of a polygon feature class, from the cache when its fingerprint did not change.
+    Parameters:
+    table (str): Path to the feature class (for example StationBoundary).
+    key_field (str): Field used as key, None for the OBJECTID.
+    cache_dir (str): Optional folder for the WKB cache files that are reused by later runs.
+    """
+    fingerprint = table_fingerprint(table, key_field)
+    items = None
+    if fingerprint is None:  # No exact stamp: the WKB itself tells whether the feature class changed
+        items = read_wkb_items(table, key_field)
+        fingerprint = content_fingerprint(key_field, items)
+    entry = _memory_cache.get(cache_key(table, key_field))
+    if entry is not None and entry[0] == fingerprint:
+        print(f"Geometries of {table}: {len(entry[1])} from the memory cache.")
+        return entry[1]
+
+    source = 'feature class'
+    if items is None:
+        path = cache_file_path(cache_dir, table, key_field) if cache_dir else None
+        items = read_cache_file(path, fingerprint) if path else None
+        if items is not None:
+            source = 'disk cache'
+        else:
+            items = read_wkb_items(table, key_field)
+            if path:
+                write_cache_file(path, table, key_field, fingerprint, items)
+
+    geometries = decode_items(table, items)
+    _memory_cache[cache_key(table, key_field)] = (fingerprint, geometries)
+    print(f"Geometries of {table}: {len(geometries)} from the {source}.")
+    return geometries
+
+
+def clear_geometry_cache():
+    """
+    Forget the geometries kept in memory (the files in the cache folder stay, they are checked by fingerprint).
+    """
+    _memory_cache.clear()
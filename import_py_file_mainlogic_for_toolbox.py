@@ -2,7 +2,26 @@
 # Based on both spatial relationships - Arcpy Module
 # Or logical relationships by matching values from other feature classes - Origin key == Foreign key.
 
-import arcpy
+import functools
+import os
+import time
+from collections import Counter
+
+from bulk_transfer import bulk_update_fc_from_dict, bulk_update_fc_self
+from change_tracker import ChangeTracker, is_full_run
+from checkpoint import clear_checkpoints, run_resumable
+from columnar_lookup import build_lookup
+from data_backend import SelectionCursor, get_backend, set_backend
+from field_update_plan import apply_field_update_plan, compile_field_update_plan, find_populated_targets, target_fields_of
+from geometry_cache import clear_geometry_cache, load_geometries
+from key_index import clear_key_indexes, get_key_index
+from missing_keys import MissingKeyReport
+from pipeline_scheduler import PipelineStep, run_pipeline
+from pipeline_spec import DEFAULT_SPEC_PATH, load_pipeline_spec, plan_pipeline
+from relate_classifier import StationClassifier
+from row_writer import ChangeWriter
+from spatial_index import EnvelopeIndex
+from status_table import StatusTableWriter
 #import re
 
 #def check_field_existence(feature_class, field_name):
@@ -18,7 +37,8 @@ import arcpy
     #else:
        # print(f"Field {field_name} already exists in {feature_class}.")
 
-def update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs, where_clause):
+def update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs, where_clause,
+                        source_keys=None, destination_oids=None, bulk=False, missing_keys_dir=None, compact_lookup=True):
     """
     Update fields in a destination feature class based on values from a source feature class.
     Parameters:
@@ -28,310 +48,543 @@ def update_fc_from_dict(source_fc, destination_fc, source_key_field, destination
     destination_key_field (str): Key field in the destination feature class.
     field_pairs (list of tuples): List of field pairs (source field, destination field).
     where_clause (str): SQL where clause for filtering records.
+    source_keys (set): Optional changed source keys (incremental runs); destination rows with these keys are processed.
+    destination_oids (set): Optional changed destination OBJECTIDs (incremental runs); these rows are processed too.
+        In incremental runs only these destination rows and the source rows of their keys are read.
+    bulk (bool): Move the values as NumPy columns (vectorized join, bulk write) instead of row by row.
+    missing_keys_dir (str): Optional folder for the full list of destination keys without source data.
+    compact_lookup (bool): Keep the source rows in a ColumnarLookup (default, a fraction of the memory of a dict);
+        False keeps them in a {key: values} dict, faster to build and to look up.
+    Returns:
+    dict: Number of rows written, of unchanged rows skipped and of rows without source data.
     """
+    if bulk:
+        return bulk_update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs,
+                                        where_clause, source_keys, destination_oids, missing_keys_dir)
     source_fields = [pair[0] for pair in field_pairs]
     destination_fields = [pair[1] for pair in field_pairs]
 
     fields_to_retrieve = [source_key_field] + source_fields
 
-    origin_fc_dict = {}
+    selected_oids = None  # Every destination row
+    selected_keys = None  # Every source row
+    if source_keys is not None or destination_oids is not None:
+        selected = {}  # OBJECTID: key of the destination rows with a changed source key or a changed row
+        for field, values in (('OID@', destination_oids), (destination_key_field, source_keys)):
+            with SelectionCursor(destination_fc, ['OID@', destination_key_field], field, values or set(), where_clause,
+                                 'search') as cursor:
+                selected.update(cursor)
+        selected_oids = set(selected)
+        selected_keys = set(selected.values())
 
-    with arcpy.da.SearchCursor(source_fc, fields_to_retrieve) as cursor:
-        for row in cursor:
-            key = row[0]
-            origin_fc_dict[key] = {source_fields[i]: row[i + 1] for i in range(len(source_fields))}
+    with SelectionCursor(source_fc, fields_to_retrieve, source_key_field, selected_keys, mode='search') as cursor:
+        origin_lookup = build_lookup(source_fields, cursor, compact_lookup)  # key -> values of the source fields
 
     fields_to_update = [destination_key_field] + destination_fields
 
-    with arcpy.da.UpdateCursor(destination_fc, fields_to_update, where_clause) as cursor:
+    with SelectionCursor(destination_fc, fields_to_update, 'OID@', selected_oids, where_clause) as cursor, \
+            MissingKeyReport(source_fc, destination_fc, missing_keys_dir) as missing:  # One summary warning, not one per row
+        writer = ChangeWriter(cursor)
         for row in cursor:
             common_guid = row[0]
-            if common_guid in origin_fc_dict:
-                related_data = origin_fc_dict[common_guid]
-                for i, each_dest_field in enumerate(destination_fields):
-                    row[i+1] = related_data[field_pairs[i][0]]
-                cursor.updateRow(row)
+            related_data = origin_lookup.get(common_guid)
+            if related_data is not None:
+                original_row = tuple(row)
+                row[1:len(related_data) + 1] = related_data
+                writer.update(row, original_row)
             else:
-                arcpy.AddWarning(f"No related data found in feature class {destination_fc} with value {common_guid} from "
-                                 f"the other feature class {source_fc}")
+                writer.skip()
+                missing.add(common_guid)
+    print(writer.summary(destination_fc))
+    return dict(writer.counts(), missing=missing.count)
 
-def update_fc_within(inner_fc, outer_fc):
+def update_fc_within(inner_fc, outer_fc, oids=None, cache_dir=None):
     """
     Update a field in the inner feature class to 'Station' if its polygon is within any polygon of the outer feature class.
     Parameters:
     inner_fc (str): Path to the inner feature class.
     outer_fc (str): Path to the outer feature class.
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    cache_dir (str): Optional folder of the geometry cache, reused while the outer feature class does not change.
+    Returns:
+    dict: Number of rows written and of unchanged rows skipped.
     """
-    outer_polygons = [row[0] for row in arcpy.da.SearchCursor(outer_fc, 'SHAPE@')]
+    outer_polygons = [polygon for _, polygon in load_geometries(outer_fc, key_field=None, cache_dir=cache_dir)]
 
-    with arcpy.da.UpdateCursor(inner_fc, ['SHAPE@', 'MIG_PARENTTYPE']) as cursor:
+    with SelectionCursor(inner_fc, ['SHAPE@', 'MIG_PARENTTYPE'], 'OID@', oids) as cursor:
+        writer = ChangeWriter(cursor)
         for row in cursor:
             inner_polygon = row[0]
             within_outer = any(inner_polygon.within(outer) for outer in outer_polygons)
             if within_outer:
+                original_row = tuple(row)
                 row[1] = 'Station'
-                cursor.updateRow(row)
+                writer.update(row, original_row)
+            else:
+                writer.skip()
+    print(writer.summary(inner_fc))
+    return writer.counts()
 
-def update_fc_self(source_fc, field_updates):
+def update_fc_self(source_fc, field_updates, oids=None, bulk=False):
     """
     Updates fields within the same feature class based on a list of field pairs.
     Parameters:
     source_fc (str): Path to the feature class.
     field_updates (list of tuples): Each tuple contains the original field and the new fields to populate.
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    bulk (bool): Move the values as NumPy columns and write the changed rows in bulk instead of row by row.
+    Returns:
+    dict: Number of rows written and of unchanged rows skipped.
     """
+    if bulk:
+        return bulk_update_fc_self(source_fc, field_updates, oids)
     fields = [item for sublist in field_updates for item in sublist]
-    fields_populated = {field: False for field in fields}
-    with arcpy.da.UpdateCursor(source_fc, fields) as cursor:
+    plan = compile_field_update_plan(fields, field_updates)  # Column indexes and converters are resolved once
+    unchecked_targets = target_fields_of(fields, field_updates)
+    row_count = 0
+    start = time.perf_counter()
+    with SelectionCursor(source_fc, fields, 'OID@', oids) as cursor:
+        writer = ChangeWriter(cursor)
         for row in cursor:
-            for update_sub_tuple in field_updates:
-                source_field = update_sub_tuple[0]
-                source_index = fields.index(source_field)
-                source_value = row[source_index]
-                for each_target_field in update_sub_tuple[1:]:
-                    target_index = fields.index(each_target_field)
-                    if row[target_index] not in [None, '', 0]:
-                        if not fields_populated[each_target_field]:
-                            print(f"The field '{each_target_field}' in the feature class '{source_fc}' "
-                                             f"already contains data. Any existing data will be overwritten.")
-                            fields_populated[each_target_field] = True
-                    if 'TEXT' in each_target_field:
-                        row[target_index] = str(source_value)
-                    else:
-                        row[target_index] = source_value
-            cursor.updateRow(row)
+            original_row = tuple(row)
+            if unchecked_targets:
+                for each_target_field in find_populated_targets(row, unchecked_targets):
+                    print(f"The field '{each_target_field}' in the feature class '{source_fc}' "
+                          f"already contains data. Any existing data will be overwritten.")
+            apply_field_update_plan(row, plan)
+            writer.update(row, original_row)
+            row_count += 1
+    elapsed = time.perf_counter() - start
+    print(writer.summary(source_fc))
+    print(f"Processed {row_count} rows in {elapsed:.2f} s ({row_count / elapsed if elapsed else 0:.0f} rows per second).")
     print("Self-update completed successfully.")
+    return writer.counts()
+
+
+def update_fc_fused(destination_fc, rules, oids=None, missing_keys_dir=None, compact_lookup=True):
+    """
+    Run several attribute rules on one destination in a single cursor pass (planned by pipeline_spec.plan_pipeline).
+    Every source lookup is loaded up front, then each row goes through the rules in their declared order,
+    so a rule sees the values written by the rules before it, like separate passes would.
+    Parameters:
+    destination_fc (str): Path to the destination feature class.
+    rules (list of dict): Rules with 'function' ('update_fc_from_dict' or 'update_fc_self') and the other arguments
+        of that function; from_dict rules may only filter rows with "<destination key> IS NOT NULL".
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    missing_keys_dir (str): Optional folder for the full lists of destination keys without source data.
+    compact_lookup (bool): Keep the source rows in ColumnarLookups (default); False keeps them in dicts.
+    Returns:
+    dict: Number of rows written, of unchanged rows skipped and of rows without source data.
+    """
+    fields = []
+    for rule in rules:
+        if rule['function'] == 'update_fc_from_dict':
+            rule_fields = [rule['destination_key_field']] + [pair[1] for pair in rule['field_pairs']]
+        else:
+            rule_fields = [item for sublist in rule['field_updates'] for item in sublist]
+        fields.extend(field for field in rule_fields if field not in fields)
+
+    compiled = []  # ('from_dict', lookup, key index, target indexes, skip empty keys, missing report) or ('self', plan, targets)
+    missing_reports = {}  # source feature class: one report shared by the rules of that source
+    try:
+        for rule in rules:
+            if rule['function'] == 'update_fc_from_dict':
+                source_fields = [pair[0] for pair in rule['field_pairs']]
+                with get_backend().search_cursor(rule['source_fc'], [rule['source_key_field']] + source_fields) as cursor:
+                    lookup = build_lookup(source_fields, cursor, compact_lookup)
+                if rule['source_fc'] not in missing_reports:
+                    missing_reports[rule['source_fc']] = MissingKeyReport(rule['source_fc'], destination_fc, missing_keys_dir)
+                compiled.append(('from_dict', lookup, fields.index(rule['destination_key_field']),
+                                 [fields.index(pair[1]) for pair in rule['field_pairs']], bool(rule.get('where_clause')),
+                                 missing_reports[rule['source_fc']]))
+            else:
+                compiled.append(('self', compile_field_update_plan(fields, rule['field_updates']),
+                                 target_fields_of(fields, rule['field_updates'])))
+
+        with SelectionCursor(destination_fc, fields, 'OID@', oids) as cursor:
+            writer = ChangeWriter(cursor)
+            for row_number, row in enumerate(cursor):
+                original_row = tuple(row)
+                for step in compiled:
+                    if step[0] == 'self':
+                        _, plan, unchecked_targets = step
+                        if unchecked_targets:
+                            for each_target_field in find_populated_targets(row, unchecked_targets):
+                                print(f"The field '{each_target_field}' in the feature class '{destination_fc}' "
+                                      f"already contains data. Any existing data will be overwritten.")
+                        apply_field_update_plan(row, plan)
+                        continue
+                    _, lookup, key_index, target_indexes, skip_empty_keys, missing = step
+                    if skip_empty_keys and row[key_index] is None:
+                        continue  # "<destination key> IS NOT NULL"
+                    related_data = lookup.get(row[key_index])
+                    if related_data is None:
+                        missing.add(row[key_index], row_number)  # A row missed by several rules is listed once
+                        continue
+                    for target_index, value in zip(target_indexes, related_data):
+                        row[target_index] = value
+                writer.update(row, original_row)
+    finally:
+        for missing in missing_reports.values():
+            missing.close()
+    print(writer.summary(destination_fc))
+    return dict(writer.counts(), missing=sum(missing.count for missing in missing_reports.values()))
 
 
 def update_voltage_from_multiple_sources(target_fc, source_layers, target_voltage_field, source_voltage_field):
     """
     Updates voltage field in a target feature class from multiple source layers based on spatial intersection.
+    Every empty target gets the voltage of the highest-priority source feature it intersects:
+    the first layer in source_layers wins, and inside one layer the first feature read wins.
     Parameters:
     target_fc (str): Path to the target feature class.
     source_layers (list): List of source feature class paths.
     target_voltage_field (str): Field in the target feature class to update.
     source_voltage_field (str): Field in the source feature classes containing voltage values.
+    Returns:
+    dict: Number of rows written and of unchanged rows skipped.
     """
-def update_voltage_from_multiple_sources(target_fc, source_layers, target_voltage_field, source_voltage_field):
-    target_layer = "TargetLayer"
-    arcpy.management.MakeFeatureLayer(target_fc, target_layer)
-    voltage_updates = {}
+    source_features = []  # (voltage, geometry) in priority order, read once from every source layer
     for source_fc in source_layers:  # Process each source layer; the first in the list has the highest priority
-        source_layer = "SourceLayer"
-        arcpy.management.MakeFeatureLayer(source_fc, source_layer)
-        arcpy.management.SelectLayerByLocation(target_layer, "INTERSECT", source_layer, selection_type="NEW_SELECTION")
-        with arcpy.da.SearchCursor(target_layer, ["OBJECTID", target_voltage_field]) as target_cursor:  # Gather voltage values from intersecting source features
-            intersecting_ids = {row[0]: row[1] for row in target_cursor}
-        with arcpy.da.SearchCursor(source_layer, [source_voltage_field]) as source_cursor:
-            for voltage, in source_cursor:
-                for target_id in intersecting_ids:  # Update target features that intersect current source feature
-                    if target_id not in voltage_updates:
-                        voltage_updates[target_id] = voltage  # Overwrite voltage values regardless of previous updates
-        arcpy.management.Delete(source_layer)  # Clean up source layer
-    if voltage_updates:
-        with arcpy.da.UpdateCursor(target_layer, ["OBJECTID", target_voltage_field]) as target_cursor:  # Update the target feature class with the collected voltage values
-            for row in target_cursor:
-                if row[0] in voltage_updates and (row[1] is None or row[1] == ''):
-                    row[1] = voltage_updates[row[0]]  # Use the voltage value stored
-                    target_cursor.updateRow(row)
-    print("Voltage update completed.")
-    arcpy.management.Delete(target_layer)
+        with get_backend().search_cursor(source_fc, ['SHAPE@', source_voltage_field]) as source_cursor:
+            for shape, voltage in source_cursor:
+                if shape is not None and voltage is not None and voltage != '':
+                    source_features.append((voltage, shape))
+    source_index = EnvelopeIndex(source_features, tolerance=xy_tolerance(target_fc))
+
+    with get_backend().update_cursor(target_fc, ['SHAPE@', target_voltage_field]) as target_cursor:
+        writer = ChangeWriter(target_cursor)
+        for row in target_cursor:
+            target_geom = row[0]
+            original_row = tuple(row)
+            if target_geom is not None and (row[1] is None or row[1] == ''):  # Only empty targets are filled
+                for voltage, source_geom in source_index.candidates(target_geom):  # Candidates come in priority order
+                    if not target_geom.disjoint(source_geom):
+                        row[1] = voltage
+                        break
+            writer.update(row, original_row)
+    print(f"Voltage update completed. Updated {writer.written} features in '{target_fc}'.")
+    return writer.counts()
 
 def update_field_based_on_whether_it_lies(target_fc, join_layers, value_field, value_map):
     """
     Update a field in the target feature class based on spatial relationships with multiple join layers.
+    All join layers are indexed together and the target is read and written in one pass;
+    a feature gets the value of the first join layer (in dict order) it intersects.
     Parameters:
     target_fc (str): Path to the target feature class.
     join_layers (dict): Dictionary of join layers and the values to assign when a spatial relationship is met.
     value_field (str): Field in the target feature class to update.
-    value_map (dict): Mapping of join layer keys to values to assign.
+    value_map (str): ID field of the target feature class. Kept for compatibility, the single pass does not need to track ids.
+    Returns:
+    dict: Number of rows written and of unchanged rows skipped.
     """
-    updated_features = set()
+    join_features = []  # ((join layer, value), geometry) in dict order
     for join_fc, value in join_layers.items():
-        temp_el_junction_layer = "Temp_ElJunctionLayer"
-        temp_join_layer = "Temp_JoinLayer"
-        arcpy.management.MakeFeatureLayer(target_fc, temp_el_junction_layer)
-        arcpy.management.MakeFeatureLayer(join_fc, temp_join_layer)
-        arcpy.management.SelectLayerByLocation(temp_el_junction_layer, "INTERSECT", temp_join_layer)
-
-        with arcpy.da.UpdateCursor(temp_el_junction_layer, [value_field, value_map]) as cursor:
-            local_count = 0
-            for row in cursor:
-                if row[1] not in updated_features:
-                    row[0] = value
-                    cursor.updateRow(row)
-                    updated_features.add(row[1])
-                    local_count += 1
-            print(f"Updated {local_count} features in '{target_fc}' with the value '{value}' for '{value_field}'.")
-
-        arcpy.management.Delete(temp_el_junction_layer)
-        arcpy.management.Delete(temp_join_layer)
-
-    total_updated_features = len(updated_features)
+        with get_backend().search_cursor(join_fc, ['SHAPE@']) as join_cursor:
+            join_features.extend(((join_fc, value), shape) for shape, in join_cursor if shape is not None)
+    join_index = EnvelopeIndex(join_features, tolerance=xy_tolerance(target_fc))
+
+    layer_counts = {join_layer: 0 for join_layer in join_layers.items()}
+    with get_backend().update_cursor(target_fc, ['SHAPE@', value_field]) as cursor:
+        writer = ChangeWriter(cursor)
+        for row in cursor:
+            target_geom = row[0]
+            original_row = tuple(row)
+            if target_geom is not None:
+                for join_layer, join_geom in join_index.candidates(target_geom):
+                    if not target_geom.disjoint(join_geom):
+                        row[1] = join_layer[1]
+                        layer_counts[join_layer] += 1
+                        break
+            writer.update(row, original_row)
+
+    for (join_fc, value), local_count in layer_counts.items():
+        print(f"Updated {local_count} features in '{target_fc}' with the value '{value}' for '{value_field}'.")
+    total_updated_features = sum(layer_counts.values())
     print(f"Total updated features in all categories: {total_updated_features}")
+    print(writer.summary(target_fc))
+    return writer.counts()
+
+
+def xy_tolerance(feature_class):
+    """
+    Return the XY tolerance of a feature class, or 0 if it is unknown.
+    Parameters:
+    feature_class (str): Path to the feature class.
+    """
+    return get_backend().xy_tolerance(feature_class)
+
 
-def update_line_fc_within_station_boundary(line_fc, station_fc, field_name='LINE_STATUS', field_type='TEXT', field_length=15):
+def update_line_fc_within_station_boundary(line_fc, station_fc, field_name='LINE_STATUS', field_type='TEXT', field_length=15,
+                                            oids=None, cache_dir=None, status_table=None):
     """
     Update line feature class based on whether lines are within or partially within the boundaries of station polygons.
+    Only MIG_STATIONGUID is written. The status is written to field_name only if that field already exists;
+    the schema is never changed, so no AddField / DeleteField (and no exclusive schema lock) happens in a run.
     Parameters:
     line_fc (str): Path to the line feature class.
     station_fc (str): Path to the station feature class.
-    field_name (str): The name of the field to add or check, default is 'LINE_STATUS'.
-    field_type (str): The data type of the field, default is 'TEXT'.
-    field_length (int): The length of the field if it is a 'TEXT' type, default is 15.
+    field_name (str): The name of an existing status field, default is 'LINE_STATUS'.
+    field_type (str): Kept for compatibility, the status field is not added any more.
+    field_length (int): Kept for compatibility, the status field is not added any more.
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    cache_dir (str): Optional folder of the geometry cache, reused while the station feature class does not change.
+    status_table (str): Optional sidecar table for the statuses (for example r"memory\LineStatus"), see status_table.py.
+    Returns:
+    dict: Number of rows written, of unchanged rows skipped, of predicate calls and the number of features per status.
     """
-    fields = [field.name for field in arcpy.ListFields(line_fc)]
-    field_added = False
-    if field_name not in fields:
-        arcpy.AddField_management(line_fc, field_name, field_type, field_length=field_length)
-        print(f"Field '{field_name}' was added in {line_fc}.")
-        field_added = True
-    else:
-        print(f"Field '{field_name}' already exists in {line_fc}.")
-    station_dict = {row[0]: row[1] for row in arcpy.da.SearchCursor(station_fc, ['GLOBALID', 'SHAPE@'])}
-    with arcpy.da.UpdateCursor(line_fc, ['SHAPE@', 'MIG_STATIONGUID', 'LINE_STATUS']) as cursor:
-        for row in cursor:
-            line_geom = row[0]
-            status_updated = False
-            for station_global_id, station_polygon in station_dict.items():
-                if line_geom.within(station_polygon):
-                    row[1] = station_global_id
-                    row[2] = 'Inside'
-                    cursor.updateRow(row)
-                    status_updated = True
-                    break
-                elif not line_geom.disjoint(station_polygon):
-                    row[1] = station_global_id
-                    row[2] = 'Partly Inside'
-                    cursor.updateRow(row)
-                    status_updated = True
-                    break
-            if not status_updated:
-                row[1] = None
-                row[2] = 'Outside'
-                cursor.updateRow(row)
-
-    if field_added:
-        arcpy.DeleteField_management(line_fc, field_name)
-        print(f"Field '{field_name}' was deleted from {line_fc}.")
-
-
-def update_point_fc_within_station_boundary(point_fc, station_fc, field_name='POINT_STATUS', field_type='TEXT', field_length=15):
+    return classify_within_station_boundary('line', line_fc, station_fc, field_name, oids, cache_dir, status_table)
+
+
+def update_point_fc_within_station_boundary(point_fc, station_fc, field_name='POINT_STATUS', field_type='TEXT', field_length=15,
+                                             oids=None, cache_dir=None, status_table=None):
     """
     Updates point feature class based on spatial relationships with station boundaries.
     Points can be inside, on the boundary, or outside station polygons.
+    Only MIG_STATIONGUID is written. The status is written to field_name only if that field already exists;
+    the schema is never changed, so no AddField / DeleteField (and no exclusive schema lock) happens in a run.
     Parameters:
     point_fc (str): Path to the point feature class.
     station_fc (str): Path to the station feature class.
-    field_name (str): The name of the field to add or check, default is 'POINT_STATUS'.
-    field_type (str): The data type of the field, default is 'TEXT'.
-    field_length (int): The length of the field if it is a 'TEXT' type, default is 15.
+    field_name (str): The name of an existing status field, default is 'POINT_STATUS'.
+    field_type (str): Kept for compatibility, the status field is not added any more.
+    field_length (int): Kept for compatibility, the status field is not added any more.
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    cache_dir (str): Optional folder of the geometry cache, reused while the station feature class does not change.
+    status_table (str): Optional sidecar table for the statuses (for example r"memory\PointStatus"), see status_table.py.
+    Returns:
+    dict: Number of rows written, of unchanged rows skipped, of predicate calls and the number of features per status.
     """
-    fields = [field.name for field in arcpy.ListFields(point_fc)]
-    field_added = False
-    if field_name not in fields:
-        arcpy.AddField_management(point_fc, field_name, field_type, field_length=field_length)
-        print(f"Field '{field_name}' was added in {point_fc}.")
-        field_added = True
-    else:
-        print(f"Field '{field_name}' already exists in {point_fc}.")
-    station_dict = {row[0]: row[1] for row in arcpy.da.SearchCursor(station_fc, ['GLOBALID', 'SHAPE@'])}
-    with arcpy.da.UpdateCursor(point_fc, ['SHAPE@', 'MIG_STATIONGUID', 'POINT_STATUS']) as cursor:
+    return classify_within_station_boundary('point', point_fc, station_fc, field_name, oids, cache_dir, status_table)
+
+
+def classify_within_station_boundary(geometry_kind, feature_fc, station_fc, field_name, oids, cache_dir, status_table):
+    """
+    Shared body of the line and point station-boundary updaters.
+    The statuses are counted in memory and, with status_table, written to the sidecar table keyed by OBJECTID.
+    """
+    has_status_field = field_name in [field.name for field in get_backend().list_fields(feature_fc)]
+    if has_status_field:
+        print(f"Field '{field_name}' exists in {feature_fc}, the status is written to it.")
+    station_dict = dict(load_geometries(station_fc, 'GLOBALID', cache_dir))  # Decoded once per change of the stations
+    classifier = StationClassifier(station_dict.items(), geometry_kind, tolerance=xy_tolerance(station_fc))  # Built once, only overlapping stations are tested
+    fields = ['SHAPE@', 'MIG_STATIONGUID'] + ([field_name] if has_status_field else []) + ['OID@']
+    status_counts = Counter()
+    statuses = StatusTableWriter(status_table, oids) if status_table else None
+    with SelectionCursor(feature_fc, fields, 'OID@', oids) as cursor:
+        writer = ChangeWriter(cursor)
         for row in cursor:
-            point_geom = row[0]
-            status_updated = False
-            for station_global_id, station_polygon in station_dict.items():
-                if point_geom.within(station_polygon):
-                    row[1] = station_global_id
-                    row[2] = 'Inside'
-                    cursor.updateRow(row)
-                    status_updated = True
-                    break
-                elif point_geom.touches(station_polygon):
-                    row[1] = station_global_id
-                    row[2] = 'On Boundary'
-                    cursor.updateRow(row)
-                    status_updated = True
-                    break
-            if not status_updated:
-                row[1] = None
-                row[2] = 'Outside'
-                cursor.updateRow(row)
-
-    if field_added:
-        arcpy.DeleteField_management(point_fc, field_name)
-        print(f"Field '{field_name}' was deleted from {point_fc}.")
+            original_row = tuple(row)
+            station_global_id, status = classifier.classify(row[0])  # (None, 'Outside') when no station matches
+            row[1] = station_global_id
+            if has_status_field:
+                row[2] = status
+            writer.update(row, original_row)
+            status_counts[status] += 1
+            if statuses:
+                statuses.add(row[-1], station_global_id, status)
+    if statuses:
+        statuses.close()
+    print(f"Classified {classifier.features_classified} features in {feature_fc} with {classifier.predicate_calls} predicate calls: "
+          f"{', '.join(f'{count} {status}' for status, count in sorted(status_counts.items()))}.")
+    print(writer.summary(feature_fc))
+    return dict(writer.counts(), predicate_calls=classifier.predicate_calls, status_counts=dict(status_counts))
 
 
 def check_relationship(source_path, global_id):
     """
     Check if a given GLOBALID exists in a specified field of a source feature class.
+    The field values are loaded once into a shared key index, not rescanned for every call.
     Parameters:
     source_path (str): Path to the source feature class.
     global_id (str): GLOBALID to check for existence.
     """
-    with arcpy.da.SearchCursor(source_path, ["CIRCUITBREAKER_GUID"]) as cursor:
-        for row in cursor:
-            if row[0] == global_id:
-                return True
-    return False
+    return global_id in get_key_index(source_path, "CIRCUITBREAKER_GUID")
 
-def update_mig_issource(circuit_breaker_fc, circuit_source_fc):
+def update_mig_issource(circuit_breaker_fc, circuit_source_fc, oids=None):
     """
     Updates the MIG_ISSOURCE field in the circuit breaker feature class based on voltage and relationships to a source feature class.
     Parameters:
     circuit_breaker_fc (str): Path to the circuit breaker feature class.
     circuit_source_fc (str): Path to the circuit source feature class.
+    oids (set): Optional OBJECTIDs to process (incremental runs); None processes every row.
+    Returns:
+    dict: Number of rows written and of unchanged rows skipped.
     """
+    source_keys = get_key_index(circuit_source_fc, "CIRCUITBREAKER_GUID")  # One scan of the source table per run
     fields = ["OPERATINGVOLTAGE", "SUBSOURCE", "MIG_ISSOURCE", "GLOBALID"]
-    with arcpy.da.UpdateCursor(circuit_breaker_fc, fields) as cursor:
+    with SelectionCursor(circuit_breaker_fc, fields, 'OID@', oids) as cursor:
+        writer = ChangeWriter(cursor)
         for row in cursor:
+            original_row = tuple(row)
             #voltage_str = row[0]
             #voltage_match = re.match(r'\d+', voltage_str)
             #voltage = int(voltage_match.group()) if voltage_match else 0
             subsource = row[1]
             global_id = row[3]
-            relationship_exists = check_relationship(circuit_source_fc, global_id)
+            relationship_exists = global_id in source_keys
             if subsource == 1:  #voltage <= 1 and 
                 row[2] = 2
             elif relationship_exists:  #1 < voltage <= 60 and 
                 row[2] = 1
             else:    # high voltage 
                 pass
-            cursor.updateRow(row)
+            writer.update(row, original_row)  # Rows that were not changed are not written
+    print(source_keys.report())
+    print(writer.summary(circuit_breaker_fc))
+    return writer.counts()
 
 #print("Update completed successfully.")
 
 
+def update_fc_from_dict_incremental(state_dir, step_name, edit_field, source_fc, destination_fc, source_key_field,
+                                    destination_key_field, field_pairs, where_clause, bulk=False, missing_keys_dir=None,
+                                    compact_lookup=True):
+    """
+    Incremental update_fc_from_dict: only destination rows whose source row or own row changed since the last run are processed.
+    The first run (no watermark yet) processes everything.
+    Parameters:
+    state_dir (str): Folder with the watermark files.
+    step_name (str): Name of the pipeline step, one watermark file per step.
+    edit_field (str): Editor-tracking date field, or None to compare content hashes.
+    The other parameters are the same as for update_fc_from_dict.
+    """
+    tracker = ChangeTracker(state_dir, step_name, edit_field)
+    source_changes = tracker.changed_rows(source_fc, [source_key_field] + [pair[0] for pair in field_pairs])
+    destination_changes = tracker.changed_rows(destination_fc, [destination_key_field] + [pair[1] for pair in field_pairs])
+    if is_full_run(source_changes, destination_changes):
+        counts = update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs, where_clause,
+                                     bulk=bulk, missing_keys_dir=missing_keys_dir, compact_lookup=compact_lookup)
+    elif not source_changes and not destination_changes:
+        print(f"No changes in {source_fc} or {destination_fc} since the last run, step '{step_name}' skipped.")
+        counts = {'written': 0, 'skipped': 0, 'missing': 0}
+    else:
+        changed_source_keys = {values[0] for values in source_changes.values()}
+        counts = update_fc_from_dict(source_fc, destination_fc, source_key_field, destination_key_field, field_pairs, where_clause,
+                                     source_keys=changed_source_keys, destination_oids=set(destination_changes), bulk=bulk,
+                                     missing_keys_dir=missing_keys_dir, compact_lookup=compact_lookup)
+    tracker.commit()
+    return counts
 
-def main():
-    # Call your functions here
-    switching_facility_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\SwitchingFacility"
-    bay_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\Bay"
-    field_pairs_bay = [("STATION_GUID", "MIG_STATIONGUID"), ("OPERATINGVOLTAGE", "MIG_VOLTAGE")]
-    where_clause_bay1 = "SWITCHINGFACILITY_GUID IS NOT NULL"
-    update_fc_from_dict(switching_facility_path, bay_path, "GLOBALID", "SWITCHINGFACILITY_GUID", field_pairs_bay, where_clause_bay1)
 
-    bay_scheme_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\BayScheme"
-    field_pairs_bayscheme = [("MIG_STATIONGUID", "MIG_STATIONGUID")]
-    where_clause_bay_scheme = "BAY_GUID IS NOT NULL"
-    update_fc_from_dict(bay_path, bay_scheme_path, "GLOBALID", "BAY_GUID", field_pairs_bayscheme, where_clause_bay_scheme)
+def update_changed_rows_incremental(state_dir, step_name, edit_field, function, args, target_fc, target_fields, context_fields):
+    """
+    Incremental run of an updater that accepts oids: only changed rows of the target are processed,
+    and every row is processed again when a feature class the step reads (stations, sources) changed.
+    Parameters:
+    state_dir (str): Folder with the watermark files.
+    step_name (str): Name of the pipeline step, one watermark file per step.
+    edit_field (str): Editor-tracking date field, or None to compare content hashes.
+    function (callable): Updater with an oids parameter.
+    args (tuple): Arguments of the updater.
+    target_fc (str): Path to the feature class the updater writes.
+    target_fields (list): Fields of the target the result depends on ('SHAPE@WKB' for geometry).
+    context_fields (dict): {feature class path: fields} of the feature classes the updater reads.
+    """
+    tracker = ChangeTracker(state_dir, step_name, edit_field)
+    target_changes = tracker.changed_rows(target_fc, target_fields)
+    context_changes = [tracker.changed_rows(context_fc, fields) for context_fc, fields in context_fields.items()]
+    if is_full_run(target_changes, *context_changes) or any(context_changes):
+        counts = function(*args)
+    elif not target_changes:
+        print(f"No changes in {target_fc} since the last run, step '{step_name}' skipped.")
+        counts = {'written': 0, 'skipped': 0}
+    else:
+        counts = function(*args, oids=set(target_changes))
+    tracker.commit()
 
-    station_scheme_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\StationScheme"
-    update_fc_within(bay_scheme_path, station_scheme_path)
+    return counts
 
-    circuit_source_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\CircuitSource"
-    field_pairs_circuit_source = [('OBJECTID', 'MIG_OID', 'MIG_OID_TEXT'), ('GLOBALID', 'MIG_GLOBALID')]
-    update_fc_self(circuit_source_path, field_pairs_circuit_source)
 
-    circuit_source_id_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\CircuitSourceID"
-    field_pairs_circuit_source_id = [('OBJECTID', 'MIG_OID', 'MIG_OID_TEXT'), ('GLOBALID', 'MIG_GLOBALID')]
-    update_fc_self(circuit_source_id_path, field_pairs_circuit_source_id)
 
-    electric_net_junctions_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\Electric_Net_Junctions"
-    station_boundary_fc_path = r"D:\UN\set_DB\databases\GISRO_PILOT.gdb\StationBoundary"
-    update_point_fc_within_station_boundary(electric_net_junctions_path, station_boundary_fc_path)
+def main(max_workers=None, incremental=False, state_dir=None, edit_field=None, report_path=None, profile_dir=None,
+         workspace=r"D:\UN\set_DB\databases\GISRO_PILOT.gdb", backend=None, bulk=False, cache_dir=None, missing_keys_dir=None,
+         spec_path=DEFAULT_SPEC_PATH, fuse=True, resume=False, checkpoint_dir=None, compact_lookup=True):
+    """
+    Run the update pipeline. Independent steps run at the same time in worker processes.
+    Parameters:
+    max_workers (int): Number of worker processes, None for one per CPU, 1 to run every step here one after another.
+    incremental (bool): Only process rows changed since the last run (and the rows that depend on them).
+    state_dir (str): Folder for the incremental watermarks, default is a folder next to the geodatabase.
+    edit_field (str): Editor-tracking date field for incremental runs, None to compare content hashes.
+    report_path (str): JSON run report (plus CSV next to it), default is a file next to the geodatabase.
+    profile_dir (str): Optional folder for one cProfile dump per step.
+    workspace (str): Geodatabase (or GeoPackage) with the feature classes.
+    backend (str): Data backend, 'arcpy' or 'geopackage'; None keeps the current one (DATA_BACKEND environment variable).
+    bulk (bool): Run the attribute-only steps (update_fc_from_dict, update_fc_self) with NumPy columns.
+    cache_dir (str): Folder of the station geometry cache, default is a folder next to the geodatabase.
+    missing_keys_dir (str): Folder for the lists of keys without source data, default is a folder next to the geodatabase.
+    spec_path (str): Pipeline spec (JSON, or YAML with PyYAML) with the steps, default is pipeline_spec.json next to this file.
+    fuse (bool): Run all attribute rules of one destination in a single pass, see pipeline_spec.py.
+    resume (bool): Continue an interrupted run: skip the steps finished with the same inputs and the committed chunks
+        of the interrupted step. False starts from the beginning. Checkpoints are written in both cases, see checkpoint.py.
+    checkpoint_dir (str): Folder of the step checkpoints, default is a folder next to the geodatabase.
+    compact_lookup (bool): Keep the source rows of the attribute joins in ColumnarLookups, a fraction of the memory
+        of dicts; False keeps them in {key: values} dicts, faster but larger (see benchmark_lookup_memory.py).
+    """
+    # Call your functions here
+    if backend is not None:
+        set_backend(backend)
+    clear_key_indexes()  # Key indexes are loaded once per run, never reused from an earlier run
+    clear_geometry_cache()  # Cached station geometries are checked against their feature class again
+    if state_dir is None:
+        state_dir = os.path.splitext(workspace)[0] + "_pipeline_state"
+    if report_path is None:
+        report_path = os.path.splitext(workspace)[0] + "_run_report.json"
+    if cache_dir is None:
+        cache_dir = os.path.splitext(workspace)[0] + "_geometry_cache"
+    if missing_keys_dir is None:
+        missing_keys_dir = os.path.splitext(workspace)[0] + "_missing_keys"
+    if checkpoint_dir is None:
+        checkpoint_dir = os.path.splitext(workspace)[0] + "_checkpoints"
+    if not resume:
+        clear_checkpoints(checkpoint_dir)
+
+    def make_step(planned):
+        step = make_pipeline_step(planned)
+        definition = repr((planned.function, planned.args, incremental, bulk))
+        return PipelineStep(planned.name, run_resumable,
+                            (checkpoint_dir, planned.name, definition, planned.context_fields, planned.writes[0],
+                             step.function, step.args, step.kwargs),
+                            reads=planned.reads, writes=planned.writes)
+
+    def make_pipeline_step(planned):
+        function = SPEC_FUNCTIONS[planned.function]
+        if function in (update_fc_from_dict, update_fc_self):
+            kwargs = {'bulk': True} if bulk else {}
+            if function is update_fc_from_dict:
+                kwargs['missing_keys_dir'] = missing_keys_dir
+                if not compact_lookup:
+                    kwargs['compact_lookup'] = False
+        elif function is update_fc_fused:
+            kwargs = {'missing_keys_dir': missing_keys_dir}
+            if not compact_lookup:
+                kwargs['compact_lookup'] = False
+        else:
+            kwargs = {'cache_dir': cache_dir}  # The spatial updaters share the station geometry cache
+        if not incremental:
+            return PipelineStep(planned.name, function, planned.args, kwargs, reads=planned.reads, writes=planned.writes)
+        if function is update_fc_from_dict:
+            return PipelineStep(planned.name, update_fc_from_dict_incremental, (state_dir, planned.name, edit_field) + planned.args,
+                                kwargs, reads=planned.reads, writes=planned.writes)
+        if kwargs:
+            function = functools.partial(function, **kwargs)  # Picklable for the worker processes
+        return PipelineStep(planned.name, update_changed_rows_incremental,
+                            (state_dir, planned.name, edit_field, function, planned.args, planned.writes[0],
+                             planned.target_fields, planned.context_fields),
+                            reads=planned.reads, writes=planned.writes)
+
+    # In the default spec Bay -> BayScheme -> StationScheme is a chain, the other steps are independent of it and of each other
+    steps = [make_step(planned) for planned in plan_pipeline(load_pipeline_spec(spec_path), workspace, fuse)]
+    results = run_pipeline(steps, max_workers=max_workers, report_path=report_path, profile_dir=profile_dir)
 
     print("Update completed successfully.")
+    return results
+
+SPEC_FUNCTIONS = {function.__name__: function for function in (
+    update_fc_from_dict, update_fc_self, update_fc_within, update_point_fc_within_station_boundary,
+    update_line_fc_within_station_boundary, update_fc_fused)}
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,67 @@
+# This module loads the values of one field of a table once into a set,
+# so checks like "does this GLOBALID exist in CircuitSource.CIRCUITBREAKER_GUID" do not open a new cursor per lookup.
+# Indexes are shared per (table, field) for the whole run.
+
+import time
+
+from data_backend import get_backend
+
+_key_indexes = {}
+
+
+class KeyIndex:
+    """
+    Set of the non-empty values of one field, with build time and lookup counters.
+    """
+
+    def __init__(self, table, field):
+        """
+        Parameters:
+        table (str): Path to the table or feature class.
+        field (str): Name of the key field to load.
+        """
+        self.table = table
+        self.field = field
+        start = time.perf_counter()
+        with get_backend().search_cursor(table, [field]) as cursor:
+            self.keys = frozenset(row[0] for row in cursor if row[0] is not None)
+        self.build_seconds = time.perf_counter() - start
+        self.lookups = 0
+        self.hits = 0
+
+    def __contains__(self, key):
+        self.lookups += 1
+        if key in self.keys:
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def report(self):
+        """
+        Return a one-line summary: number of keys, build time and lookups served.
+        """
+        return (f"Key index {self.table}.{self.field}: {len(self.keys)} keys built in {self.build_seconds:.2f} s, "
+                f"served {self.lookups} lookups ({self.hits} found).")
+
+
+def get_key_index(table, field):
+    """
+    Return the shared KeyIndex for a table field, building it on first use.
+    Parameters:
+    table (str): Path to the table or feature class.
+    field (str): Name of the key field.
+    """
+    cache_key = (table, field)
+    if cache_key not in _key_indexes:
+        _key_indexes[cache_key] = KeyIndex(table, field)
+    return _key_indexes[cache_key]
+
+
+def clear_key_indexes():
+    """
+    Forget all loaded indexes, for example after the tables were edited.
+    """
+    _key_indexes.clear()
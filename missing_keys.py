@@ -0,0 +1,88 @@
+# This module collects the destination keys that update_fc_from_dict cannot find in the source feature class.
+# One warning per unmatched row (arcpy.AddWarning) floods the geoprocessing messages on large data and freezes ArcGIS Pro,
+# so the misses are counted per destination / source pair, a few keys are kept as a sample, the full list can be streamed
+# to a text file (one key per line, never held in memory), and one summary warning is emitted at the end.
+
+import os
+
+from data_backend import get_backend
+
+SAMPLE_SIZE = 10
+
+
+def missing_keys_file(missing_keys_dir, source_fc, destination_fc):
+    """
+    Return the path of the file with the full list of missing keys of a destination / source pair.
+    """
+    name = f"{os.path.basename(str(destination_fc))}_from_{os.path.basename(str(source_fc))}_missing_keys.txt"
+    return os.path.join(missing_keys_dir, name)
+
+
+class MissingKeyReport:
+    """
+    Counts the destination rows without related source data and emits one summary warning on close().
+    Parameters:
+    source_fc (str): Path to the source feature class.
+    destination_fc (str): Path to the destination feature class.
+    missing_keys_dir (str): Optional folder for the full list of missing keys, None keeps only the count and the sample.
+    sample_size (int): Number of keys shown in the summary warning.
+    """
+
+    def __init__(self, source_fc, destination_fc, missing_keys_dir=None, sample_size=SAMPLE_SIZE):
+        self.source_fc = source_fc
+        self.destination_fc = destination_fc
+        self.sample_size = sample_size
+        self.count = 0
+        self.sample = []
+        self.path = None
+        self.file = None
+        self.closed = False
+        self.last_row = None
+        if missing_keys_dir:
+            os.makedirs(missing_keys_dir, exist_ok=True)
+            self.path = missing_keys_file(missing_keys_dir, source_fc, destination_fc)
+            self.file = open(self.path, 'w', encoding='utf-8')  # Replaces the list of the last run
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(self, key, row=None):
+        """
+        Count one destination row without source data.
+        Parameters:
+        key: Destination key of the row.
+        row: Optional number of the row in the pass; several rules of one fused pass share a report and
+            a row they all miss is counted and listed once.
+        """
+        if row is not None:
+            if row == self.last_row:
+                return
+            self.last_row = row
+        self.count += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(key)
+        if self.file:
+            self.file.write(f"{key}\n")
+
+    def add_many(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def close(self):
+        """
+        Close the file and emit the summary warning (nothing when every key was found). Calling it again does nothing.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.file:
+            self.file.close()
+        if self.count:
+            more = f" and {self.count - len(self.sample)} more" if self.count > len(self.sample) else ''
+            full_list = f" Full list: {self.path}" if self.path else ''
+            get_backend().add_warning(f"No related data found in feature class {self.destination_fc} for {self.count} rows "
+                                      f"from the other feature class {self.source_fc}, values "
+                                      f"{', '.join(str(key) for key in self.sample)}{more}.{full_list}")
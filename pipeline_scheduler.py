@@ -0,0 +1,160 @@
+# This module runs the update pipeline as a DAG of steps.
+# Every step declares the feature classes it reads and writes. A step depends on every earlier step it conflicts with
+# (one writes what the other reads or writes), so two steps never hold the same feature class for writing at the same time.
+# Steps without conflicts run at the same time in a process pool; the wall-clock time drops to the critical path.
+
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from run_report import measure_step, write_run_report
+
+
+class PipelineStep:
+    """
+    One call of an update function with the feature classes it reads and writes.
+    """
+
+    def __init__(self, name, function, args=(), kwargs=None, reads=(), writes=()):
+        """
+        Parameters:
+        name (str): Unique step name used in messages and results.
+        function (callable): Module-level function (it is sent to a worker process).
+        args (tuple): Positional arguments for the function.
+        kwargs (dict): Keyword arguments for the function.
+        reads (iterable): Paths of the feature classes the step only reads.
+        writes (iterable): Paths of the feature classes the step writes.
+        """
+        self.name = name
+        self.function = function
+        self.args = tuple(args)
+        self.kwargs = dict(kwargs or {})
+        self.writes = {normalize_path(path) for path in writes}
+        self.reads = {normalize_path(path) for path in reads} - self.writes
+
+    def conflicts_with(self, other):
+        """
+        Check if the two steps cannot run at the same time.
+        """
+        return bool(self.writes & (other.writes | other.reads) or self.reads & other.writes)
+
+    def run(self):
+        return self.function(*self.args, **self.kwargs)
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def build_dependencies(steps):
+    """
+    Return {step name: set of step names it waits for}. A step waits for every earlier conflicting step,
+    so the declared order is kept wherever it matters.
+    """
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("Pipeline step names must be unique.")
+    dependencies = {}
+    for position, step in enumerate(steps):
+        dependencies[step.name] = {earlier.name for earlier in steps[:position] if step.conflicts_with(earlier)}
+    return dependencies
+
+
+def critical_path(steps, durations):
+    """
+    Return (length, step names) of the longest dependency chain for the given step durations in seconds.
+    """
+    dependencies = build_dependencies(steps)
+    finish = {}
+    chain = {}
+    for step in steps:
+        previous = max(dependencies[step.name], key=lambda name: finish[name], default=None)
+        start = finish[previous] if previous else 0.0
+        finish[step.name] = start + durations.get(step.name, 0.0)
+        chain[step.name] = (chain[previous] if previous else []) + [step.name]
+    if not finish:
+        return 0.0, []
+    last = max(finish, key=finish.get)
+    return finish[last], chain[last]
+
+
+def run_step(step, profile_dir=None):
+    """
+    Run one step and return (result, metrics). Used in the worker processes.
+    """
+    return measure_step(step.name, step.run, profile_dir)
+
+
+def failed_step_metrics(step, error):
+    """
+    Return the metrics of a failed step: those measure_step attached to the exception, or only the error.
+    """
+    return getattr(error, 'step_metrics', None) or {'step': step.name, 'error': repr(error)}
+
+
+def configure_worker_executable():
+    # Inside ArcGIS Pro sys.executable is ArcGISPro.exe, worker processes must start the Python of the Pro environment
+    executable_name = os.path.basename(sys.executable).lower()
+    if os.name == 'nt' and not executable_name.startswith('python'):
+        import multiprocessing
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
+
+
+def run_pipeline(steps, max_workers=None, report_path=None, profile_dir=None):
+    """
+    Run the steps respecting their dependencies and return {step name: (result, metrics)}.
+    Parameters:
+    steps (list of PipelineStep): Steps in the order they were declared.
+    max_workers (int): Number of worker processes. 1 runs every step in this process, in declared order.
+    report_path (str): Optional path of the JSON run report (a CSV with the same name is written next to it).
+    profile_dir (str): Optional folder for one cProfile dump per step.
+    """
+    dependencies = build_dependencies(steps)
+    results = {}
+    start = time.perf_counter()
+
+    try:
+        _run_steps(steps, dependencies, results, max_workers, profile_dir)
+    finally:
+        if report_path:
+            write_run_report([results[step.name][1] for step in steps if step.name in results], report_path)
+
+    elapsed = time.perf_counter() - start
+    durations = {name: metrics['wall_seconds'] for name, (_, metrics) in results.items()}
+    path_length, path = critical_path(steps, durations)
+    print(f"Pipeline finished in {elapsed:.1f} s, sum of steps {sum(durations.values()):.1f} s, "
+          f"critical path {path_length:.1f} s ({' -> '.join(path)}).")
+    return results
+
+
+def _run_steps(steps, dependencies, results, max_workers, profile_dir):
+    if max_workers == 1:
+        for step in steps:
+            print(f"Running step '{step.name}'.")
+            try:
+                results[step.name] = run_step(step, profile_dir)
+            except Exception as error:
+                results[step.name] = (None, failed_step_metrics(step, error))  # The run report includes the failed step
+                raise
+    else:
+        configure_worker_executable()
+        pending = list(steps)
+        running = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                for step in [step for step in pending if dependencies[step.name] <= results.keys()]:
+                    print(f"Running step '{step.name}'.")
+                    running[executor.submit(run_step, step, profile_dir)] = step
+                    pending.remove(step)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        results[step.name] = future.result()
+                    except Exception as error:
+                        results[step.name] = (None, failed_step_metrics(step, error))
+                        for other in running:
+                            other.cancel()
+                        print(f"Step '{step.name}' failed, no further steps are started.")
+                        raise
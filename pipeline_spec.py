@@ -0,0 +1,204 @@
+# This module loads the update pipeline from a declarative spec (JSON, or YAML when PyYAML is installed) and plans its passes.
+# Every step of the spec names an update function and its arguments by parameter name; arguments ending in '_fc' are
+# feature class names relative to the workspace. The planner fuses all attribute rules (update_fc_from_dict, update_fc_self)
+# that write the same destination into one pass of update_fc_fused, so every destination is scanned once instead of once
+# per rule, and orders the passes so every pass still sees what the rules declared before it wrote.
+#
+# Example:
+#     {"steps": [
+#         {"name": "Bay", "function": "update_fc_from_dict", "source_fc": "SwitchingFacility", "destination_fc": "Bay",
+#          "source_key_field": "GLOBALID", "destination_key_field": "SWITCHINGFACILITY_GUID",
+#          "field_pairs": [["STATION_GUID", "MIG_STATIONGUID"]], "where_clause": "SWITCHINGFACILITY_GUID IS NOT NULL"},
+#         {"name": "CircuitSource", "function": "update_fc_self", "source_fc": "CircuitSource",
+#          "field_updates": [["OBJECTID", "MIG_OID", "MIG_OID_TEXT"]]}]}
+
+import json
+import os
+import re
+from collections import namedtuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline_spec.json')
+
+FUSED_FUNCTION = 'update_fc_fused'
+
+# function name: (parameters in call order, parameters read, parameter written)
+RULE_TYPES = {
+    'update_fc_from_dict': (['source_fc', 'destination_fc', 'source_key_field', 'destination_key_field', 'field_pairs',
+                             'where_clause'], ['source_fc'], 'destination_fc'),
+    'update_fc_self': (['source_fc', 'field_updates'], [], 'source_fc'),
+    'update_fc_within': (['inner_fc', 'outer_fc'], ['outer_fc'], 'inner_fc'),
+    'update_point_fc_within_station_boundary': (['point_fc', 'station_fc'], ['station_fc'], 'point_fc'),
+    'update_line_fc_within_station_boundary': (['line_fc', 'station_fc'], ['station_fc'], 'line_fc'),
+}
+
+PlannedPass = namedtuple('PlannedPass', ['name', 'function', 'args', 'reads', 'writes', 'target_fields', 'context_fields'])
+
+
+def load_pipeline_spec(spec_path=DEFAULT_SPEC_PATH):
+    """
+    Read a pipeline spec file and return it as a dict with a 'steps' list.
+    Parameters:
+    spec_path (str): Path to a .json file, or a .yaml / .yml file when PyYAML is installed.
+    """
+    with open(spec_path, encoding='utf-8') as spec_file:
+        if os.path.splitext(spec_path)[1].lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ImportError(f"PyYAML is needed to read {spec_path}, install it or use a JSON spec.")
+            spec = yaml.safe_load(spec_file)
+        else:
+            spec = json.load(spec_file)
+    if not isinstance(spec, dict) or not isinstance(spec.get('steps'), list):
+        raise ValueError(f"The pipeline spec {spec_path} must contain a 'steps' list.")
+    return spec
+
+
+class Rule:
+    """
+    One step of the spec with its arguments resolved against the workspace.
+    """
+
+    def __init__(self, position, step, workspace):
+        self.position = position
+        self.name = step.get('name') or f"step{position + 1}"
+        self.function = step.get('function')
+        if self.function not in RULE_TYPES:
+            raise ValueError(f"Step '{self.name}': unsupported function '{self.function}', use one of {sorted(RULE_TYPES)}.")
+        parameters, read_parameters, write_parameter = RULE_TYPES[self.function]
+        missing = [parameter for parameter in parameters if parameter not in step and parameter != 'where_clause']
+        if missing:
+            raise ValueError(f"Step '{self.name}' is missing {', '.join(missing)}.")
+        self.arguments = {}
+        for parameter in parameters:
+            value = step.get(parameter)
+            if parameter.endswith('_fc'):
+                value = os.path.join(workspace, value)
+            elif parameter in ('field_pairs', 'field_updates'):
+                value = [tuple(item) for item in value]
+            self.arguments[parameter] = value
+        self.sources = [self.arguments[parameter] for parameter in read_parameters]
+        self.destination = self.arguments[write_parameter]
+        self.reads = {normalize(source) for source in self.sources}
+        self.writes = {normalize(self.destination)}
+
+    def args(self):
+        return tuple(self.arguments[parameter] for parameter in RULE_TYPES[self.function][0])
+
+    def conflicts_with(self, other):
+        return bool(self.writes & (other.writes | other.reads) or self.reads & other.writes)
+
+    def is_fusable(self):
+        """
+        Check if the rule can share a pass with other rules of its destination: attribute-only, and its row filter is
+        none or "<destination key> IS NOT NULL", which the fused pass can test on the row itself.
+        """
+        if self.function == 'update_fc_self':
+            return True
+        if self.function != 'update_fc_from_dict' or self.reads & self.writes:
+            return False
+        where_clause = self.arguments['where_clause']
+        key = re.escape(self.arguments['destination_key_field'])
+        return not where_clause or re.fullmatch(rf'\s*"?{key}"?\s+IS\s+NOT\s+NULL\s*', where_clause, re.IGNORECASE) is not None
+
+    def fused_rule(self):
+        """
+        Return the rule as the dict update_fc_fused expects.
+        """
+        rule = {'name': self.name, 'function': self.function}
+        rule.update((parameter, value) for parameter, value in self.arguments.items() if parameter != 'destination_fc')
+        return rule
+
+    def incremental_fields(self):
+        """
+        Return (target fields, {context feature class: fields}) compared by the incremental run of this rule.
+        """
+        arguments = self.arguments
+        if self.function == 'update_fc_from_dict':
+            return ([arguments['destination_key_field']] + [pair[1] for pair in arguments['field_pairs']],
+                    {arguments['source_fc']: [arguments['source_key_field']] + [pair[0] for pair in arguments['field_pairs']]})
+        if self.function == 'update_fc_self':
+            return [item for sublist in arguments['field_updates'] for item in sublist], {}
+        if self.function == 'update_fc_within':
+            return ['SHAPE@WKB', 'MIG_PARENTTYPE'], {arguments['outer_fc']: ['SHAPE@WKB']}
+        return ['SHAPE@WKB', 'MIG_STATIONGUID'], {arguments['station_fc']: ['GLOBALID', 'SHAPE@WKB']}
+
+
+def normalize(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def plan_pipeline(spec, workspace, fuse=True):
+    """
+    Return the list of PlannedPass of a spec, in an order that keeps every declared dependency.
+    Attribute rules with the same destination become one fused pass, unless fusing them would have to move a rule
+    across another step that reads or writes the same data in between (then they keep their own passes).
+    Parameters:
+    spec (dict): Loaded pipeline spec.
+    workspace (str): Geodatabase (or GeoPackage) the feature class names are relative to.
+    fuse (bool): False plans one pass per step, like the spec is written.
+    """
+    rules = [Rule(position, step, workspace) for position, step in enumerate(spec['steps'])]
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValueError("Pipeline step names must be unique.")
+
+    groups = {}
+    for rule in rules:
+        key = ('fused', normalize(rule.destination)) if fuse and rule.is_fusable() else ('single', rule.name)
+        groups.setdefault(key, []).append(rule)
+    groups = list(groups.values())
+    while True:
+        order, cycle = order_groups(rules, groups)
+        if not cycle:
+            break
+        groups = [group for group in groups if group not in cycle] + [[rule] for group in cycle for rule in group]
+    return [planned_pass(group) for group in order]
+
+
+def order_groups(rules, groups):
+    """
+    Sort the groups so that for every two conflicting rules the one declared first runs first, earliest declared first
+    among the rest. Return (ordered groups, []), or ([], the fused groups that could not be ordered) when fusing
+    created a cycle; those are split again.
+    """
+    group_of = {rule.name: position for position, group in enumerate(groups) for rule in group}
+    after = {position: set() for position in range(len(groups))}
+    for later_position, later in enumerate(rules):
+        for earlier in rules[:later_position]:
+            if later.conflicts_with(earlier) and group_of[earlier.name] != group_of[later.name]:
+                after[group_of[later.name]].add(group_of[earlier.name])
+    order = []
+    pending = set(after)
+    while pending:
+        ready = [position for position in pending if not after[position] & pending]
+        if not ready:
+            return [], [groups[position] for position in sorted(pending) if len(groups[position]) > 1]
+        first = min(ready, key=lambda position: groups[position][0].position)
+        order.append(groups[first])
+        pending.remove(first)
+    return order, []
+
+
+def planned_pass(group):
+    """
+    Turn a group of rules into a PlannedPass: the rule itself when it is alone, update_fc_fused otherwise.
+    """
+    if len(group) == 1:
+        rule = group[0]
+        target_fields, context_fields = rule.incremental_fields()
+        return PlannedPass(rule.name, rule.function, rule.args(), rule.sources, [rule.destination], target_fields, context_fields)
+    target_fields, context_fields = [], {}
+    for rule in group:
+        rule_targets, rule_context = rule.incremental_fields()
+        target_fields.extend(field for field in rule_targets if field not in target_fields)
+        for context_fc, fields in rule_context.items():
+            context_fields.setdefault(context_fc, [])
+            context_fields[context_fc].extend(field for field in fields if field not in context_fields[context_fc])
+    sources = list(dict.fromkeys(source for rule in group for source in rule.sources))
+    return PlannedPass('+'.join(rule.name for rule in group), FUSED_FUNCTION,
+                       (group[0].destination, [rule.fused_rule() for rule in group]),
+                       sources, [group[0].destination], target_fields, context_fields)
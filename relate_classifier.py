@@ -0,0 +1,129 @@
+# This module classifies points or lines against station polygons with one DE-9IM relate matrix per candidate pair.
+# The matrix is mapped to Inside / Partly Inside / On Boundary / Outside, instead of calling within() and then touches()/disjoint().
+# Shapely geometries return the full matrix from relate(); arcpy geometries can only test one pattern at a time,
+# so for arcpy the classifier keeps the chained predicates (still limited to the spatial index candidates).
+
+from spatial_index import EnvelopeIndex
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+INSIDE = 'Inside'
+PARTLY_INSIDE = 'Partly Inside'
+ON_BOUNDARY = 'On Boundary'
+OUTSIDE = 'Outside'
+
+
+def matrix_is_within(matrix):
+    """
+    Pattern T*F**F*** - the feature interior meets the station and nothing of the feature is outside it.
+    """
+    return matrix[0] != 'F' and matrix[2] == 'F' and matrix[5] == 'F'
+
+
+def matrix_intersects(matrix):
+    """
+    Not disjoint - any interior or boundary of the feature meets the interior or boundary of the station.
+    """
+    return matrix[0] != 'F' or matrix[1] != 'F' or matrix[3] != 'F' or matrix[4] != 'F'
+
+
+def matrix_touches(matrix):
+    """
+    The feature meets the station only on the boundary.
+    """
+    return matrix[0] == 'F' and matrix_intersects(matrix)
+
+
+def point_status_from_matrix(matrix):
+    """
+    Map a DE-9IM matrix (point vs station polygon) to 'Inside', 'On Boundary' or None.
+    """
+    if matrix_is_within(matrix):
+        return INSIDE
+    if matrix_touches(matrix):
+        return ON_BOUNDARY
+    return None
+
+
+def line_status_from_matrix(matrix):
+    """
+    Map a DE-9IM matrix (line vs station polygon) to 'Inside', 'Partly Inside' or None.
+    """
+    if matrix_is_within(matrix):
+        return INSIDE
+    if matrix_intersects(matrix):
+        return PARTLY_INSIDE
+    return None
+
+
+def point_status_from_predicates(geometry, station_polygon, counter):
+    counter[0] += 1
+    if geometry.within(station_polygon):
+        return INSIDE
+    counter[0] += 1
+    if geometry.touches(station_polygon):
+        return ON_BOUNDARY
+    return None
+
+
+def line_status_from_predicates(geometry, station_polygon, counter):
+    counter[0] += 1
+    if geometry.within(station_polygon):
+        return INSIDE
+    counter[0] += 1
+    if not geometry.disjoint(station_polygon):
+        return PARTLY_INSIDE
+    return None
+
+
+class StationClassifier:
+    """
+    Classify features against station polygons.
+    The first station (in the given order) that the feature is inside or touches wins, like the original loops.
+    """
+
+    def __init__(self, station_items, geometry_kind='point', tolerance=0.0):
+        """
+        Parameters:
+        station_items (iterable of tuples): (station GLOBALID, station polygon) pairs.
+        geometry_kind (str): 'point' (Inside / On Boundary) or 'line' (Inside / Partly Inside).
+        tolerance (float): XY tolerance used to pad the station envelopes.
+        """
+        if geometry_kind not in ('point', 'line'):
+            raise ValueError(f"Unknown geometry kind '{geometry_kind}', use 'point' or 'line'.")
+        self.index = EnvelopeIndex(station_items, tolerance=tolerance)
+        if geometry_kind == 'point':
+            self.status_from_matrix = point_status_from_matrix
+            self.status_from_predicates = point_status_from_predicates
+        else:
+            self.status_from_matrix = line_status_from_matrix
+            self.status_from_predicates = line_status_from_predicates
+        self.predicate_calls = 0
+        self.features_classified = 0
+        if shapely is not None:
+            for _, station_polygon in self.index.items:
+                if isinstance(station_polygon, shapely.Geometry):
+                    shapely.prepare(station_polygon)  # Prepared once, reused for every feature
+
+    def classify(self, geometry):
+        """
+        Return (station GLOBALID, status) for one feature, or (None, 'Outside') when no station matches.
+        """
+        self.features_classified += 1
+        uses_matrix = shapely is not None and isinstance(geometry, shapely.Geometry)
+        counter = [0]
+        result = (None, OUTSIDE)
+        for station_global_id, station_polygon in self.index.candidates(geometry):
+            if uses_matrix:
+                counter[0] += 1
+                status = self.status_from_matrix(geometry.relate(station_polygon))
+            else:
+                status = self.status_from_predicates(geometry, station_polygon, counter)
+            if status is not None:
+                result = (station_global_id, status)
+                break
+        self.predicate_calls += counter[0]
+        return result
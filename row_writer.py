@@ -0,0 +1,66 @@
+# This module wraps an arcpy UpdateCursor so a row is only written when one of its values really changed.
+# On versioned / enterprise geodatabases every updateRow() is an edit, so no-op writes are skipped and counted.
+
+
+def values_changed(row, original_row):
+    """
+    Check if any value in the row differs from the snapshot taken before it was edited.
+    Unchanged geometries are the same object, so they are compared by identity first.
+    """
+    for new_value, old_value in zip(row, original_row):
+        if new_value is old_value:
+            continue
+        if new_value != old_value:
+            return True
+    return False
+
+
+class ChangeWriter:
+    """
+    Write layer for an UpdateCursor that sends only real changes and counts written and skipped rows.
+    Usage:
+        writer = ChangeWriter(cursor)
+        for row in cursor:
+            original_row = tuple(row)
+            ...edit row...
+            writer.update(row, original_row)
+    """
+
+    def __init__(self, cursor):
+        """
+        Parameters:
+        cursor (arcpy.da.UpdateCursor): Open update cursor.
+        """
+        self.cursor = cursor
+        self.written = 0
+        self.skipped = 0
+
+    def update(self, row, original_row):
+        """
+        Write the row if it differs from original_row. Return True if it was written.
+        """
+        if values_changed(row, original_row):
+            self.cursor.updateRow(row)
+            self.written += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def skip(self):
+        """
+        Count a row that was read but not edited at all.
+        """
+        self.skipped += 1
+
+    def counts(self):
+        """
+        Return {'written': ..., 'skipped': ...}.
+        """
+        return {'written': self.written, 'skipped': self.skipped}
+
+    def summary(self, feature_class):
+        """
+        Return a one-line message with the written and skipped counts for a feature class.
+        """
+        return f"{feature_class}: {self.written} rows written, {self.skipped} unchanged rows skipped."
+
@@ -0,0 +1,211 @@
+# This module measures pipeline steps and writes a structured run report (JSON and CSV).
+# For every step it records wall time, rows read / written / skipped, predicate calls, peak memory
+# and every Search/Update/InsertCursor that was opened (table, rows, seconds). A cProfile dump per step is optional.
+# Cursors are counted by wrapping the cursors of the data backend while the step runs; the cost is one counter per row.
+# The column reads and writes of the bulk mode (read_columns / update_columns) are recorded the same way, one record per call.
+
+import cProfile
+import csv
+import json
+import os
+import sys
+import time
+
+from data_backend import get_backend
+
+REPORT_COLUMNS = ['step', 'wall_seconds', 'rows_read', 'rows_written', 'rows_skipped', 'predicate_calls',
+                  'peak_memory_mb', 'cursors', 'error']
+
+
+def peak_memory_mb():
+    """
+    Return the peak resident memory of this process in MB (Windows: peak working set), or None if unknown.
+    Worker processes are reused, so this is the high-water mark of the process up to now.
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / 2 ** 20, 1)
+        return None
+    try:
+        with open('/proc/self/status') as status_file:  # Linux: VmHWM belongs to this process, ru_maxrss survives exec()
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 2 ** 10, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10, 1)  # bytes on macOS, KB on Linux
+
+
+class CountingCursor:
+    """
+    Wrapper around a search / update / insert cursor that counts rows read, updated, inserted and deleted.
+    """
+
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+        self._opened = time.perf_counter()
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._record['seconds'] = round(time.perf_counter() - self._opened, 4)
+        return self._cursor.__exit__(*exc_info)
+
+    def __iter__(self):
+        record = self._record
+        for row in self._cursor:
+            record['rows'] += 1
+            yield row
+
+    def __next__(self):
+        row = next(self._cursor)
+        self._record['rows'] += 1
+        return row
+
+    def updateRow(self, row):
+        self._record['updated'] += 1
+        return self._cursor.updateRow(row)
+
+    def deleteRow(self):
+        self._record['deleted'] += 1
+        return self._cursor.deleteRow()
+
+    def insertRow(self, row):
+        self._record['inserted'] += 1
+        return self._cursor.insertRow(row)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CursorInstrumentation:
+    """
+    Context manager that replaces the search / update / insert cursors of the data backend with counting wrappers.
+    """
+
+    CURSOR_NAMES = {'search_cursor': 'SearchCursor', 'update_cursor': 'UpdateCursor', 'insert_cursor': 'InsertCursor'}
+    BULK_NAMES = {'read_columns': 'ReadColumns', 'update_columns': 'UpdateColumns'}
+
+    def __init__(self):
+        self.cursors = []
+        self.backend = get_backend()
+        self.bulk_calls = 0  # Cursors a bulk call opens itself are part of its record, not counted again
+
+    def _new_record(self, kind, table):
+        record = {'kind': kind, 'table': str(table), 'rows': 0, 'updated': 0, 'inserted': 0, 'deleted': 0, 'seconds': None}
+        self.cursors.append(record)
+        return record
+
+    def _wrap(self, kind, original):
+        def open_cursor(table, *args, **kwargs):
+            if self.bulk_calls:
+                return original(table, *args, **kwargs)
+            return CountingCursor(original(table, *args, **kwargs), self._new_record(kind, table))
+        return open_cursor
+
+    def _wrap_bulk(self, kind, original):
+        def bulk_call(table, *args, **kwargs):
+            record = self._new_record(kind, table)
+            opened = time.perf_counter()
+            self.bulk_calls += 1
+            try:
+                result = original(table, *args, **kwargs)
+            finally:
+                self.bulk_calls -= 1
+                record['seconds'] = round(time.perf_counter() - opened, 4)
+            if kind == 'ReadColumns':
+                record['rows'] = len(next(iter(result.values()))) if result else 0
+            else:
+                record['updated'] = len(args[0] if args else kwargs['oids'])
+            return result
+        return bulk_call
+
+    def __enter__(self):
+        for name, kind in self.CURSOR_NAMES.items():
+            setattr(self.backend, name, self._wrap(kind, getattr(self.backend, name)))  # Instance attribute hides the method
+        for name, kind in self.BULK_NAMES.items():
+            setattr(self.backend, name, self._wrap_bulk(kind, getattr(self.backend, name)))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name in list(self.CURSOR_NAMES) + list(self.BULK_NAMES):
+            delattr(self.backend, name)
+        return False
+
+
+def measure_step(step_name, function, profile_dir=None):
+    """
+    Run function() and return (result, metrics). Exceptions are raised after the metrics are recorded;
+    the metrics of a failed step are attached to the exception as step_metrics.
+    Parameters:
+    step_name (str): Name of the step, used for the profile file name.
+    function (callable): The step to run, without arguments.
+    profile_dir (str): Optional folder for a cProfile dump <step_name>.prof.
+    """
+    profiler = cProfile.Profile() if profile_dir else None
+    metrics = {'step': step_name}
+    start = time.perf_counter()
+    with CursorInstrumentation() as instrumentation:
+        try:
+            if profiler:
+                result = profiler.runcall(function)
+            else:
+                result = function()
+        except Exception as error:
+            metrics['error'] = repr(error)
+            error.step_metrics = metrics  # Kept when the exception is sent back from a worker process
+            raise
+        finally:
+            metrics['wall_seconds'] = round(time.perf_counter() - start, 3)
+            metrics['rows_read'] = sum(record['rows'] for record in instrumentation.cursors)
+            metrics['rows_written'] = sum(record['updated'] + record['inserted'] for record in instrumentation.cursors)
+            metrics['cursors'] = instrumentation.cursors
+            metrics['peak_memory_mb'] = peak_memory_mb()
+            if profiler:
+                os.makedirs(profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(profile_dir, f"{step_name}.prof"))
+    counts = result if isinstance(result, dict) else {}
+    metrics['rows_written'] = counts.get('written', metrics['rows_written'])
+    metrics['rows_skipped'] = counts.get('skipped')
+    metrics['predicate_calls'] = counts.get('predicate_calls')
+    return result, metrics
+
+
+def write_run_report(step_metrics, report_path):
+    """
+    Write the run report as JSON (all details, including every cursor) and as CSV (one row per step).
+    Parameters:
+    step_metrics (list of dict): Metrics returned by measure_step.
+    report_path (str): Path of the JSON file; the CSV file gets the same name with .csv.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w') as report_file:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'steps': step_metrics}, report_file, indent=2, default=str)
+    csv_path = os.path.splitext(report_path)[0] + '.csv'
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=REPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for metrics in step_metrics:
+            writer.writerow(dict(metrics, cursors=len(metrics.get('cursors', []))))
+    print(f"Run report written to {report_path} and {csv_path}.")
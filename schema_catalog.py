@@ -0,0 +1,100 @@
+# This module keeps a persistent catalog of feature class schemas for Copy_Field_Tool (schema_copy.py).
+# For every workspace the catalog stores a schema stamp (a value the backend changes on every schema change in the
+# workspace, see schema_stamp()) and, per feature class, its fields (name, type, length) and the fingerprint of the
+# template it was last made to match. While the stamp of a workspace is unchanged, its fields are taken from the
+# catalog instead of listing them again, and targets that already match the template are skipped without being opened.
+# When the stamp changed (any table of the workspace was altered), the entries of that workspace are dropped and
+# the fields are listed again. Workspaces without a stamp (enterprise geodatabases) are never cached.
+
+import hashlib
+import json
+import os
+import re
+
+from data_backend import FieldInfo, get_backend
+
+CATALOG_FORMAT = 1
+
+
+def workspace_of(feature_class):
+    """
+    Return the geodatabase (or GeoPackage) of a feature class path, or its folder for other paths.
+    """
+    match = re.match(r'(.*?\.(gdb|gpkg|sde|mdb))([\\/]|$)', str(feature_class), re.IGNORECASE)
+    return os.path.normcase(os.path.normpath(match.group(1) if match else os.path.dirname(str(feature_class))))
+
+
+def table_key(table):
+    return os.path.normcase(os.path.normpath(str(table)))
+
+
+def schema_fingerprint(fields):
+    """
+    Return a fingerprint of field names (without case), types and lengths, independent of the field order.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name, field_type, length in sorted((field.name.upper(), field.type, field.length or 0) for field in fields):
+        digest.update(f"{name}\x1f{field_type}\x1f{length}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SchemaCatalog:
+    """
+    Schema catalog file: {'format', 'workspaces': {workspace: {'stamp', 'tables': {table: {'fields', 'matches'}}}}}.
+    Parameters:
+    path (str): Path to the JSON file; it is created by save().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        state = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as catalog_file:
+                    state = json.load(catalog_file)
+            except ValueError:
+                state = {}  # Unreadable file: every schema is listed again
+        self.workspaces = state.get('workspaces', {}) if state.get('format') == CATALOG_FORMAT else {}
+
+    def tables(self, workspace):
+        """
+        Return {table: entry} of a workspace whose schema did not change since it was stored, otherwise an empty dict.
+        The dict belongs to the catalog: entries added to it are saved by store() and save().
+        """
+        stamp = get_backend().schema_stamp(workspace)
+        if stamp is None:
+            self.workspaces.pop(workspace, None)
+            return {}
+        entry = self.workspaces.get(workspace)
+        if entry is None or entry['stamp'] != stamp:
+            entry = self.workspaces[workspace] = {'stamp': stamp, 'tables': {}}
+        return entry['tables']
+
+    def fields(self, table):
+        """
+        Return the fields of a table (FieldInfo), from the catalog while its workspace is unchanged.
+        """
+        tables = self.tables(workspace_of(table))
+        entry = tables.get(table_key(table))
+        if entry is not None:
+            return [FieldInfo(*field) for field in entry['fields']]
+        fields = get_backend().list_fields(table)
+        tables[table_key(table)] = {'fields': [list(field) for field in fields], 'matches': None}
+        return fields
+
+    def store(self, workspace, tables):
+        """
+        Save the entries of a workspace under its current stamp, after this run changed its schema.
+        """
+        stamp = get_backend().schema_stamp(workspace)
+        if stamp is None:
+            self.workspaces.pop(workspace, None)
+        else:
+            self.workspaces[workspace] = {'stamp': stamp, 'tables': tables}
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as catalog_file:
+            json.dump({'format': CATALOG_FORMAT, 'workspaces': self.workspaces}, catalog_file)
+        os.replace(temporary_path, self.path)  # A crash never leaves a half-written catalog
@@ -0,0 +1,139 @@
+# This module copies the fields of a template feature class to many target feature classes (Copy_Field_Tool).
+# The template fields are listed once per run; every target gets only the fields it is missing, all of them with one
+# add_fields() call (AddFields in arcpy: one schema lock and one commit instead of one AddField per field).
+# Targets are grouped by geodatabase: the targets of one geodatabase are altered one after another (schema changes
+# of the same geodatabase would wait for each other's locks), different geodatabases are altered at the same time in
+# worker processes. Field names are compared without case, like the geodatabase does.
+# With a schema catalog (schema_catalog.py) the fields of unchanged workspaces are not listed again and the targets
+# that already match the template are skipped, so a repeated sweep over the same targets does almost nothing.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_backend import FieldInfo, get_backend
+from pipeline_scheduler import configure_worker_executable
+from schema_catalog import SchemaCatalog, schema_fingerprint, table_key, workspace_of
+
+SKIPPED_FIELD_NAMES = {'OBJECTID', 'SHAPE'}
+SKIPPED_FIELD_TYPES = {'OID', 'Geometry', 'GlobalID'}  # Created by the geodatabase, AddFields cannot add them
+
+
+def template_fields(template_fc, catalog=None):
+    """
+    Return the fields of the template feature class that can be copied, as FieldInfo.
+    Parameters:
+    template_fc (str): Path to the template feature class.
+    catalog (SchemaCatalog): Optional schema catalog, the fields are listed only when the template workspace changed.
+    """
+    fields = catalog.fields(template_fc) if catalog else get_backend().list_fields(template_fc)
+    return [FieldInfo(*field) for field in fields
+            if field.name.upper() not in SKIPPED_FIELD_NAMES and field.type not in SKIPPED_FIELD_TYPES]
+
+
+def field_diff(fields, target_fields):
+    """
+    Return (missing fields, names of the fields that already exist) of the template fields against a target.
+    Parameters:
+    fields (list of FieldInfo): Template fields, from template_fields().
+    target_fields (list): Fields of the target, from list_fields().
+    """
+    existing = {field.name.upper() for field in target_fields}
+    missing = [field for field in fields if field.name.upper() not in existing]
+    duplicates = [field.name for field in fields if field.name.upper() in existing]
+    return missing, duplicates
+
+
+def copy_fields_to_target(fields, target_fc, target_fields=None):
+    """
+    Add the missing template fields to one target and return its result row, with the target fields after the copy.
+    Parameters:
+    fields (list of FieldInfo): Template fields, from template_fields().
+    target_fc (str): Path to the target feature class.
+    target_fields (list): Known fields of the target (from the schema catalog), None to list them.
+    """
+    result = {'target': target_fc, 'added': [], 'existing': [], 'error': None, 'skipped': False, 'fields': None}
+    start = time.perf_counter()
+    try:
+        backend = get_backend()
+        if target_fields is None:
+            if not backend.exists(target_fc):
+                raise ValueError(f"{target_fc} does not exist.")
+            target_fields = backend.list_fields(target_fc)
+        target_fields = [FieldInfo(*field) for field in target_fields]
+        missing, result['existing'] = field_diff(fields, target_fields)
+        backend.add_fields(target_fc, missing)
+        result['added'] = [field.name for field in missing]
+        result['fields'] = [list(field) for field in target_fields + missing]
+    except Exception as error:  # One failing target (locked, missing) does not stop the others
+        result['error'] = str(error)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def copy_fields_to_workspace(fields, targets):
+    """
+    Add the missing template fields to the targets of one geodatabase, one after another. Used in the worker processes.
+    Parameters:
+    fields (list of FieldInfo): Template fields, from template_fields().
+    targets (list): (target path, known target fields or None) pairs.
+    """
+    return [copy_fields_to_target(fields, target_fc, target_fields) for target_fc, target_fields in targets]
+
+
+def copy_fields_to_targets(template_fc, target_fcs, max_workers=None, catalog_path=None):
+    """
+    Copy the fields of the template to every target that does not have them yet and return the result rows
+    ({'target', 'added', 'existing', 'error', 'skipped', 'fields', 'seconds'}) in the order of target_fcs.
+    Parameters:
+    template_fc (str): Path to the template feature class.
+    target_fcs (list): Paths to the target feature classes.
+    max_workers (int): Number of geodatabases altered at the same time, None for one per CPU, 1 to alter them here.
+    catalog_path (str): Optional schema catalog file; targets known to match the template are skipped.
+    """
+    catalog = SchemaCatalog(catalog_path) if catalog_path else None
+    fields = template_fields(template_fc, catalog)
+    fingerprint = schema_fingerprint(fields)
+
+    results = []
+    groups = {}  # workspace: [(target path, known fields or None)] of the targets that must be checked
+    known_tables = {}
+    for target_fc in target_fcs:
+        workspace = workspace_of(target_fc)
+        if workspace not in known_tables:
+            known_tables[workspace] = catalog.tables(workspace) if catalog else {}
+        entry = known_tables[workspace].get(table_key(target_fc))
+        if entry is not None and entry['matches'] == fingerprint:
+            results.append({'target': target_fc, 'added': [], 'existing': [], 'error': None, 'skipped': True,
+                            'fields': entry['fields'], 'seconds': 0.0})
+            continue
+        groups.setdefault(workspace, []).append((target_fc, entry['fields'] if entry else None))
+
+    def finish_group(workspace, group_results):
+        results.extend(group_results)
+        if catalog is None:
+            return
+        tables = known_tables[workspace]
+        for result in group_results:
+            if result['error']:
+                tables.pop(table_key(result['target']), None)
+            else:
+                tables[table_key(result['target'])] = {'fields': result['fields'], 'matches': fingerprint}
+        if any(result['added'] for result in group_results):
+            catalog.store(workspace, tables)  # The new stamp includes the fields added by this run
+
+    if max_workers == 1 or len(groups) <= 1:
+        for workspace, group in groups.items():
+            finish_group(workspace, copy_fields_to_workspace(fields, group))
+    else:
+        configure_worker_executable()
+        with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count(), len(groups))) as executor:
+            futures = {executor.submit(copy_fields_to_workspace, fields, group): workspace
+                       for workspace, group in groups.items()}
+            for future in as_completed(futures):
+                finish_group(futures[future], future.result())
+    if catalog is not None:
+        catalog.save()
+    order = {target_fc: position for position, target_fc in enumerate(target_fcs)}
+    results.sort(key=lambda result: order[result['target']])
+    return results
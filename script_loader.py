@@ -0,0 +1,104 @@
+# This module loads the update script of UpdateFeatureClassesTool (Update_Fields_Toolbox.py).
+# __import__ returns the module cached in sys.modules even after the script was edited, and adding the script folder
+# to sys.path on every run makes sys.path grow. Here every loaded script is kept with the content hash of its file and of
+# the sibling modules it imported from the same folder: an unchanged script is returned as it is, a changed one (or a
+# changed sibling) is executed again. The bytecode in __pycache__ is written as hash-checked .pyc, so Python reuses it
+# while the source is the same and never runs stale bytecode when a file is edited within the same second.
+# The script folder is added to sys.path once, the worker processes of the pipeline import the siblings from there.
+# On a reload only the siblings recorded for that script are removed from sys.modules; the modules of the toolbox
+# itself (this loader and script_worker) are never recorded, so their state (the running worker) is kept.
+
+import hashlib
+import importlib.util
+import os
+import py_compile
+import sys
+
+_loaded = {}  # normalized script path: (content hash, module, {sibling path: (module name, content hash)})
+TOOLBOX_MODULES = {__name__, 'script_worker'}
+
+
+def file_hash(path):
+    with open(path, 'rb') as source_file:
+        return hashlib.blake2b(source_file.read(), digest_size=16).hexdigest()
+
+
+def normalize(path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def add_to_sys_path(folder):
+    """
+    Put folder at the front of sys.path unless it is already there (under any spelling of the same path).
+    """
+    if all(normalize(entry or os.curdir) != normalize(folder) for entry in sys.path):
+        sys.path.insert(0, folder)
+
+
+def sibling_modules(folder):
+    """
+    Return {source path: module name} of the modules in sys.modules that were loaded from folder
+    (the toolbox modules excepted).
+    """
+    siblings = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if (path and name not in TOOLBOX_MODULES and path.endswith('.py')
+                and os.path.dirname(normalize(path)) == normalize(folder)):
+            siblings[normalize(path)] = name
+    return siblings
+
+
+def compile_checked_hash(path):
+    """
+    Write the hash-checked .pyc of a source file; nothing happens when __pycache__ is not writable.
+    """
+    try:
+        py_compile.compile(path, cfile=importlib.util.cache_from_source(path), doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+    except (OSError, py_compile.PyCompileError):
+        pass
+
+
+def load_script(script_path):
+    """
+    Return the module of a script file, executed again only when it or a sibling module it imported changed.
+    Parameters:
+    script_path (str): Path to the .py file.
+    """
+    path = normalize(script_path)
+    folder = os.path.dirname(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    add_to_sys_path(os.path.dirname(os.path.abspath(script_path)))
+
+    content_hash = file_hash(path)
+    entry = _loaded.get(path)
+    if entry is not None:
+        cached_hash, module, siblings = entry
+        changed = [sibling for sibling, (_, sibling_hash) in siblings.items()
+                   if not os.path.exists(sibling) or file_hash(sibling) != sibling_hash]
+        if cached_hash == content_hash and not changed and sys.modules.get(name) is module:
+            return module
+        print(f"Reloading {script_path}: {', '.join(os.path.basename(sibling) for sibling in changed) or 'the script'} changed.")
+        for sibling_name, _ in siblings.values():
+            sys.modules.pop(sibling_name, None)  # The siblings are imported again by the script, in its own order
+    elif name in sys.modules and normalize(getattr(sys.modules[name], '__file__', '') or '') != path:
+        raise ImportError(f"A different module named '{name}' is already loaded, rename {script_path}.")
+
+    compile_checked_hash(path)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # Worker processes and pickled step functions find the module under its name
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(name, None)
+        _loaded.pop(path, None)
+        raise
+    siblings = {sibling: sibling_name for sibling, sibling_name in sibling_modules(folder).items() if sibling != path}
+    for sibling in siblings:
+        compile_checked_hash(sibling)  # Imported with timestamp .pyc files, the next import checks the hash
+    _loaded[path] = (content_hash, module,
+                     {sibling: (sibling_name, file_hash(sibling)) for sibling, sibling_name in siblings.items()})
+    return module
+
@@ -0,0 +1,224 @@
+# This module runs the main() of an update script in a persistent worker process instead of inside ArcGIS Pro.
+# The worker is started once (UpdateFeatureClassesTool starts it while the tool dialog is open, so arcpy is already
+# imported when the tool runs) and is reused by later runs: arcpy, the script and its sibling modules and the lookups they
+# cache stay loaded; script_loader executes the script again only after it was edited.
+# print() output and arcpy.AddMessage / AddWarning / AddError / progressor calls of the worker are sent back to the tool
+# while the script runs. A cancelled run is interrupted with KeyboardInterrupt; a worker that does not stop within
+# CANCEL_GRACE_SECONDS is terminated and a new one is started by the next run.
+# The worker is not a daemon process, so the script can start its own process pools (the pipeline does); it is
+# stopped by stop_worker(), which is also called when the interpreter exits.
+
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+
+CANCEL_GRACE_SECONDS = 10
+POLL_SECONDS = 0.2
+FORWARDED_ARCPY_FUNCTIONS = ['AddMessage', 'AddWarning', 'AddError', 'SetProgressor', 'SetProgressorLabel',
+                             'SetProgressorPosition', 'ResetProgressor']
+
+_worker = None
+
+
+class ScriptCancelled(Exception):
+    """
+    The run was cancelled by the user.
+    """
+
+
+class ScriptFailed(Exception):
+    """
+    main() of the script raised an exception in the worker; the message is the worker's traceback.
+    """
+
+
+class MessageWriter:
+    """
+    File-like object for sys.stdout in the worker: every complete line is sent to the tool as a message.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.buffer = ''
+
+    def write(self, text):
+        self.buffer += text
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            self.connection.send(('message', 'AddMessage', (line,)))
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.connection.send(('message', 'AddMessage', (self.buffer,)))
+            self.buffer = ''
+
+
+def forward_arcpy_messages(connection):
+    """
+    Replace the arcpy message and progressor functions of the worker with functions that send the call to the tool.
+    """
+    try:
+        import arcpy
+    except ImportError:
+        return  # GeoPackage backend without ArcGIS: print() output is still forwarded
+    for name in FORWARDED_ARCPY_FUNCTIONS:
+        setattr(arcpy, name, lambda *args, _name=name: connection.send(('message', _name, args)))
+
+
+def watch_for_cancel(commands, running):
+    """
+    Thread of the worker: interrupt the running script when the tool sends 'cancel'.
+    """
+    import _thread
+    while running.is_set():
+        if commands.poll(POLL_SECONDS):
+            if commands.recv()[0] == 'cancel':
+                _thread.interrupt_main()
+                return
+
+
+def worker_loop(commands, messages, preload):
+    """
+    Main function of the worker process: run scripts until the tool sends 'stop' or closes the pipe.
+    """
+    for module_name in preload:
+        try:
+            __import__(module_name)  # Warm up while the user is still filling in the tool dialog
+        except ImportError:
+            pass
+    forward_arcpy_messages(messages)
+    from script_loader import load_script
+
+    while True:
+        try:
+            command = commands.recv()
+        except EOFError:
+            return
+        if command[0] == 'stop':
+            return
+        if command[0] != 'run':
+            continue
+        _, script_path, workspace = command
+        running = threading.Event()
+        running.set()
+        watcher = threading.Thread(target=watch_for_cancel, args=(commands, running), daemon=True)
+        watcher.start()
+        writer = MessageWriter(messages)
+        stdout = sys.stdout
+        sys.stdout = writer
+        try:
+            if workspace and 'arcpy' in sys.modules:
+                sys.modules['arcpy'].env.workspace = workspace
+            start = time.perf_counter()
+            script_module = load_script(script_path)
+            if not hasattr(script_module, 'main'):
+                raise AttributeError("The script does not contain a 'main' function.")
+            script_module.main()
+            writer.flush()
+            reply = ('done', round(time.perf_counter() - start, 1))
+        except KeyboardInterrupt:
+            reply = ('cancelled', None)
+        except BaseException:
+            reply = ('error', traceback.format_exc())
+        finally:
+            sys.stdout = stdout
+            running.clear()
+            watcher.join()
+        messages.send(reply)
+
+
+class ScriptWorker:
+    """
+    Handle of one worker process, used by the tool. Usage:
+        worker = get_worker()
+        worker.run(script_file, geodatabase, on_message, is_cancelled)
+    """
+
+    def __init__(self, preload=('arcpy', 'numpy')):
+        from pipeline_scheduler import configure_worker_executable
+        configure_worker_executable()  # Inside ArcGIS Pro the worker must start python.exe, not ArcGISPro.exe
+        context = multiprocessing.get_context('spawn')
+        self.commands, worker_commands = context.Pipe()
+        worker_messages, self.messages = context.Pipe()
+        self.process = context.Process(target=worker_loop, args=(worker_commands, worker_messages, list(preload)),
+                                       daemon=False, name='update-script-worker')  # Daemons cannot start pools
+        self.process.start()
+        worker_commands.close()
+        worker_messages.close()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def run(self, script_path, workspace, on_message, is_cancelled=lambda: False):
+        """
+        Run main() of the script in the worker and return its run time in seconds.
+        Parameters:
+        script_path (str): Path to the update script.
+        workspace (str): Workspace set as arcpy.env.workspace in the worker.
+        on_message (callable): Called as on_message(arcpy function name, args) for every forwarded message.
+        is_cancelled (callable): Checked while the script runs, True cancels the run.
+        """
+        self.commands.send(('run', os.path.abspath(script_path), workspace))
+        cancelled_at = None
+        while True:
+            if not self.messages.poll(POLL_SECONDS):
+                if not self.process.is_alive():
+                    raise ScriptFailed(f"The worker process stopped with exit code {self.process.exitcode}.")
+                if cancelled_at is None and is_cancelled():
+                    cancelled_at = time.perf_counter()
+                    self.commands.send(('cancel',))
+                elif cancelled_at is not None and time.perf_counter() - cancelled_at > CANCEL_GRACE_SECONDS:
+                    self.terminate()
+                    raise ScriptCancelled("The run was cancelled, the worker did not stop and was terminated.")
+                continue
+            try:
+                kind, *payload = self.messages.recv()
+            except EOFError:
+                self.terminate()
+                raise ScriptFailed("The worker process stopped unexpectedly.")
+            if kind == 'message':
+                on_message(*payload)
+            elif kind == 'done':
+                return payload[0]
+            elif kind == 'cancelled':
+                raise ScriptCancelled("The run was cancelled.")
+            elif kind == 'error':
+                raise ScriptFailed(payload[0])
+
+    def stop(self):
+        if self.process.is_alive():
+            self.commands.send(('stop',))
+            self.process.join(CANCEL_GRACE_SECONDS)
+        self.terminate()
+
+    def terminate(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+def get_worker():
+    """
+    Return the running worker process, starting a new one when there is none or the last one stopped.
+    """
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = ScriptWorker()
+    return _worker
+
+
+@atexit.register
+def stop_worker():
+    """
+    Stop the running worker process, if there is one.
+    """
+    global _worker
+
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -0,0 +1,107 @@
+# This module builds a bounding-box spatial index (STR-packed R-tree) over a list of geometries.
+# It works with arcpy geometries (extent) and shapely geometries (bounds),
+# so the same code can be used inside ArcGIS Pro or benchmarked with shapely only.
+
+import math
+
+
+def geometry_envelope(geometry):
+    """
+    Return the bounding box of a geometry as a tuple (xmin, ymin, xmax, ymax).
+    Parameters:
+    geometry: arcpy geometry (has .extent) or shapely geometry (has .bounds).
+    """
+    extent = getattr(geometry, 'extent', None)
+    if extent is not None:
+        return extent.XMin, extent.YMin, extent.XMax, extent.YMax
+    xmin, ymin, xmax, ymax = geometry.bounds
+    return xmin, ymin, xmax, ymax
+
+
+def envelopes_overlap(first, second):
+    """
+    Check if two envelopes (xmin, ymin, xmax, ymax) overlap or touch.
+    """
+    return (first[0] <= second[2] and second[0] <= first[2] and
+            first[1] <= second[3] and second[1] <= first[3])
+
+
+class EnvelopeIndex:
+    """
+    Static STR-packed R-tree over the envelopes of (key, geometry) items.
+    candidates() always returns the items in the same order they were given,
+    so "first match wins" loops keep the same result as a loop over the full list.
+    """
+
+    def __init__(self, items, node_capacity=16, tolerance=0.0):
+        """
+        Parameters:
+        items (iterable of tuples): (key, geometry) pairs, for example station_dict.items().
+        node_capacity (int): Maximum number of children in one tree node.
+        tolerance (float): Distance added around every envelope (use the XY tolerance of the data).
+        """
+        self.items = list(items)
+        self.node_capacity = max(2, node_capacity)
+        self.tolerance = tolerance or 0.0
+        self.envelopes = [self._padded(geometry_envelope(geometry)) for _, geometry in self.items]
+        self.root = self._build()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _padded(self, envelope):
+        pad = self.tolerance
+        return envelope[0] - pad, envelope[1] - pad, envelope[2] + pad, envelope[3] + pad
+
+    def _build(self):
+        # Each node is (envelope, children, is_leaf); leaf children are item positions.
+        nodes = [(envelope, position, True) for position, envelope in enumerate(self.envelopes)]
+        if not nodes:
+            return None
+        while len(nodes) > 1:
+            nodes = self._pack_level(nodes)
+        return nodes[0]
+
+    def _pack_level(self, nodes):
+        capacity = self.node_capacity
+        node_count = math.ceil(len(nodes) / capacity)
+        slice_count = math.ceil(math.sqrt(node_count))
+        slice_size = slice_count * capacity
+
+        nodes = sorted(nodes, key=lambda node: node[0][0] + node[0][2])
+        parents = []
+        for start in range(0, len(nodes), slice_size):
+            vertical_slice = sorted(nodes[start:start + slice_size], key=lambda node: node[0][1] + node[0][3])
+            for chunk_start in range(0, len(vertical_slice), capacity):
+                children = vertical_slice[chunk_start:chunk_start + capacity]
+                envelope = (min(child[0][0] for child in children),
+                            min(child[0][1] for child in children),
+                            max(child[0][2] for child in children),
+                            max(child[0][3] for child in children))
+                parents.append((envelope, children, False))
+        return parents
+
+    def query_positions(self, envelope):
+        """
+        Return the positions (in input order) of all items whose envelope overlaps the given envelope.
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_envelope, children, is_leaf = stack.pop()
+            if not envelopes_overlap(node_envelope, envelope):
+                continue
+            if is_leaf:
+                found.append(children)
+            else:
+                stack.extend(children)
+        found.sort()
+        return found
+
+    def candidates(self, geometry):
+        """
+        Return the (key, geometry) items whose envelope overlaps the envelope of the given geometry.
+        """
+        return [self.items[position] for position in self.query_positions(geometry_envelope(geometry))]
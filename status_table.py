@@ -0,0 +1,59 @@
+# This module writes the result of the station-boundary classifiers (Inside / Partly Inside / On Boundary / Outside,
+# the values of relate_classifier.py) to a sidecar table instead of a temporary status field that was added to and
+# deleted from the feature class every run.
+# The table has one row per classified feature: FEATURE_OID, STATION_GUID and STATUS. It is created only when it is missing,
+# for example in memory (r"memory\LineStatus") or next to the data (a geodatabase table or a GeoPackage table).
+# A full run replaces every row, an incremental run replaces only the rows of the processed OBJECTIDs.
+
+import os
+
+from data_backend import SelectionCursor, get_backend
+
+STATUS_FIELDS = [('FEATURE_OID', 'LONG', None), ('STATION_GUID', 'TEXT', 38), ('STATUS', 'TEXT', 20)]
+
+
+def create_status_table(table):
+    """
+    Create the sidecar status table if it does not exist yet.
+    Parameters:
+    table (str): Path to the table, for example r"memory\\LineStatus".
+    """
+    backend = get_backend()
+    if backend.exists(table):
+        return
+    out_path, out_name = os.path.split(table)
+    backend.create_feature_class(out_path, out_name, None)
+    for field_name, field_type, field_length in STATUS_FIELDS:
+        backend.add_field(table, field_name, field_type, field_length)
+    print(f"Status table {table} created.")
+
+
+class StatusTableWriter:
+    """
+    Collects (OBJECTID, station GUID, status) rows while a classifier runs and writes them to the sidecar table on close().
+    Parameters:
+    table (str): Path to the sidecar table.
+    oids (set): OBJECTIDs processed by an incremental run, None for a full run.
+    """
+
+    def __init__(self, table, oids=None):
+        self.table = table
+        self.oids = oids
+        self.rows = []
+
+    def add(self, feature_oid, station_guid, status):
+        self.rows.append((feature_oid, station_guid, status))
+
+    def close(self):
+        backend = get_backend()
+        create_status_table(self.table)
+        removed = 0
+        with SelectionCursor(self.table, ['FEATURE_OID'], 'FEATURE_OID', self.oids) as cursor:
+            for _ in cursor:
+                cursor.deleteRow()
+                removed += 1
+
+        with backend.insert_cursor(self.table, [field[0] for field in STATUS_FIELDS]) as cursor:
+            for row in self.rows:
+                cursor.insertRow(row)
+        print(f"Status table {self.table}: {removed} old rows replaced by {len(self.rows)} rows.")
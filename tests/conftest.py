@@ -0,0 +1,89 @@
+# The scripts of this repository are plain modules in its root folder, the tests import them from there.
+# Every test runs with the GeoPackage backend, so arcpy is not needed.
+
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+ATTRIBUTE_SPEC = {'steps': [
+    {'name': 'BayVoltage', 'function': 'update_fc_from_dict', 'source_fc': 'SwitchingFacility', 'destination_fc': 'Bay',
+     'source_key_field': 'GLOBALID', 'destination_key_field': 'SWITCHINGFACILITY_GUID',
+     'field_pairs': [['OPERATINGVOLTAGE', 'MIG_VOLTAGE']], 'where_clause': 'SWITCHINGFACILITY_GUID IS NOT NULL'},
+    {'name': 'BayStation', 'function': 'update_fc_from_dict', 'source_fc': 'SwitchingFacility', 'destination_fc': 'Bay',
+     'source_key_field': 'GLOBALID', 'destination_key_field': 'SWITCHINGFACILITY_GUID',
+     'field_pairs': [['STATION_GUID', 'MIG_STATIONGUID']]},
+    {'name': 'CircuitSourceOID', 'function': 'update_fc_self', 'source_fc': 'CircuitSource',
+     'field_updates': [['OBJECTID', 'MIG_OID', 'MIG_OID_TEXT'], ['GLOBALID', 'MIG_GLOBALID']]},
+]}
+
+
+@pytest.fixture(autouse=True)
+def geopackage_backend(monkeypatch):
+    from data_backend import get_backend, set_backend
+    monkeypatch.setenv('DATA_BACKEND', 'geopackage')  # Inherited by worker processes
+    backend = set_backend('geopackage')
+    yield backend
+    backend.close()
+    get_backend().close()  # A test may have selected a new backend
+
+
+@pytest.fixture
+def network(tmp_path):
+    """
+    Path of a small synthetic network (benchmark_updaters.generate_network) in a new GeoPackage.
+    """
+    from benchmark_updaters import generate_network
+    workspace = str(tmp_path / 'network.gpkg')
+    generate_network(workspace, 300, 5.0, seed=1)
+    return workspace
+
+
+@pytest.fixture
+def attribute_spec(tmp_path):
+    """
+    Path of a pipeline spec with the attribute steps only (joins and self-updates), which run on the network.
+    """
+    path = tmp_path / 'attribute_spec.json'
+    path.write_text(json.dumps(ATTRIBUTE_SPEC))
+    return str(path)
+
+
+def table_rows(table):
+    """
+    Return every row of a table (attribute fields only, with OBJECTID) as a list of tuples.
+    """
+    from data_backend import get_backend
+    backend = get_backend()
+    fields = ['OID@'] + [field.name for field in backend.list_fields(table) if field.type not in ('OID', 'Geometry')]
+    with backend.search_cursor(table, fields) as cursor:
+        return list(cursor)
+
+
+def copy_geopackage(source, destination):
+    """
+    Copy a GeoPackage file. The connections are closed first, so the write-ahead log is written into the file.
+    """
+    from data_backend import get_backend
+    get_backend().close()
+    shutil.copyfile(source, destination)
+    return destination
+
+
+@pytest.fixture
+def stamps_without_edits(geopackage_backend, monkeypatch):
+    """
+    Make the table stamps of the backend behave like arcpy without editor tracking: no exact stamp, and a stamp of
+    row count and highest OBJECTID only, which an edit in place does not change.
+    """
+    from data_backend import get_backend
+    backend = get_backend()
+    table_stamp = backend.table_stamp
+    monkeypatch.setattr(backend, 'table_stamp',
+                        lambda table, exact=False: None if exact else table_stamp(table).split(':changed:')[0])
@@ -0,0 +1,79 @@
+import pytest
+
+import checkpoint
+import row_writer
+from conftest import copy_geopackage, table_rows
+from data_backend import get_backend
+from import_py_file_mainlogic_for_toolbox import main
+
+TABLES = ['Bay', 'CircuitSource']
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def run(workspace, spec_path, **kwargs):
+    return {name: result[0] for name, result in main(max_workers=1, workspace=workspace, spec_path=spec_path,
+                                                     **kwargs).items()}
+
+
+@pytest.fixture
+def crash_after(monkeypatch):
+    """
+    Call crash_after(n) to make the n-th row update of the next run raise SimulatedCrash.
+    """
+    update = row_writer.ChangeWriter.update
+
+    def arm(row_count):
+        calls = {'count': 0}
+
+        def crashing_update(self, row, original_row):
+            calls['count'] += 1
+            if calls['count'] == row_count:
+                raise SimulatedCrash()
+            return update(self, row, original_row)
+
+        monkeypatch.setattr(row_writer.ChangeWriter, 'update', crashing_update)
+        return lambda: monkeypatch.setattr(row_writer.ChangeWriter, 'update', update)
+    return arm
+
+
+def test_resumed_run_skips_committed_chunks_and_finished_steps(network, attribute_spec, tmp_path, monkeypatch,
+                                                               crash_after, capsys):
+    monkeypatch.setattr(checkpoint, 'CHUNK_SIZE', 50)
+    clean_workspace = copy_geopackage(network, str(tmp_path / 'clean.gpkg'))
+    disarm = crash_after(420)  # In the second step, after the first step finished
+    with pytest.raises(SimulatedCrash):
+        run(network, attribute_spec)
+    disarm()
+    capsys.readouterr()
+
+    results = run(network, attribute_spec, resume=True)
+    output = capsys.readouterr().out
+    assert sorted(result.get('resumed') for result in results.values() if 'resumed' in result) == ['finished earlier']
+    assert [result['resumed_rows'] for result in results.values() if 'resumed_rows' in result] == [100]
+    assert "resumed, 100 rows of committed chunks were not processed again" in output
+
+    run(clean_workspace, attribute_spec)
+    for table in TABLES:
+        assert table_rows(f"{network}/{table}") == table_rows(f"{clean_workspace}/{table}"), table
+
+    results = run(network, attribute_spec, resume=True)
+    assert all(result['resumed'] == 'finished earlier' for result in results.values())
+
+
+@pytest.mark.parametrize('exact_stamp', [True, False])
+def test_finished_step_runs_again_when_its_source_changed(network, attribute_spec, request, exact_stamp):
+    if not exact_stamp:  # The edit below keeps the row count and the highest OBJECTID, the content is hashed
+        request.getfixturevalue('stamps_without_edits')
+    run(network, attribute_spec)
+    with get_backend().update_cursor(f"{network}/SwitchingFacility", ['OID@', 'OPERATINGVOLTAGE']) as cursor:
+        for row in cursor:
+            if row[0] == 1:
+                cursor.updateRow([row[0], 999])
+
+    results = run(network, attribute_spec, resume=True)
+    assert results['CircuitSourceOID']['resumed'] == 'finished earlier'
+    assert 'resumed' not in results['BayVoltage+BayStation']
+    assert results['BayVoltage+BayStation']['written'] > 0
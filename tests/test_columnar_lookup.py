@@ -0,0 +1,39 @@
+import pytest
+
+import columnar_lookup
+from columnar_lookup import build_lookup
+from conftest import copy_geopackage, table_rows
+from import_py_file_mainlogic_for_toolbox import update_fc_from_dict
+
+FIELDS = ['VALUE', 'OTHER']
+ROWS = {
+    'str keys': [(key, value, [index]) for index, (key, value) in enumerate(
+        zip(['a', 'bb', '', 'a', 'é', 'x' * 20, 'bb', 'ab', 'a\x00', None, 5],
+            [1, 1.0, True, 'v', None, 'v', 2, float('nan'), 1, 3, 4]))],
+    'fixed width keys': [(f"{{{number % 40:08X}}}", f"value {number % 3}", number % 2) for number in range(100)],
+    'int keys': [(3, 'a', 1), (-1, 'b', 2.5), (2 ** 70, 'c', 3), (3, 'd', 4), (None, 'e', 5)],
+    'no rows': [],
+}
+PROBES = ['zz', 'a\x00\x00', 'bb\x00', 'x' * 21, 'x' * 19, 'abb', '{00000001}', '{00000001', 3.0, 4, 2 ** 64 + 3, b'a']
+
+
+@pytest.mark.parametrize('rows', list(ROWS.values()), ids=list(ROWS))
+def test_columnar_lookup_matches_a_dict(rows, monkeypatch):
+    monkeypatch.setattr(columnar_lookup, 'CHUNK_ROWS', 7)  # Several chunks, key widths differ between them
+    expected = build_lookup(FIELDS, rows, compact=False)
+    lookup = build_lookup(FIELDS, rows)
+    assert len(lookup) == len(rows)
+    for key in list(expected) + PROBES:
+        assert lookup.get(key) == expected.get(key), key  # The last row of a key wins
+        assert (key in lookup) == (key in expected), key
+        for index, field in enumerate(FIELDS):
+            assert (lookup.get_value(key, field),) == ((expected[key][index] if key in expected else None),), key
+
+
+def test_update_fc_from_dict_writes_the_same_rows_with_either_lookup(network, tmp_path):
+    dict_workspace = copy_geopackage(network, str(tmp_path / 'dict.gpkg'))
+    for workspace, compact_lookup in ((network, True), (dict_workspace, False)):
+        update_fc_from_dict(f"{workspace}/SwitchingFacility", f"{workspace}/Bay", 'GLOBALID', 'SWITCHINGFACILITY_GUID',
+                            [('STATION_GUID', 'MIG_STATIONGUID'), ('OPERATINGVOLTAGE', 'MIG_VOLTAGE')], None,
+                            compact_lookup=compact_lookup)
+    assert table_rows(f"{network}/Bay") == table_rows(f"{dict_workspace}/Bay")
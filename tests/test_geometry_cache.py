@@ -0,0 +1,56 @@
+import pytest
+import shapely
+
+import geometry_cache
+from data_backend import get_backend
+from geometry_cache import clear_geometry_cache, load_geometries
+
+
+@pytest.fixture
+def stations(tmp_path):
+    backend = get_backend()
+    table = backend.create_feature_class(str(tmp_path / 'stations.gpkg'), 'StationBoundary', 'POLYGON')
+    backend.add_field(table, 'GLOBALID', 'TEXT', field_length=50)
+    with backend.insert_cursor(table, ['SHAPE@', 'GLOBALID']) as cursor:
+        for number in range(3):
+            cursor.insertRow([shapely.box(number * 10, 0, number * 10 + 5, 5), f"{{STATION-{number}}}"])
+    yield table
+    clear_geometry_cache()
+
+
+def reshape_first_station(table):
+    with get_backend().update_cursor(table, ['OID@', 'SHAPE@']) as cursor:
+        for row in cursor:
+            if row[0] == 1:
+                cursor.updateRow([row[0], shapely.box(100, 100, 120, 120)])
+
+
+def first_bounds(geometries):
+    return dict(geometries)['{STATION-0}'].bounds
+
+
+def test_disk_cache_is_used_until_the_stations_change(stations, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    load_geometries(stations, cache_dir=cache_dir)
+    clear_geometry_cache()
+    load_geometries(stations, cache_dir=cache_dir)
+    assert 'from the disk cache' in capsys.readouterr().out
+
+    reshape_first_station(stations)
+    clear_geometry_cache()
+    geometries = load_geometries(stations, cache_dir=cache_dir)
+    assert 'from the feature class' in capsys.readouterr().out
+    assert first_bounds(geometries) == (100.0, 100.0, 120.0, 120.0)
+
+
+def test_reshaped_station_is_seen_without_an_exact_stamp(stations, tmp_path, stamps_without_edits, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    load_geometries(stations, cache_dir=cache_dir)
+    load_geometries(stations, cache_dir=cache_dir)
+    assert 'from the memory cache' in capsys.readouterr().out
+
+    reshape_first_station(stations)  # Same row count and highest OBJECTID
+    geometries = load_geometries(stations, cache_dir=cache_dir)
+    assert first_bounds(geometries) == (100.0, 100.0, 120.0, 120.0)
+    assert not (tmp_path / 'cache').exists()
+    assert geometry_cache.table_fingerprint(stations, 'GLOBALID') is None
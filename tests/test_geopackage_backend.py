@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import copy_geopackage, table_rows
+from data_backend import SelectionCursor, get_backend, selection_clauses
+from import_py_file_mainlogic_for_toolbox import update_fc_from_dict, update_fc_self
+
+NAMES = ['', None, "o'q", 'plain', '']
+
+
+@pytest.fixture
+def names_workspace(tmp_path):
+    """
+    GeoPackage with a table Names (NAME with empty strings and nulls) and a table Keys to join NAME from.
+    """
+    backend = get_backend()
+    workspace = str(tmp_path / 'names.gpkg')
+    names = backend.create_feature_class(workspace, 'Names', None)
+    backend.add_fields(names, [('NAME', 'TEXT', 20), ('NAME_COPY', 'TEXT', 20), ('NAME_TEXT', 'TEXT', 20), ('KEY', 'TEXT', 20)])
+    with backend.insert_cursor(names, ['NAME', 'KEY']) as cursor:
+        for number, name in enumerate(NAMES):
+            cursor.insertRow([name, f"k{number}"])
+    keys = backend.create_feature_class(workspace, 'Keys', None)
+    backend.add_fields(keys, [('KEY', 'TEXT', 20), ('NAME', 'TEXT', 20)])
+    with backend.insert_cursor(keys, ['KEY', 'NAME']) as cursor:
+        for number, name in enumerate(NAMES):
+            cursor.insertRow([f"k{number}", name])
+    return workspace
+
+
+def test_empty_strings_and_nulls_are_read_as_they_are_stored(names_workspace):
+    backend = get_backend()
+    names = f"{names_workspace}/Names"
+    with backend.search_cursor(names, ['NAME']) as cursor:
+        assert [row[0] for row in cursor] == NAMES
+    assert backend.read_columns(names, ['NAME'])['NAME'].tolist() == NAMES
+
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_self_update_keeps_empty_strings_and_nulls(names_workspace, bulk):
+    names = f"{names_workspace}/Names"
+    update_fc_self(names, [('NAME', 'NAME_COPY', 'NAME_TEXT')], bulk=bulk)
+    rows = get_backend().read_columns(names, ['NAME_COPY', 'NAME_TEXT'])
+    assert rows['NAME_COPY'].tolist() == NAMES
+    assert rows['NAME_TEXT'].tolist() == [str(name) for name in NAMES]
+
+
+def test_row_and_bulk_joins_write_the_same_values(names_workspace, tmp_path):
+    bulk_workspace = copy_geopackage(names_workspace, str(tmp_path / 'names_bulk.gpkg'))
+    for workspace, bulk in ((names_workspace, False), (bulk_workspace, True)):
+        with get_backend().update_cursor(f"{workspace}/Names", ['NAME_COPY']) as cursor:
+            for row in cursor:
+                cursor.updateRow(['stale'])
+        update_fc_from_dict(f"{workspace}/Keys", f"{workspace}/Names", 'KEY', 'KEY', [('NAME', 'NAME_COPY')], None,
+                            bulk=bulk)
+    assert table_rows(f"{names_workspace}/Names") == table_rows(f"{bulk_workspace}/Names")
+    assert get_backend().read_columns(f"{bulk_workspace}/Names", ['NAME_COPY'])['NAME_COPY'].tolist() == NAMES
+
+
+def test_selection_cursor_selects_empty_strings_nulls_and_quotes(names_workspace, monkeypatch):
+    names = f"{names_workspace}/Names"
+    wanted = {'', None, "o'q"}
+    assert selection_clauses('NAME', wanted) is not None
+    with SelectionCursor(names, ['KEY'], 'NAME', wanted, mode='search') as cursor:
+        selected = sorted(row[0] for row in cursor)
+    assert selected == ['k0', 'k1', 'k2', 'k4']
+
+    monkeypatch.setattr('data_backend.SELECTION_MAX_QUERIES', 0)  # Too many values: one cursor and a Python filter
+    assert selection_clauses('NAME', wanted) is None
+    with SelectionCursor(names, ['KEY'], 'NAME', wanted, mode='search') as cursor:
+        assert sorted(row[0] for row in cursor) == selected
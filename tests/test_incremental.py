@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import copy_geopackage, table_rows
+from data_backend import get_backend
+from import_py_file_mainlogic_for_toolbox import main
+
+TABLES = ['Bay', 'CircuitSource', 'SwitchingFacility']
+
+
+def run(workspace, spec_path, **kwargs):
+    return {name: result[0] for name, result in main(max_workers=1, workspace=workspace, spec_path=spec_path,
+                                                     **kwargs).items()}
+
+
+def edit_network(workspace):
+    """
+    Change source values, destination keys (new, emptied and unknown keys) and self-update inputs.
+    """
+    backend = get_backend()
+    with backend.update_cursor(f"{workspace}/SwitchingFacility", ['OID@', 'STATION_GUID', 'OPERATINGVOLTAGE']) as cursor:
+        for row in cursor:
+            if row[0] % 4 == 0:
+                cursor.updateRow([row[0], f"{{STATION-CHANGED-{row[0]}}}", 400])
+    with backend.update_cursor(f"{workspace}/Bay", ['OID@', 'SWITCHINGFACILITY_GUID']) as cursor:
+        for row in cursor:
+            if row[0] % 10 == 1:
+                cursor.updateRow([row[0], None])
+            elif row[0] % 10 == 2:
+                cursor.updateRow([row[0], '{SF-3}'])
+            elif row[0] % 10 == 3:
+                cursor.updateRow([row[0], "{SF-UNKNOWN-'quoted'}"])
+    with backend.update_cursor(f"{workspace}/CircuitSource", ['OID@', 'GLOBALID']) as cursor:
+        for row in cursor:
+            if row[0] % 7 == 0:
+                cursor.updateRow([row[0], f"{{CS-CHANGED-{row[0]}}}"])
+
+
+@pytest.mark.parametrize('fuse', [False, True])
+@pytest.mark.parametrize('bulk', [False, True])
+def test_incremental_run_gives_the_same_tables_as_a_full_run(network, attribute_spec, tmp_path, bulk, fuse):
+    run(network, attribute_spec, bulk=bulk, fuse=fuse)
+    run(network, attribute_spec, bulk=bulk, fuse=fuse, incremental=True)  # Stores the watermarks
+    edit_network(network)
+    full_workspace = copy_geopackage(network, str(tmp_path / 'full.gpkg'))
+
+    results = run(network, attribute_spec, bulk=bulk, fuse=fuse, incremental=True)
+    run(full_workspace, attribute_spec, bulk=bulk, fuse=fuse)
+    for table in TABLES:
+        assert table_rows(f"{network}/{table}") == table_rows(f"{full_workspace}/{table}"), table
+    assert all(result['written'] > 0 for result in results.values())
+    if not fuse:  # Joins read only the changed destination rows; a fused step runs again in full when a source changed
+        bay_count = len(table_rows(f"{network}/Bay"))
+        assert all(results[name]['written'] + results[name]['skipped'] < bay_count for name in ('BayVoltage', 'BayStation'))
+
+    results = run(network, attribute_spec, bulk=bulk, fuse=fuse, incremental=True)
+    assert all(result['written'] == 0 for result in results.values())
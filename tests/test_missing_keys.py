@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+import row_writer
+from conftest import ATTRIBUTE_SPEC
+from import_py_file_mainlogic_for_toolbox import update_fc_from_dict, update_fc_fused
+from missing_keys import missing_keys_file
+
+
+def bay_rules(workspace):
+    """
+    The two joins of Bay from SwitchingFacility (one with a row filter, one without), with full paths.
+    """
+    rules = []
+    for step in ATTRIBUTE_SPEC['steps'][:2]:
+        rule = dict(step, source_fc=f"{workspace}/{step['source_fc']}")
+        del rule['name'], rule['destination_fc']
+        rules.append(rule)
+    return rules
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as keys_file:
+        return keys_file.read().splitlines()
+
+
+def test_fused_rules_of_one_source_share_one_list_and_count_a_row_once(network, tmp_path):
+    missing_keys_dir = str(tmp_path / 'missing_keys')
+    result = update_fc_fused(f"{network}/Bay", bay_rules(network), missing_keys_dir=missing_keys_dir)
+    lines = read_lines(missing_keys_file(missing_keys_dir, f"{network}/SwitchingFacility", f"{network}/Bay"))
+    assert result['missing'] == len(lines) > 0
+
+    separate = update_fc_from_dict(f"{network}/SwitchingFacility", f"{network}/Bay", 'GLOBALID', 'SWITCHINGFACILITY_GUID',
+                                   [('STATION_GUID', 'MIG_STATIONGUID')], None)
+    assert result['missing'] == separate['missing']  # The rule without a filter misses every row the other one misses
+
+
+def test_missing_key_lists_are_closed_when_the_pass_fails(network, tmp_path, monkeypatch):
+    missing_keys_dir = str(tmp_path / 'missing_keys')
+    update = row_writer.ChangeWriter.update
+    calls = {'count': 0}
+
+    def failing_update(self, row, original_row):
+        calls['count'] += 1
+        if calls['count'] == 200:
+            raise RuntimeError('lock conflict')
+        return update(self, row, original_row)
+
+    monkeypatch.setattr(row_writer.ChangeWriter, 'update', failing_update)
+    with pytest.raises(RuntimeError) as failure:  # Keeps the frames of the pass, and their open files, alive
+        update_fc_fused(f"{network}/Bay", bay_rules(network), missing_keys_dir=missing_keys_dir)
+    path = missing_keys_file(missing_keys_dir, f"{network}/SwitchingFacility", f"{network}/Bay")
+    assert os.path.getsize(path) > 0  # Written out by close(), not left in the buffer of an open file
+    assert str(failure.value) == 'lock conflict'
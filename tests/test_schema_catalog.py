@@ -0,0 +1,63 @@
+import types
+
+import schema_copy
+from data_backend import ArcpyBackend, FieldInfo, get_backend
+from schema_copy import copy_fields_to_targets
+
+
+def create_tables(template_workspace, target_workspace):
+    backend = get_backend()
+    template = backend.create_feature_class(template_workspace, 'Template', 'POINT')
+    backend.add_fields(template, [('MIG_STATIONGUID', 'TEXT', 50), ('MIG_VOLTAGE', 'LONG', None)])
+    targets = [backend.create_feature_class(target_workspace, name, 'POINT') for name in ('Bay', 'Lines')]
+    backend.add_field(targets[1], 'MIG_VOLTAGE', 'LONG')
+    return template, targets
+
+
+def test_catalog_skips_matching_targets_until_the_workspace_schema_changes(tmp_path):
+    template, targets = create_tables(str(tmp_path / 'schema.gpkg'), str(tmp_path / 'schema.gpkg'))
+    catalog_path = str(tmp_path / 'catalog' / 'schema_catalog.json')
+
+    results = copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+    assert [(result['added'], result['existing'], result['skipped']) for result in results] == [
+        (['MIG_STATIONGUID', 'MIG_VOLTAGE'], [], False), (['MIG_STATIONGUID'], ['MIG_VOLTAGE'], False)]
+
+    results = copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+    assert [result['skipped'] for result in results] == [True, True]
+
+    get_backend().delete_field(targets[0], 'MIG_VOLTAGE')  # Changes the schema stamp of the workspace
+    results = copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+    assert [(result['added'], result['skipped']) for result in results] == [(['MIG_VOLTAGE'], False), ([], False)]
+    assert {field.name for field in get_backend().list_fields(targets[0])} >= {'MIG_STATIONGUID', 'MIG_VOLTAGE'}
+
+    results = copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+    assert [result['skipped'] for result in results] == [True, True]
+
+
+def test_catalog_lists_the_template_again_after_it_changed(tmp_path):
+    template, targets = create_tables(str(tmp_path / 'template.gpkg'), str(tmp_path / 'targets.gpkg'))
+    catalog_path = str(tmp_path / 'schema_catalog.json')
+    copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+
+    get_backend().add_field(template, 'MIG_LOCATION', 'TEXT', field_length=20)
+    results = copy_fields_to_targets(template, targets, max_workers=1, catalog_path=catalog_path)
+    assert [(result['added'], result['skipped']) for result in results] == [(['MIG_LOCATION'], False)] * 2
+
+
+def test_template_guid_field_is_added_with_the_addfields_type(monkeypatch):
+    added = {}
+    listed = {'Template': [FieldInfo('OBJECTID', 'OID', 4), FieldInfo('GLOBALID', 'GlobalID', 38),
+                           FieldInfo('MIG_STATIONGUID', 'Guid', 38), FieldInfo('MIG_NAME', 'String', 50)],
+              'Bay': [FieldInfo('OBJECTID', 'OID', 4)]}
+    arcpy = types.SimpleNamespace(  # ListFields reports field types as 'Guid', 'String'; AddFields wants 'GUID', 'TEXT'
+        Exists=lambda table: table in listed,
+        ListFields=lambda table: [types.SimpleNamespace(name=name, type=field_type, length=length)
+                                  for name, field_type, length in listed[table]],
+        management=types.SimpleNamespace(AddFields=lambda table, descriptions: added.setdefault(table, descriptions)))
+    backend = ArcpyBackend.__new__(ArcpyBackend)
+    backend.arcpy = arcpy
+    monkeypatch.setattr(schema_copy, 'get_backend', lambda: backend)
+
+    results = copy_fields_to_targets('Template', ['Bay'], max_workers=1)
+    assert [(result['added'], result['error']) for result in results] == [(['MIG_STATIONGUID', 'MIG_NAME'], None)]
+    assert added == {'Bay': [['MIG_STATIONGUID', 'GUID', '', 38], ['MIG_NAME', 'TEXT', '', 50]]}
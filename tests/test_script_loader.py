@@ -0,0 +1,68 @@
+import os
+import sys
+
+import pytest
+
+import script_loader
+import script_worker
+from conftest import ROOT
+
+SCRIPT = """
+import loader_sibling
+
+
+def main():
+    return loader_sibling.VALUE
+"""
+
+
+@pytest.fixture
+def script_folder(tmp_path, monkeypatch):
+    """
+    Folder with loader_script.py, which imports loader_sibling.py from the same folder.
+    """
+    monkeypatch.setattr(sys, 'path', list(sys.path))
+    monkeypatch.setattr(script_loader, '_loaded', {})
+    (tmp_path / 'loader_script.py').write_text(SCRIPT)
+    (tmp_path / 'loader_sibling.py').write_text("VALUE = 1\n")
+    yield tmp_path
+    for name in ('loader_script', 'loader_sibling', 'loader_other'):
+        sys.modules.pop(name, None)
+
+
+def test_unchanged_script_is_not_executed_again(script_folder):
+    path = str(script_folder / 'loader_script.py')
+    module = script_loader.load_script(path)
+    assert module.main() == 1
+    assert script_loader.load_script(path) is module
+    assert sys.path.count(str(script_folder)) == 1
+
+
+def test_edited_sibling_reloads_the_script_and_only_its_recorded_siblings(script_folder):
+    path = str(script_folder / 'loader_script.py')
+    worker_module = sys.modules['script_worker']
+    module = script_loader.load_script(path)
+    (script_folder / 'loader_other.py').write_text("VALUE = 'other'\n")
+    import loader_other  # Loaded from the same folder after the script, not recorded as its sibling
+
+    (script_folder / 'loader_sibling.py').write_text("VALUE = 2\n")  # Same size, possibly the same mtime second
+    reloaded = script_loader.load_script(path)
+    assert reloaded is not module
+    assert reloaded.main() == 2
+    assert sys.modules['loader_other'] is loader_other
+    assert sys.modules['script_worker'] is worker_module is script_worker
+
+
+def test_edited_script_is_executed_again(script_folder):
+    path = script_folder / 'loader_script.py'
+    module = script_loader.load_script(str(path))
+    path.write_text(SCRIPT.replace('loader_sibling.VALUE', 'loader_sibling.VALUE + 10'))
+    reloaded = script_loader.load_script(str(path))
+    assert reloaded is not module
+    assert reloaded.main() == 11
+
+
+def test_toolbox_modules_are_never_recorded_as_siblings():
+    siblings = script_loader.sibling_modules(ROOT).values()
+    assert 'script_worker' in sys.modules and os.path.dirname(script_worker.__file__) == ROOT
+    assert 'script_loader' not in siblings and 'script_worker' not in siblings
@@ -0,0 +1,30 @@
+import textwrap
+
+from script_worker import ScriptWorker
+
+POOLED_SCRIPT = """
+from concurrent.futures import ProcessPoolExecutor
+
+
+def square(value):
+    return value * value
+
+
+def main():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        print(f"Squares: {sum(executor.map(square, range(10)))}")
+"""
+
+
+def test_worker_runs_a_script_with_a_process_pool(tmp_path):
+    script = tmp_path / 'pooled_script.py'
+    script.write_text(textwrap.dedent(POOLED_SCRIPT))
+    messages = []
+    worker = ScriptWorker(preload=())
+    try:
+        worker.run(str(script), None, lambda function_name, args: messages.append((function_name, args)))
+        worker.run(str(script), None, lambda function_name, args: messages.append((function_name, args)))
+    finally:
+        worker.stop()
+    assert messages == [('AddMessage', ('Squares: 285',))] * 2
+    assert not worker.is_alive()